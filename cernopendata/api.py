@@ -13,8 +13,9 @@ from invenio_files_rest.models import (
     ObjectVersionTag,
 )
 from invenio_records_files.api import FileObject, FilesIterator
+from sqlalchemy.orm import joinedload
 
-from cernopendata.cold_storage.api import ColdRecord, FileAvailability
+from cernopendata.cold_storage.api import ColdRecord, FileAvailability, FileURI
 
 
 class FileIndexIterator(object):
@@ -132,6 +133,8 @@ class FileIndexMetadata:
         BucketTag.create(rb._bucket, "index_name", index_file_name)
         BucketTag.create(rb._bucket, "record", record.model.id)
         BucketTag.create(rb._bucket, "description", description)
+        BucketTag.create(rb._bucket, "checksum", file_object.checksum)
+        uris = []
         for entry in index_content:
             entry_file = FileInstance.create()
             entry_file.set_uri(entry["uri"], entry["size"], entry["checksum"])
@@ -145,11 +148,13 @@ class FileIndexMetadata:
                 rb._avl[f.availability] = 0
             rb._avl[f.availability] += 1
             entry["file_id"] = str(entry_file.id)
+            uris.append((entry["uri"], record.model.id, rb._bucket.id, o.key))
             rb._number_files += 1
             if not rb._number_files % 1000 and verbose:
                 logger.info(f"       {rb._number_files} entries processed")
             rb._size += entry["size"]
             rb._files.append(f)
+        FileURI.add_many(uris)
         record["_file_indices"].append(rb.dumps())
         if verbose:
             logger.info(
@@ -157,6 +162,70 @@ class FileIndexMetadata:
             )
         return rb
 
+    @classmethod
+    def update(cls, record, bucket_id, file_object, description="", logger=None):
+        """Update an existing FileIndex with the new content of the index file.
+
+        The entries are compared by uri, checksum and size. The ones that have not
+        changed keep their objects and tags; only the rest are removed or created.
+        """
+        logger = logging.getLogger(__name__) if not logger else logger
+        verbose = logger.getEffectiveLevel() == logging.DEBUG
+        my_file = file_object.storage().open()
+        index_content = json.load(my_file)
+        my_file.close()
+
+        index_file_name = file_object.uri.split("/")[-1:][0]
+        bucket = Bucket.get(bucket_id)
+        existing = {}
+        next_number = 0
+        objects = ObjectVersion.get_by_bucket(bucket).options(
+            joinedload(ObjectVersion.file)
+        )
+        for o in objects:
+            existing[o.file.uri] = o
+            next_number = max(next_number, int(o.key.rsplit("_", 1)[-1]) + 1)
+        uris = []
+        kept = 0
+        for entry in index_content:
+            o = existing.pop(entry["uri"], None)
+            if o and (o.file.checksum, o.file.size) == (
+                entry["checksum"],
+                entry["size"],
+            ):
+                kept += 1
+                continue
+            if o:
+                cls._remove_entry(o)
+            entry_file = FileInstance.create()
+            entry_file.set_uri(entry["uri"], entry["size"], entry["checksum"])
+            o = ObjectVersion.create(
+                bucket, f"{index_file_name}_{next_number}", _file_id=entry_file.id
+            )
+            uris.append((entry["uri"], record.model.id, bucket.id, o.key))
+            next_number += 1
+        for o in existing.values():
+            cls._remove_entry(o)
+        FileURI.add_many(uris)
+        BucketTag.create_or_update(bucket, "description", description)
+        BucketTag.create_or_update(bucket, "checksum", file_object.checksum)
+        if verbose:
+            logger.info(
+                f"  -> Updated index file {file_object.uri}: {kept} entries kept, "
+                f"{len(uris)} added and {len(existing)} removed"
+            )
+        rb = cls.get(record.model.id, bucket_id)
+        record["_file_indices"].append(rb.dumps())
+        return rb
+
+    @staticmethod
+    def _remove_entry(obj):
+        """Remove one entry of a file index."""
+        FileURI.delete_by_bucket(obj.bucket_id, obj.key)
+        file_id = obj.file_id
+        obj.remove()
+        FileInstance.query.filter_by(id=file_id).delete()
+
     @classmethod
     def get(cls, record_id, bucket_id):
         """Get a file index, based on the bucket."""
@@ -184,15 +253,21 @@ class FileIndexMetadata:
             obj._avl[f["availability"]] += 1
         return obj
 
+    @classmethod
+    def delete(cls, bucket_id):
+        """Delete a file index, with all its files."""
+        bucket = Bucket.get(bucket_id)
+        for o in ObjectVersion.get_by_bucket(bucket).all():
+            o.remove()
+            o.file.delete()
+        bucket.remove()
+        FileURI.delete_by_bucket(bucket_id)
+
     @classmethod
     def delete_by_record(cls, record):
         """Delete all the file indexes of a given record."""
         for buckettag in BucketTag.query.filter_by(key="record", value=str(record.id)):
-            bucket = Bucket.get(buckettag.bucket_id)
-            for o in ObjectVersion.get_by_bucket(bucket).all():
-                o.remove()
-                o.file.delete()
-            bucket.remove()
+            cls.delete(buckettag.bucket_id)
 
     def dumps(self):
         """Dumping."""
@@ -24,6 +24,7 @@
 
 """Cold Storage API."""
 
+import hashlib
 import importlib
 import logging
 from datetime import datetime
@@ -35,9 +36,15 @@ from flask_mail import Message
 from invenio_db import db
 from invenio_files_rest.models import FileInstance, ObjectVersion, ObjectVersionTag
 from invenio_records_files.api import FileObject, Record
-from sqlalchemy import func
+from sqlalchemy import cast, func, or_
+from sqlalchemy.dialects.postgresql import UUID
 
-from .models import RequestMetadata, TransferMetadata
+from .models import (
+    FileURIMetadata,
+    RequestMetadata,
+    TransferDailySummary,
+    TransferMetadata,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +107,63 @@ class FileObjectCold(FileObject):
         return self.data["availability"]
 
 
+class FileURI:
+    """API for the mapping between the uris of the files and their records."""
+
+    @staticmethod
+    def hash(uri):
+        """Hash used to look up an uri."""
+        return hashlib.md5(uri.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def add(uri, record_uuid, bucket_id, key):
+        """Add an uri of a file to the mapping, if it is not there yet."""
+        if not FileURIMetadata.query.filter_by(
+            uri_hash=FileURI.hash(uri), bucket_id=bucket_id, key=key
+        ).first():
+            FileURI.add_many([(uri, record_uuid, bucket_id, key)])
+
+    @staticmethod
+    def add_many(entries):
+        """Add a list of (uri, record_uuid, bucket_id, key) to the mapping."""
+        db.session.bulk_insert_mappings(
+            FileURIMetadata,
+            [
+                {
+                    "uri_hash": FileURI.hash(uri),
+                    "uri": uri,
+                    "record_uuid": record_uuid,
+                    "bucket_id": bucket_id,
+                    "key": key,
+                }
+                for uri, record_uuid, bucket_id, key in entries
+            ],
+        )
+
+    @staticmethod
+    def delete_by_record(record_uuid):
+        """Remove all the uris of a record."""
+        FileURIMetadata.query.filter_by(record_uuid=record_uuid).delete()
+
+    @staticmethod
+    def delete_by_bucket(bucket_id, key=None):
+        """Remove the uris of the files of a bucket, or only the ones of a key."""
+        query = FileURIMetadata.query.filter_by(bucket_id=bucket_id)
+        if key is not None:
+            query = query.filter_by(key=key)
+        query.delete()
+
+    @staticmethod
+    def get_records(uris):
+        """Return the pairs (uri, record_uuid) of the given uris."""
+        hashes = [FileURI.hash(uri) for uri in uris]
+        return (
+            db.session.query(FileURIMetadata.uri, FileURIMetadata.record_uuid)
+            .filter(FileURIMetadata.uri_hash.in_(hashes))
+            .all()
+        )
+
+
 class Transfer:
     """API for managing cold storage transfers."""
 
@@ -171,10 +235,124 @@ class Transfer:
             TransferMetadata.status == "FAILED",
         ).count()
 
+    @staticmethod
+    def get_recently_staged(file_ids, since):
+        """Return the files that are being staged, or that have been staged after a date."""
+        if not file_ids:
+            return set()
+        rows = (
+            db.session.query(TransferMetadata.file_id)
+            .filter(
+                TransferMetadata.file_id.in_(file_ids),
+                TransferMetadata.action == ColdStorageActions.STAGE.value,
+                or_(
+                    TransferMetadata.finished.is_(None),
+                    TransferMetadata.finished >= since,
+                ),
+            )
+            .distinct()
+        )
+        return {row.file_id for row in rows}
+
+    @staticmethod
+    def _expired(before):
+        """Query of the transfers that finished before a date, and that are not needed by any active request."""
+        active_request = (
+            db.session.query(RequestMetadata.id)
+            .filter(
+                RequestMetadata.record_id == cast(TransferMetadata.record_uuid, UUID),
+                RequestMetadata.status != "completed",
+            )
+            .exists()
+        )
+        return TransferMetadata.query.filter(
+            TransferMetadata.finished < before, ~active_request
+        )
+
+    @staticmethod
+    def rollup_finished(before, batch_size=10000, dry=False):
+        """Summarise the transfers that finished before a date into daily aggregates, and delete them.
+
+        The transfers of records with requests that have not been completed are kept. It returns the
+        number of transfers that have been (or, for a dry run, would be) summarised.
+        """
+        if dry:
+            return Transfer._expired(before).count()
+        day = func.date(TransferMetadata.finished)
+        status = func.coalesce(TransferMetadata.status, "FAILED")
+        total = 0
+        while True:
+            ids = [
+                row.id
+                for row in Transfer._expired(before)
+                .with_entities(TransferMetadata.id)
+                .order_by(TransferMetadata.id)
+                .limit(batch_size)
+            ]
+            if not ids:
+                break
+            rows = (
+                db.session.query(
+                    day.label("day"),
+                    TransferMetadata.action,
+                    status.label("status"),
+                    func.count().label("count"),
+                    func.sum(TransferMetadata.size).label("size"),
+                    func.sum(
+                        func.extract(
+                            "epoch",
+                            TransferMetadata.finished - TransferMetadata.submitted,
+                        )
+                    ).label("duration"),
+                )
+                .filter(TransferMetadata.id.in_(ids))
+                .group_by(day, TransferMetadata.action, status)
+                .all()
+            )
+            for row in rows:
+                summary = TransferDailySummary.query.filter_by(
+                    day=row.day, action=row.action, status=row.status
+                ).one_or_none()
+                if not summary:
+                    summary = TransferDailySummary(
+                        day=row.day,
+                        action=row.action,
+                        status=row.status,
+                        num_transfers=0,
+                        size=0,
+                        duration=0,
+                    )
+                summary.num_transfers += row.count
+                summary.size += row.size or 0
+                summary.duration += int(row.duration or 0)
+                db.session.add(summary)
+            TransferMetadata.query.filter(TransferMetadata.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+            total += len(ids)
+            logger.debug(f"{total} transfers have been summarised")
+        return total
+
 
 class Request:
     """Class to check the cold storage requests."""
 
+    @staticmethod
+    def get_active_records(record_ids):
+        """Return the records that have requests that have not been completed."""
+        if not record_ids:
+            return set()
+        rows = (
+            db.session.query(RequestMetadata.record_id)
+            .filter(
+                RequestMetadata.record_id.in_(record_ids),
+                RequestMetadata.status != "completed",
+            )
+            .distinct()
+        )
+        return {str(row.record_id) for row in rows}
+
     @staticmethod
     def send_email(req, emails):
         """Send an email notification using Invenio's mail system."""
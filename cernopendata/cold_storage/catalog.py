@@ -25,15 +25,27 @@
 """Cold Storage Catalog."""
 
 import logging
+import time
 from datetime import datetime
 
 from invenio_db import db
-from invenio_files_rest.models import FileInstance, ObjectVersion, ObjectVersionTag
+from invenio_files_rest.models import (
+    BucketTag,
+    FileInstance,
+    ObjectVersion,
+    ObjectVersionTag,
+)
 from invenio_indexer.api import RecordIndexer
+from invenio_records_files.models import RecordsBuckets
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
 
 from cernopendata.api import RecordFilesWithIndex
 
+from . import metrics
+from .api import FileURI
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,7 +100,7 @@ class Catalog:
                 files = files[:limit]
         return files
 
-    def clear_hot(self, record, file_id, force):
+    def clear_hot(self, record_uuid, file_id, force):
         """Marking the hot copy as deleted."""
 
         def _clear_hot_function(version_id):
@@ -100,7 +112,7 @@ class Catalog:
                 logger.warning("The tag `hot_deleted` already existed...")
                 return force
 
-        return self._update_file_and_reindex(record.id, file_id, _clear_hot_function)
+        return self._update_file_and_reindex(record_uuid, file_id, _clear_hot_function)
 
     def _update_file_and_reindex(self, record_uuid, file_id, update_function):
         """Function to update the repository."""
@@ -119,9 +131,11 @@ class Catalog:
 
     def reindex_entries(self):
         """Reindexes all the entries that have been modified."""
+        durations = []
         while len(self._reindex_queue) > 0:
             record_uuid = self._reindex_queue.pop(0)
             logger.info(f"Ready to reindex {record_uuid}")
+            start = time.monotonic()
             record = RecordFilesWithIndex.get_record(record_uuid)
             if not record:
                 logger.error(f"Couldn't find that record '{record_uuid}'")
@@ -140,7 +154,9 @@ class Catalog:
                     logger.info("The second time worked!")
                 except Exception as e:
                     logger.error(f"Doing it again did not help :( {e}")
+            durations.append(time.monotonic() - start)
         db.session.commit()
+        metrics.observe_many("reindex_seconds", durations)
 
     def add_copy(self, record_uuid, file_id, action, new_filename):
         """Adds a copy to a particular file. It reindexes the record."""
@@ -149,6 +165,8 @@ class Catalog:
             """Function to add a file tag with a new uri for the file."""
             if action == "archive":
                 ObjectVersionTag.create_or_update(version_id, "uri_cold", new_filename)
+                obj = ObjectVersion.query.filter_by(version_id=version_id).one()
+                FileURI.add(new_filename, record_uuid, obj.bucket_id, obj.key)
                 return True
             elif action == "stage":
                 ObjectVersionTag.delete(version_id, "hot_deleted")
@@ -162,3 +180,88 @@ class Catalog:
         record.commit()
         db.session.commit()
         self._indexer.index(record)
+
+    @staticmethod
+    def _hot_deleted():
+        """Condition that is true if the hot copy of an object has been deleted."""
+        return (
+            db.session.query(ObjectVersionTag.version_id)
+            .filter(
+                ObjectVersionTag.version_id == ObjectVersion.version_id,
+                ObjectVersionTag.key == "hot_deleted",
+            )
+            .exists()
+        )
+
+    @staticmethod
+    def _has_cold_copy():
+        """Condition that is true if an object has a copy on cold storage."""
+        return (
+            db.session.query(ObjectVersionTag.version_id)
+            .filter(
+                ObjectVersionTag.version_id == ObjectVersion.version_id,
+                ObjectVersionTag.key == "uri_cold",
+            )
+            .exists()
+        )
+
+    @classmethod
+    def get_hot_usage(cls):
+        """Total size of the hot copies of the files that also have a cold copy.
+
+        Only these files can be evicted, so they are the ones counted against the quota.
+        """
+        return (
+            db.session.query(func.coalesce(func.sum(FileInstance.size), 0))
+            .join(ObjectVersion, ObjectVersion.file_id == FileInstance.id)
+            .filter(
+                ObjectVersion.is_head.is_(True),
+                cls._has_cold_copy(),
+                ~cls._hot_deleted(),
+            )
+            .scalar()
+        )
+
+    @classmethod
+    def get_evictable_files(cls, uris):
+        """Get the files that have a cold copy and whose hot copy still exists.
+
+        The result is a dictionary indexed by the uri of the hot copy.
+        """
+        if not uris:
+            return {}
+        uri_cold = aliased(ObjectVersionTag)
+        rows = (
+            db.session.query(
+                FileInstance.id,
+                FileInstance.uri,
+                FileInstance.size,
+                RecordsBuckets.record_id,
+                BucketTag.value,
+            )
+            .join(ObjectVersion, ObjectVersion.file_id == FileInstance.id)
+            .join(
+                uri_cold,
+                (uri_cold.version_id == ObjectVersion.version_id)
+                & (uri_cold.key == "uri_cold"),
+            )
+            .outerjoin(
+                RecordsBuckets, RecordsBuckets.bucket_id == ObjectVersion.bucket_id
+            )
+            .outerjoin(
+                BucketTag,
+                (BucketTag.bucket_id == ObjectVersion.bucket_id)
+                & (BucketTag.key == "record"),
+            )
+            .filter(FileInstance.uri.in_(uris), ~cls._hot_deleted())
+            .all()
+        )
+        return {
+            row.uri: {
+                "file_id": str(row.id),
+                "uri": row.uri,
+                "size": row.size,
+                "record_uuid": str(row.record_id or row.value),
+            }
+            for row in rows
+        }
@@ -24,6 +24,7 @@
 
 """Cold Storage CLI."""
 
+import json
 import logging
 from math import log2
 
@@ -34,10 +35,18 @@ from invenio_db import db
 from invenio_pidstore.errors import PIDDoesNotExistError
 from invenio_pidstore.models import PersistentIdentifier
 
+from cernopendata.tasks import (
+    DarkReport,
+    get_eos_dump_progress,
+    process_eos_dump,
+    reset_eos_dump_progress,
+)
+
 from .api import ColdStorageActions, Transfer
 from .manager import ColdStorageManager
 from .models import Location
-from .service import RequestService, TransferService
+from .service import EvictionService, RequestService, TransferService
+from .simulation import Simulation
 from .storage import Storage
 
 logger = logging.getLogger(__name__)
@@ -351,6 +360,43 @@ def clear_hot(record, limit, force, dry, debug, file):
     )
 
 
+@cold.command()
+@with_appcontext
+@click.option(
+    "-q",
+    "--quota",
+    type=click.INT,
+    help="Maximum size (in bytes) of the hot copies. By default, it uses COLD_HOT_QUOTA",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    type=click.INT,
+    help="Number of files evicted at once. By default, it uses COLD_EVICTION_BATCH_SIZE",
+)
+@option_dry
+@option_debug
+def evict(quota, batch_size, dry, debug):
+    """Delete the least recently accessed hot copies that exceed the quota."""
+    if debug:
+        logging.basicConfig(level=logging.DEBUG)
+    report = EvictionService.evict(quota=quota, dry=dry, batch_size=batch_size)
+    if report["usage"] is None:
+        click.secho("There is no quota for the hot copies", fg="yellow")
+        return
+    for f in report["files"]:
+        click.echo(
+            f"    * {f['uri']} ({file_size(f['size'])}, record {f['recid']}, "
+            f"last accessed {f['last_accessed']})"
+        )
+    click.secho(
+        f"Summary: the hot copies use {file_size(report['usage'])}, and the quota is "
+        f"{file_size(report['quota'])}. {'Would free' if dry else 'Freed'} "
+        f"{file_size(report['freed'])} in {len(report['files'])} files",
+        fg="green",
+    )
+
+
 @cold.command()
 @with_appcontext
 @option_debug
@@ -361,6 +407,27 @@ def process_transfers(debug):
     return TransferService.process_transfers()
 
 
+@cold.command()
+@with_appcontext
+@click.option(
+    "--days",
+    type=click.INT,
+    help="Summarise the transfers that finished before this number of days. "
+    + "By default, it uses COLD_TRANSFERS_RETENTION_DAYS",
+)
+@option_dry
+@option_debug
+def rollup_transfers(days, dry, debug):
+    """Summarise the old transfers into daily aggregates."""
+    if debug:
+        logging.basicConfig(level=logging.DEBUG)
+    summarised = TransferService.rollup_transfers(retention_days=days, dry=dry)
+    click.secho(
+        f"{summarised} transfers {'would be' if dry else 'have been'} summarised",
+        fg="green",
+    )
+
+
 @cold.command()
 @with_appcontext
 @option_debug
@@ -371,6 +438,58 @@ def process_requests(debug):
     return RequestService.process_requests()
 
 
+@cold.command()
+@with_appcontext
+@click.option("--records", default=10, help="Number of synthetic records.")
+@click.option("--files", default=1000, help="Number of files in each record.")
+@click.option("--cycles", default=100, help="Maximum number of check cycles.")
+@click.option(
+    "--cycle", default=300, help="Simulated seconds between two check cycles."
+)
+@click.option(
+    "--requests-per-cycle",
+    default=0,
+    help="Number of staging requests submitted in each cycle. By default, all of them at once.",
+)
+@click.option("--seed", type=click.INT, help="Seed for the simulated transfers.")
+@click.option(
+    "--keep/--cleanup",
+    default=False,
+    help="Keep the synthetic records after the simulation.",
+)
+@click.option("--yes-i-know", is_flag=True, help="Do not ask for confirmation.")
+@option_debug
+def simulate(
+    records, files, cycles, cycle, requests_per_cycle, seed, keep, yes_i_know, debug
+):
+    """Benchmark the requests and transfers with synthetic records and simulated transfers.
+
+    It creates records in this instance. Do not run it in production!
+    """
+    if debug:
+        logging.basicConfig(level=logging.DEBUG)
+    if not yes_i_know:
+        click.confirm(
+            f"This will create {records} records with {files} files each. Continue?",
+            abort=True,
+        )
+    simulation = Simulation(
+        num_records=records,
+        files_per_record=files,
+        cycles=cycles,
+        cycle=cycle,
+        requests_per_cycle=requests_per_cycle,
+        seed=seed,
+    )
+    try:
+        simulation.setup()
+        report = simulation.run()
+    finally:
+        if not keep:
+            simulation.cleanup()
+    click.echo(json.dumps(report, indent=2))
+
+
 @cold.command()
 @with_appcontext
 @option_debug
@@ -399,3 +518,82 @@ def transfers(debug, action, record):
             f" * Transfer {transfer.id}: {transfer.action} {transfer.status}"
             f" {transfer.new_filename} {transfer.record_uuid}"
         )
+
+
+@cold.group()
+@with_appcontext
+def eos_dump():
+    """Manage the processing of the EOS dump."""
+    pass
+
+
+@eos_dump.command()
+@with_appcontext
+@click.option(
+    "--full/--changes",
+    default=False,
+    help="Process all the entries, even if only the changes since the previous dump would be needed",
+)
+@option_debug
+def process(full, debug):
+    """Process the latest EOS dump, resuming the previous run if it was interrupted."""
+    if debug:
+        logging.basicConfig(level=logging.DEBUG)
+    summary = process_eos_dump(full=full)
+    if summary:
+        click.echo(json.dumps(summary, indent=2))
+
+
+@eos_dump.command()
+@with_appcontext
+def status():
+    """Show the progress of the processing of the EOS dump."""
+    progress = get_eos_dump_progress()
+    if not progress:
+        click.echo("There is no processing of the EOS dump in progress.")
+    for dump, summary in progress.items():
+        done = 100 * summary["done"] / summary["size"] if summary["size"] else 100
+        click.echo(
+            f"Dump {summary['path']} ({dump}): {done:.1f}% of {file_size(summary['size'])}, "
+            f"{summary['finished_shards']}/{summary['shards']} shards finished, "
+            f"last update {summary['updated']}"
+        )
+        click.echo(
+            f"  Processed {summary['processed']} entries. Skipped {summary['skipped']} entries. "
+            f"Failed to process {summary['failed']} entries."
+        )
+
+
+@eos_dump.command()
+@with_appcontext
+def reset():
+    """Forget the progress, so that the next run starts from the beginning of the dump."""
+    deleted = reset_eos_dump_progress()
+    click.secho(f"{deleted} checkpoints removed", fg="green")
+
+
+@eos_dump.command()
+@with_appcontext
+@click.option(
+    "--depth",
+    type=click.INT,
+    help="Aggregate the directories up to this level. "
+    + "By default, it uses CERNOPENDATA_DARK_REPORT_DEPTH",
+)
+@click.option("--limit", type=click.INT, help="Show only the largest directories.")
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON.")
+def dark_report(depth, limit, as_json):
+    """Show the files that do not belong to any record, per directory."""
+    report = DarkReport.get(depth=depth, limit=limit)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    if not report:
+        click.echo(
+            "There is no summary of the dark files. Process a full EOS dump first."
+        )
+    for summary in report:
+        click.echo(
+            f"{summary['directory']}: {summary['files']} files, {file_size(summary['size'])}, "
+            f"accessed between {summary['oldest_access']} and {summary['newest_access']}"
+        )
@@ -30,3 +30,27 @@ COLD_ACTIVE_ARCHIVING_TRANSFERS_THRESHOLD = 1000
 # Maximum number of transfers that should be active at a given moment
 COLD_ACTIVE_STAGING_TRANSFERS_THRESHOLD = 100
 # Maximum number of transfers that should be active at a given moment
+COLD_HOT_QUOTA = 0
+# Maximum size (in bytes) of the hot copies of files that also exist on cold storage. 0 disables the eviction
+COLD_EVICTION_BATCH_SIZE = 100
+# Number of least recently accessed files that are evicted at once
+COLD_EVICTION_GRACE_PERIOD = 86400
+# Hot copies staged less than this number of seconds ago are not evicted
+COLD_TRANSFERS_RETENTION_DAYS = 90
+# Finished transfers older than this are summarised into daily aggregates. 0 keeps all of them
+COLD_TRANSFERS_ROLLUP_BATCH_SIZE = 10000
+# Number of transfers that are summarised in a single transaction
+COLD_SIMULATED_TRANSFERS = {
+    "stage_latency": (3600, 1800),
+    "archive_latency": (600, 300),
+    "drives": 10,
+    "failure_rate": 0.01,
+    "submit_error_rate": 0.0,
+    "seed": None,
+}
+# Parameters of the simulated transfers (cernopendata.cold_storage.transfer.simulated): mean and standard
+# deviation of the duration (in seconds), number of concurrent transfers, and probability of errors
+COLD_METRICS_TOKEN = None
+# Token needed to read the metrics of the cold storage. Without it, the metrics are not published
+COLD_METRICS_CACHE_TIMEOUT = 60
+# Seconds that the totals of the transfers are cached between scrapes of the metrics
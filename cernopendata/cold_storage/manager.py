@@ -199,7 +199,7 @@ class ColdStorageManager:
                 logger.info(
                     "Dry run: do not remove the file (but cleaning the repository)"
                 )
-            cleared = self._catalog.clear_hot(record, my_file["file_id"], force)
+            cleared = self._catalog.clear_hot(record.id, my_file["file_id"], force)
             if not cleared:
                 return
         if not cleared:
@@ -208,6 +208,25 @@ class ColdStorageManager:
         db.session.commit()
         return [cleared]
 
+    def clear_hot_files(self, files):
+        """Remove the hot copy of a list of files that have a copy on cold storage.
+
+        Each file should have the `uri`, `file_id` and `record_uuid`. It returns the files that were cleared.
+        """
+        cleared = []
+        for my_file in files:
+            logger.debug(f"Removing the hot copy of {my_file['uri']}")
+            if not self._storage.clear_hot(my_file["uri"]):
+                continue
+            if self._catalog.clear_hot(
+                my_file["record_uuid"], my_file["file_id"], False
+            ):
+                cleared.append(my_file)
+        if cleared:
+            self._catalog.reindex_entries()
+        db.session.commit()
+        return cleared
+
     def list(self, record_id, limit=None, file=None):
         """Returns the location of the files for a particular record."""
         record = self._catalog.get_record(record_id)
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Open Data Portal.
+# Copyright (C) 2017-2025 CERN.
+#
+# CERN Open Data Portal is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# CERN Open Data Portal is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CERN Open Data Portal; if not, write to the
+# Free Software Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+# MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Metrics of the cold storage, in the Prometheus text format.
+
+There are two types of metrics:
+ * The state of the requests and transfers, which is calculated from the database when the metrics are
+   requested.
+ * The measurements done by the workers (duration of the check cycles and of the reindexing, number of
+   checked transfers), which are aggregated in Redis so that they can be shared between processes. The
+   values are updated with HINCRBY and HINCRBYFLOAT, so that concurrent workers do not lose updates.
+   Without CACHE_REDIS_URL (for instance, in the tests), they are kept in the memory of the process.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+import redis
+from flask import current_app
+from invenio_db import db
+from sqlalchemy import case, func
+
+from .api import ColdStorageActions, Transfer
+from .models import RequestMetadata, TransferDailySummary, TransferMetadata
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "cernopendata_cold"
+COUNTERS_KEY = "cold_storage_metrics:counters"
+HISTOGRAMS_KEY = "cold_storage_metrics:histograms"
+
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, 3600)
+REQUEST_BUCKETS = (60, 300, 900, 3600, 4 * 3600, 12 * 3600, 86400, 3 * 86400, 7 * 86400)
+
+
+def _labels(labels):
+    """Format the labels of a sample."""
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+        + "}"
+    )
+
+
+class _LocalStore:
+    """Hashes in the memory of the process, for the setups without Redis."""
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def hincrby(self, name, key, amount):
+        with self._lock:
+            values = self._hashes.setdefault(name, {})
+            values[key] = values.get(key, 0) + amount
+
+    hincrbyfloat = hincrby
+
+    def hgetall(self, name):
+        with self._lock:
+            return dict(self._hashes.get(name, {}))
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        pass
+
+
+_local_store = _LocalStore()
+
+_totals_cache = {}
+
+
+def _store():
+    """Get the store of the measurements: Redis, or the memory of the process."""
+    url = current_app.config.get("CACHE_REDIS_URL")
+    if not url:
+        return _local_store
+    return _redis(url)
+
+
+@lru_cache(maxsize=None)
+def _redis(url):
+    return redis.StrictRedis.from_url(url, decode_responses=True)
+
+
+def _key(name, labels, *extra):
+    return json.dumps([name, labels, *extra], sort_keys=True)
+
+
+def _number(value):
+    """Convert a value read from the store, keeping the integers as such."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def inc(name, value=1, **labels):
+    """Increase a counter measured by the workers."""
+    try:
+        store = _store()
+        if isinstance(value, int):
+            store.hincrby(COUNTERS_KEY, _key(name, labels), value)
+        else:
+            store.hincrbyfloat(COUNTERS_KEY, _key(name, labels), value)
+    except Exception as e:
+        logger.warning(f"Could not update the metric {name}: {e}")
+
+
+def observe_many(name, values, buckets=DURATION_BUCKETS, **labels):
+    """Add several observations to a histogram measured by the workers, at once."""
+    values = list(values)
+    if not values:
+        return
+    try:
+        pipeline = _store().pipeline(transaction=False)
+        for bucket in buckets:
+            pipeline.hincrby(
+                HISTOGRAMS_KEY,
+                _key(name, labels, bucket),
+                sum(1 for value in values if value <= bucket),
+            )
+        pipeline.hincrbyfloat(HISTOGRAMS_KEY, _key(name, labels, "sum"), sum(values))
+        pipeline.hincrby(HISTOGRAMS_KEY, _key(name, labels, "count"), len(values))
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Could not update the metric {name}: {e}")
+
+
+def observe(name, value, buckets=DURATION_BUCKETS, **labels):
+    """Add an observation to a histogram measured by the workers."""
+    observe_many(name, [value], buckets, **labels)
+
+
+@contextmanager
+def timer(name, **labels):
+    """Measure the duration of a block in a histogram."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        observe(name, time.monotonic() - start, **labels)
+
+
+class _Exposition:
+    """Helper to write the metrics in the text format."""
+
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name, kind, description):
+        """Start a new metric."""
+        self.lines.append(f"# HELP {PREFIX}_{name} {description}")
+        self.lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    def sample(self, name, value, **labels):
+        """Add the value of a metric."""
+        self.lines.append(f"{PREFIX}_{name}{_labels(labels)} {value}")
+
+    def histogram(self, name, buckets, counts, total, count, **labels):
+        """Add the samples of a histogram. The counts should be cumulative."""
+        for bucket, value in zip(buckets, counts):
+            self.sample(f"{name}_bucket", value, le=bucket, **labels)
+        self.sample(f"{name}_bucket", count, le="+Inf", **labels)
+        self.sample(f"{name}_sum", total, **labels)
+        self.sample(f"{name}_count", count, **labels)
+
+    def text(self):
+        """Return the text of all the metrics."""
+        return "\n".join(self.lines) + "\n"
+
+
+def _transfer_totals():
+    """Transfers submitted and bytes transferred by action, from the database.
+
+    The finished transfers that have been summarised are still counted, so that these are
+    proper counters. Since this reads the whole table, the result is cached for
+    COLD_METRICS_CACHE_TIMEOUT seconds.
+    """
+    now = time.monotonic()
+    if _totals_cache.get("expires", 0) > now:
+        return _totals_cache["value"]
+    submitted = {}
+    transferred = {}
+    for action, status, count, size in (
+        db.session.query(
+            TransferMetadata.action,
+            TransferMetadata.status,
+            func.count(),
+            func.sum(TransferMetadata.size),
+        )
+        .group_by(TransferMetadata.action, TransferMetadata.status)
+        .all()
+    ):
+        submitted[action] = submitted.get(action, 0) + count
+        if status == "DONE":
+            transferred[action] = transferred.get(action, 0) + (size or 0)
+    for action, status, count, size in (
+        db.session.query(
+            TransferDailySummary.action,
+            TransferDailySummary.status,
+            func.sum(TransferDailySummary.num_transfers),
+            func.sum(TransferDailySummary.size),
+        )
+        .group_by(TransferDailySummary.action, TransferDailySummary.status)
+        .all()
+    ):
+        submitted[action] = submitted.get(action, 0) + (count or 0)
+        if status == "DONE":
+            transferred[action] = transferred.get(action, 0) + (size or 0)
+    _totals_cache["value"] = (submitted, transferred)
+    _totals_cache["expires"] = now + current_app.config["COLD_METRICS_CACHE_TIMEOUT"]
+    return submitted, transferred
+
+
+def _transfer_metrics(out):
+    """Metrics about the transfers, from the database."""
+    active = dict(
+        db.session.query(TransferMetadata.action, func.count())
+        .filter(TransferMetadata.finished.is_(None))
+        .group_by(TransferMetadata.action)
+        .all()
+    )
+    out.metric(
+        "active_transfers", "gauge", "Number of transfers that have not finished."
+    )
+    for action in (ColdStorageActions.STAGE, ColdStorageActions.ARCHIVE):
+        out.sample("active_transfers", active.get(action.value, 0), action=action.value)
+    out.metric(
+        "active_transfers_threshold",
+        "gauge",
+        "Maximum number of transfers that should be active at a given moment.",
+    )
+    for action in (ColdStorageActions.STAGE, ColdStorageActions.ARCHIVE):
+        threshold = Transfer.get_active_transfers_threshold(action) or 0
+        out.sample("active_transfers_threshold", threshold, action=action.value)
+
+    submitted, transferred = _transfer_totals()
+    out.metric("transfers_submitted_total", "counter", "Number of transfers submitted.")
+    for action, count in sorted(submitted.items()):
+        out.sample("transfers_submitted_total", count, action=action)
+    out.metric(
+        "transferred_bytes_total",
+        "counter",
+        "Size of the files that have been staged or archived.",
+    )
+    for action, size in sorted(transferred.items()):
+        out.sample("transferred_bytes_total", size, action=action)
+
+
+def _request_metrics(out):
+    """Metrics about the requests, from the database."""
+    out.metric("requests", "gauge", "Number of requests in each status.")
+    for action, status, count in (
+        db.session.query(RequestMetadata.action, RequestMetadata.status, func.count())
+        .group_by(RequestMetadata.action, RequestMetadata.status)
+        .all()
+    ):
+        out.sample("requests", count, action=action, status=status)
+
+    now = datetime.utcnow()
+    out.metric(
+        "request_oldest_seconds",
+        "gauge",
+        "Time that the oldest request has been in its current status.",
+    )
+    for status, since in (
+        ("submitted", RequestMetadata.created_at),
+        ("started", RequestMetadata.started_at),
+    ):
+        for action, oldest in (
+            db.session.query(RequestMetadata.action, func.min(since))
+            .filter(RequestMetadata.status == status)
+            .group_by(RequestMetadata.action)
+            .all()
+        ):
+            if oldest:
+                age = (now - oldest).total_seconds()
+                out.sample("request_oldest_seconds", age, action=action, status=status)
+
+    out.metric(
+        "request_status_seconds",
+        "histogram",
+        "Time that the completed requests spent in each status.",
+    )
+    for status, start, end in (
+        ("submitted", RequestMetadata.created_at, RequestMetadata.started_at),
+        ("started", RequestMetadata.started_at, RequestMetadata.completed_at),
+    ):
+        duration = func.extract("epoch", end - start)
+        columns = [
+            func.sum(case((duration <= bucket, 1), else_=0))
+            for bucket in REQUEST_BUCKETS
+        ]
+        for row in (
+            db.session.query(
+                RequestMetadata.action,
+                func.count(),
+                func.coalesce(func.sum(duration), 0),
+                *columns,
+            )
+            .filter(
+                RequestMetadata.status == "completed",
+                start.isnot(None),
+                end.isnot(None),
+            )
+            .group_by(RequestMetadata.action)
+            .all()
+        ):
+            action, count, total, *counts = row
+            out.histogram(
+                "request_status_seconds",
+                REQUEST_BUCKETS,
+                [int(c or 0) for c in counts],
+                float(total),
+                count,
+                action=action,
+                status=status,
+            )
+
+
+def _worker_metrics(out):
+    """Metrics measured by the workers, from the store."""
+    store = _store()
+    described = set()
+    for key, value in sorted(store.hgetall(COUNTERS_KEY).items()):
+        name, labels = json.loads(key)
+        if name not in described:
+            out.metric(name, "counter", f"Counter {name} measured by the workers.")
+            described.add(name)
+        out.sample(name, _number(value), **labels)
+    histograms = {}
+    for key, value in store.hgetall(HISTOGRAMS_KEY).items():
+        name, labels, field = json.loads(key)
+        series = histograms.setdefault(
+            _key(name, labels), {"buckets": {}, "sum": 0, "count": 0}
+        )
+        if field in ("sum", "count"):
+            series[field] = _number(value)
+        else:
+            series["buckets"][field] = _number(value)
+    for key, histogram in sorted(histograms.items()):
+        name, labels = json.loads(key)
+        if name not in described:
+            out.metric(name, "histogram", f"Histogram {name} measured by the workers.")
+            described.add(name)
+        buckets = sorted(histogram["buckets"])
+        out.histogram(
+            name,
+            buckets,
+            [histogram["buckets"][bucket] for bucket in buckets],
+            histogram["sum"],
+            histogram["count"],
+            **labels,
+        )
+
+
+def render():
+    """Return all the metrics of the cold storage in the Prometheus text format."""
+    out = _Exposition()
+    _transfer_metrics(out)
+    _request_metrics(out)
+    _worker_metrics(out)
+    return out.text()
@@ -87,6 +87,24 @@ class TransferMetadata(db.Model):
         db.Index("ix_cold_transfers_record", "record_uuid"),
         db.Index("ix_cold_transfers_last_check", "last_check"),
         db.Index("ix_cold_transfers_status", "status"),
+        # Partial indices for the queries that only look at the unfinished or failed transfers. They stay
+        # small even if the table has a long history
+        db.Index(
+            "ix_cold_transfers_ongoing_last_check",
+            "last_check",
+            postgresql_where=db.text("finished IS NULL"),
+        ),
+        db.Index(
+            "ix_cold_transfers_ongoing_action_file",
+            "action",
+            "file_id",
+            postgresql_where=db.text("finished IS NULL"),
+        ),
+        db.Index(
+            "ix_cold_transfers_failed_record",
+            "record_uuid",
+            postgresql_where=db.text("status = 'FAILED'"),
+        ),
     )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -103,3 +121,80 @@ class TransferMetadata(db.Model):
     reason = db.Column(db.Text, nullable=True)
     size = db.Column(db.BigInteger, default=0, nullable=True)
     """Size of file."""
+
+
+class TransferDailySummary(db.Model):
+    """Daily aggregates of the finished transfers that have been removed from the transfer table."""
+
+    __tablename__ = "cold_transfers_daily"
+    __table_args__ = (
+        db.UniqueConstraint("day", "action", "status", name="uq_cold_transfers_daily"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    day = db.Column(db.Date, nullable=False)
+    action = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    num_transfers = db.Column(db.Integer, default=0, nullable=False)
+    size = db.Column(db.BigInteger, default=0, nullable=False)
+    """Size of all the files."""
+    duration = db.Column(db.BigInteger, default=0, nullable=False)
+    """Sum of the seconds between the submission and the end of each transfer."""
+
+
+class FileURIMetadata(db.Model):
+    """Materialized mapping between the uris of the files (hot and cold copies) and their records."""
+
+    __tablename__ = "cold_file_uris"
+    __table_args__ = (
+        db.UniqueConstraint("uri_hash", "bucket_id", "key", name="uq_cold_file_uris"),
+        db.Index("ix_cold_file_uris_record", "record_uuid"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    uri_hash = db.Column(db.String(32), nullable=False)
+    """md5 of the uri, to keep the index small."""
+    uri = db.Column(db.Text, nullable=False)
+    record_uuid = db.Column(UUIDType, nullable=False)
+    key = db.Column(db.Text, nullable=False)
+    bucket_id = db.Column(UUIDType, nullable=False)
+
+
+class EosDumpCheckpoint(db.Model):
+    """Progress of the processing of a shard of the EOS dump, to resume it after a restart."""
+
+    __tablename__ = "cold_eos_dump_checkpoints"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "dump", "start_offset", name="uq_cold_eos_dump_checkpoints"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    dump = db.Column(db.String(100), nullable=False)
+    """Identity of the dump file: inode, size and modification time."""
+    path = db.Column(db.Text, nullable=False)
+    start_offset = db.Column(db.BigInteger, nullable=False)
+    end_offset = db.Column(db.BigInteger, nullable=False)
+    position = db.Column(db.BigInteger, nullable=False)
+    """Offset of the first entry that has not been processed yet."""
+    processed = db.Column(db.BigInteger, default=0, nullable=False)
+    skipped = db.Column(db.BigInteger, default=0, nullable=False)
+    failed = db.Column(db.BigInteger, default=0, nullable=False)
+    updated = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished = db.Column(db.DateTime, nullable=True)
+
+
+class DarkDirectoryMetadata(db.Model):
+    """Summary of the files of a directory in EOS that do not belong to any record."""
+
+    __tablename__ = "cold_dark_directories"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    directory = db.Column(db.Text, nullable=False, unique=True)
+    files = db.Column(db.BigInteger, default=0, nullable=False)
+    size = db.Column(db.BigInteger, default=0, nullable=False)
+    oldest_atime = db.Column(db.BigInteger, nullable=True)
+    """Oldest access time (as a timestamp) of the files in the directory."""
+    newest_atime = db.Column(db.BigInteger, nullable=True)
+    updated = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
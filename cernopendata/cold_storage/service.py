@@ -24,14 +24,19 @@
 """Service for the Cold Storage."""
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from flask import current_app
 from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
+from invenio_search.engine import search
+from invenio_search.proxies import current_search_client
 from sqlalchemy import func
 
 from cernopendata.api import RecordFilesWithIndex
+from cernopendata.tasks import PREFIX
 
+from . import metrics
 from .api import ColdStorageActions, RecordAvailability, Request, Transfer
 from .catalog import Catalog
 from .manager import ColdStorageManager
@@ -82,8 +87,30 @@ class TransferService:
             db.session.commit()
         catalog.reindex_entries()
         logger.info(f"Summary: {summary}")
+        for status, count in summary.items():
+            metrics.inc("transfer_checks_total", count, status=status or "UNKNOWN")
         return all_status
 
+    @staticmethod
+    def rollup_transfers(retention_days=None, dry=False):
+        """Summarise the transfers older than the retention period into daily aggregates."""
+        if retention_days is None:
+            retention_days = current_app.config["COLD_TRANSFERS_RETENTION_DAYS"]
+        if not retention_days:
+            logger.info("There is no retention period for the transfers. Ignoring")
+            return 0
+        before = datetime.utcnow() - timedelta(days=retention_days)
+        summarised = Transfer.rollup_finished(
+            before,
+            batch_size=current_app.config["COLD_TRANSFERS_ROLLUP_BATCH_SIZE"],
+            dry=dry,
+        )
+        logger.info(
+            f"{'Dry run: ' if dry else ''}{summarised} transfers finished before {before} "
+            "have been summarised"
+        )
+        return summarised
+
 
 class RequestService:
     """Service to handle the requests."""
@@ -255,3 +282,110 @@ class RequestService:
             result = query.paginate(page=page, per_page=per_page, error_out=False)
 
         return result
+
+
+class EvictionService:
+    """Service to keep the size of the hot copies under a quota."""
+
+    @staticmethod
+    def _least_recently_accessed(batch_size):
+        """Iterate over the accessed files, starting from the least recently accessed one."""
+        index_prefix = current_app.config.get("SEARCH_INDEX_PREFIX")
+        query = {
+            "query": {"exists": {"field": "last_accessed"}},
+            "sort": [{"last_accessed": "asc"}],
+            "_source": ["uri", "recid", "last_accessed"],
+        }
+        batch = []
+        try:
+            for hit in search.helpers.scan(
+                current_search_client,
+                index=f"{index_prefix}records-recid_mapping",
+                query=query,
+                preserve_order=True,
+                size=batch_size,
+            ):
+                batch.append(hit["_source"])
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        except search.exceptions.NotFoundError:
+            logger.warning("The index with the access times does not exist")
+        if batch:
+            yield batch
+
+    @staticmethod
+    def evict(quota=None, dry=False, batch_size=None):
+        """Remove the least recently accessed hot copies until the usage is under the quota.
+
+        Only the files that have a copy on cold storage are considered. The files that have been
+        staged within the grace period, or that belong to a record with a request that has not been
+        completed, are kept. The files without a last access time in the mapping index are not
+        evicted either: they have not appeared in a dump yet, which is usually because they have
+        just been staged. It returns a report with the files that have been (or, for a dry run,
+        would be) removed.
+        """
+        if quota is None:
+            quota = current_app.config["COLD_HOT_QUOTA"]
+        batch_size = batch_size or current_app.config["COLD_EVICTION_BATCH_SIZE"]
+        staged_since = datetime.now() - timedelta(
+            seconds=current_app.config["COLD_EVICTION_GRACE_PERIOD"]
+        )
+        report = {
+            "quota": quota,
+            "usage": None,
+            "to_free": 0,
+            "freed": 0,
+            "dry": dry,
+            "files": [],
+        }
+        if not quota:
+            logger.info("There is no quota for the hot copies. Ignoring")
+            return report
+        usage = Catalog.get_hot_usage()
+        report["usage"] = usage
+        report["to_free"] = max(usage - quota, 0)
+        logger.info(f"The hot copies use {usage} bytes, and the quota is {quota}")
+        if not report["to_free"]:
+            return report
+
+        manager = ColdStorageManager()
+        for batch in EvictionService._least_recently_accessed(batch_size):
+            evictable = Catalog.get_evictable_files(
+                [f"{PREFIX}{entry['uri']}" for entry in batch]
+            )
+            recently_staged = Transfer.get_recently_staged(
+                [my_file["file_id"] for my_file in evictable.values()], staged_since
+            )
+            requested = Request.get_active_records(
+                {my_file["record_uuid"] for my_file in evictable.values()}
+            )
+            needed = report["to_free"] - report["freed"]
+            selected = []
+            for entry in batch:
+                if needed <= 0:
+                    break
+                my_file = evictable.get(f"{PREFIX}{entry['uri']}")
+                if not my_file:
+                    continue
+                if (
+                    my_file["file_id"] in recently_staged
+                    or my_file["record_uuid"] in requested
+                ):
+                    continue
+                my_file["recid"] = entry.get("recid")
+                my_file["last_accessed"] = entry.get("last_accessed")
+                selected.append(my_file)
+                needed -= my_file["size"]
+            if selected and not dry:
+                selected = manager.clear_hot_files(selected)
+            report["files"] += selected
+            report["freed"] += sum(my_file["size"] for my_file in selected)
+            db.session.expunge_all()
+            if report["freed"] >= report["to_free"]:
+                break
+        logger.info(
+            f"{'Dry run: ' if dry else ''}{len(report['files'])} hot copies "
+            f"({report['freed']} bytes) have been selected for eviction"
+        )
+        return report
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Open Data Portal.
+# Copyright (C) 2017-2025 CERN.
+#
+# CERN Open Data Portal is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# CERN Open Data Portal is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CERN Open Data Portal; if not, write to the
+# Free Software Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+# MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Simulation of the cold storage pipeline, to benchmark the requests and transfers."""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from flask import current_app
+from invenio_db import db
+from invenio_files_rest.models import ObjectVersion, ObjectVersionTag
+from invenio_pidstore.models import PersistentIdentifier
+from sqlalchemy import event
+
+from cernopendata.api import RecordFilesWithIndex
+from cernopendata.modules.fixtures.cli import create_record, delete_record
+from cernopendata.utils import percentiles
+
+from .api import Request
+from .models import Location, RequestMetadata, TransferMetadata
+from .service import RequestService, TransferService
+from .transfer.simulated import TransferManager
+
+logger = logging.getLogger(__name__)
+
+SIMULATED_MANAGER = "cernopendata.cold_storage.transfer.simulated.TransferManager"
+
+
+class Simulation:
+    """Create synthetic records on cold storage, request them, and run the check cycles.
+
+    The transfers are handled by the simulated TransferManager, and the time of the simulation advances
+    `cycle` seconds in each cycle. The report contains the number of requests completed per hour, the
+    number of database queries, and the percentiles of the time (in seconds) that the records needed
+    to get online.
+    """
+
+    def __init__(
+        self,
+        num_records=10,
+        files_per_record=1000,
+        cycles=100,
+        cycle=300,
+        requests_per_cycle=0,
+        seed=None,
+    ):
+        """Define the parameters of the simulation."""
+        self.num_records = num_records
+        self.files_per_record = files_per_record
+        self.cycles = cycles
+        self.cycle = cycle
+        self.requests_per_cycle = requests_per_cycle or num_records
+        self.seed = seed
+        self.now = 0
+        self._base_dir = None
+        self._location = None
+        self._records = []
+        self._queries = 0
+
+    def _count_query(self, *args, **kwargs):
+        """Count the queries sent to the database."""
+        self._queries += 1
+
+    def _create_record(self, i):
+        """Create a record with a file index, where all the files are only on cold storage."""
+        recid = f"sim-{i}"
+        index = [
+            {
+                "uri": f"{self._base_dir}/hot/{recid}/file_{j}.root",
+                "size": 1000,
+                "checksum": "adler32:00000001",
+            }
+            for j in range(self.files_per_record)
+        ]
+        index_path = os.path.join(self._base_dir, "indices", f"{recid}_file_index.json")
+        with open(index_path, "w") as f:
+            json.dump(index, f)
+        data = {
+            "$schema": current_app.extensions["invenio-jsonschemas"].path_to_url(
+                "records/record-v1.0.0.json"
+            ),
+            "recid": recid,
+            "date_published": "2024",
+            "experiment": ["CMS"],
+            "publisher": "CERN Open Data Portal",
+            "title": f"Simulated record {i}",
+            "type": {"primary": "Dataset", "secondary": ["Simulated"]},
+            "files": [
+                {
+                    "uri": index_path,
+                    "size": os.path.getsize(index_path),
+                    "checksum": "adler32:00000001",
+                    "type": "index.json",
+                }
+            ],
+        }
+        record = create_record(data, False)
+        record.commit()
+        db.session.commit()
+
+        tags = []
+        for index_file in record["_file_indices"]:
+            for obj in ObjectVersion.query.filter_by(bucket_id=index_file["bucket"]):
+                uri = obj.file.uri
+                tags.append(
+                    {
+                        "version_id": obj.version_id,
+                        "key": "uri_cold",
+                        "value": uri.replace("/hot/", "/cold/", 1),
+                    }
+                )
+                tags.append(
+                    {
+                        "version_id": obj.version_id,
+                        "key": "hot_deleted",
+                        "value": str(datetime.now()),
+                    }
+                )
+        db.session.bulk_insert_mappings(ObjectVersionTag, tags)
+        record = RecordFilesWithIndex.get_record(record.id)
+        record.flush_indices()
+        record.commit()
+        db.session.commit()
+        return record.id
+
+    def setup(self):
+        """Create the location and the synthetic records."""
+        self._base_dir = tempfile.mkdtemp(prefix="cold_simulation_")
+        os.makedirs(os.path.join(self._base_dir, "indices"))
+        self._location = Location(
+            cold_path=f"{self._base_dir}/cold",
+            hot_path=f"{self._base_dir}/hot",
+            manager_class=SIMULATED_MANAGER,
+        )
+        db.session.add(self._location)
+        db.session.commit()
+        for i in range(self.num_records):
+            self._records.append(self._create_record(i))
+            logger.info(f"Created the simulated record {i + 1}/{self.num_records}")
+
+    def run(self):
+        """Submit the requests, and run the check cycles until all of them are completed."""
+        TransferManager.reset(self.seed, now=self.now)
+        submitted = {}
+        completed = {}
+        cycles = 0
+        wall_start = time.time()
+        event.listen(db.engine, "before_cursor_execute", self._count_query)
+        try:
+            pending = list(self._records)
+            while cycles < self.cycles and len(completed) < len(self._records):
+                per_cycle = self.requests_per_cycle
+                for record_id in pending[:per_cycle]:
+                    Request.create(record_id)
+                    submitted[record_id] = self.now
+                pending = pending[per_cycle:]
+                db.session.commit()
+
+                RequestService.process_requests()
+                TransferService.process_transfers()
+
+                for request in RequestMetadata.query.filter(
+                    RequestMetadata.record_id.in_(self._records),
+                    RequestMetadata.status == "completed",
+                ):
+                    completed.setdefault(
+                        request.record_id, self.now - submitted[request.record_id]
+                    )
+                cycles += 1
+                self.now += self.cycle
+                TransferManager.now = self.now
+        finally:
+            event.remove(db.engine, "before_cursor_execute", self._count_query)
+
+        hours = cycles * self.cycle / 3600
+        transfers = {}
+        for transfer in TransferMetadata.query.filter(
+            TransferMetadata.record_uuid.in_([str(r) for r in self._records])
+        ):
+            transfers[transfer.status] = transfers.get(transfer.status, 0) + 1
+        return {
+            "records": len(self._records),
+            "files": len(self._records) * self.files_per_record,
+            "cycles": cycles,
+            "simulated_hours": hours,
+            "wall_seconds": time.time() - wall_start,
+            "requests_completed": len(completed),
+            "requests_per_hour": len(completed) / hours if hours else 0,
+            "queries": self._queries,
+            "queries_per_cycle": self._queries / cycles if cycles else 0,
+            "time_to_online": percentiles(list(completed.values())),
+            "transfers": transfers,
+        }
+
+    def cleanup(self):
+        """Remove the records, requests, transfers and location created by the simulation."""
+        for record_id in self._records:
+            RequestMetadata.query.filter_by(record_id=record_id).delete()
+            TransferMetadata.query.filter_by(record_uuid=str(record_id)).delete()
+            pid = PersistentIdentifier.query.filter_by(
+                pid_type="recid", object_uuid=record_id
+            ).one()
+            delete_record(pid, "recid", logger)
+        if self._location:
+            db.session.delete(self._location)
+        db.session.commit()
+        if self._base_dir:
+            shutil.rmtree(self._base_dir, ignore_errors=True)
@@ -26,6 +26,7 @@
 import logging
 import os
 import re
+import zlib
 import gfal2
 
 from invenio_db import db
@@ -142,3 +143,18 @@ class Storage:
             return cls._verify_file(parsed.path, size, checksum)
         else:
             raise ValueError(f"Unsupported URI scheme: {parsed.scheme}")
+
+    @staticmethod
+    def _verify_file(path: str, size: int, checksum: str) -> (bool, str):
+        """Check if a local file exists and has the given size and checksum."""
+        if not os.path.isfile(path):
+            return False, "File does not exist"
+        if os.path.getsize(path) != size:
+            return False, "different size"
+        value = 1
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                value = zlib.adler32(chunk, value)
+        if checksum != f"adler32:{value:08x}":
+            return False, "different checksum"
+        return True, None
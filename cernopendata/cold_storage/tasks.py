@@ -13,17 +13,44 @@ from datetime import timedelta
 from celery import shared_task
 from flask.cli import with_appcontext
 
-from .service import RequestService, TransferService
+from . import metrics
+from .service import EvictionService, RequestService, TransferService
 
 CheckTransfersTask = {
     "task": "cernopendata.cold_storage.tasks.check_transfers",
     "schedule": timedelta(minutes=30),
 }
 
+RollupTransfersTask = {
+    "task": "cernopendata.cold_storage.tasks.rollup_transfers",
+    "schedule": timedelta(days=1),
+}
+
+EvictHotCopiesTask = {
+    "task": "cernopendata.cold_storage.tasks.evict_hot_copies",
+    "schedule": timedelta(hours=1),
+}
+
 
 @shared_task
 @with_appcontext
 def check_transfers():
     """Check the ongoing transfers."""
-    RequestService.process_requests()
-    TransferService.process_transfers()
+    with metrics.timer("poll_cycle_seconds", phase="requests"):
+        RequestService.process_requests()
+    with metrics.timer("poll_cycle_seconds", phase="transfers"):
+        TransferService.process_transfers()
+
+
+@shared_task
+@with_appcontext
+def evict_hot_copies():
+    """Remove the least recently accessed hot copies that exceed the quota."""
+    EvictionService.evict()
+
+
+@shared_task
+@with_appcontext
+def rollup_transfers():
+    """Summarise the old transfers into daily aggregates."""
+    TransferService.rollup_transfers()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Open Data Portal.
+# Copyright (C) 2017-2025 CERN.
+#
+# CERN Open Data Portal is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# CERN Open Data Portal is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CERN Open Data Portal; if not, write to the
+# Free Software Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+# MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Cold Storage simulated plugin."""
+
+import math
+import random
+import time
+
+from flask import current_app
+
+
+class TransferManager:
+    """TransferManager that simulates the recall from tape, without moving any file.
+
+    The duration of the transfers follows a lognormal distribution, and only a limited number of them
+    can be active at the same time (like the number of tape drives). The rest of them are queued. The
+    parameters are defined in `COLD_SIMULATED_TRANSFERS`.
+
+    The state of each transfer is encoded in its id, so that the status can be checked from any
+    instance of the class.
+    """
+
+    defaults = {
+        "stage_latency": (3600, 1800),
+        "archive_latency": (600, 300),
+        "drives": 10,
+        "failure_rate": 0.01,
+        "submit_error_rate": 0.0,
+        "seed": None,
+    }
+
+    now = None
+    """Time used by the simulation. If it is not defined, it uses the current time."""
+
+    _random = None
+    _drives = []
+    _counter = 0
+
+    def __init__(self):
+        """Initialize the simulated transfers."""
+        self._config = {
+            **self.defaults,
+            **current_app.config.get("COLD_SIMULATED_TRANSFERS", {}),
+        }
+        if TransferManager._random is None:
+            TransferManager.reset(self._config["seed"])
+
+    @classmethod
+    def reset(cls, seed=None, now=None):
+        """Start a new simulation: empty queue, and a new random generator."""
+        cls._random = random.Random(seed)
+        cls._drives = []
+        cls._counter = 0
+        cls.now = now
+
+    @classmethod
+    def _now(cls):
+        """Current time of the simulation."""
+        return int(cls.now if cls.now is not None else time.time())
+
+    def _latency(self, action):
+        """Duration of a transfer, based on the mean and standard deviation of a lognormal distribution."""
+        mean, deviation = self._config[f"{action}_latency"]
+        sigma = math.sqrt(math.log(1 + (deviation / mean) ** 2))
+        return self._random.lognormvariate(math.log(mean) - sigma**2 / 2, sigma)
+
+    def _submit(self, action):
+        """Put a transfer in the queue, and decide when and how it will finish."""
+        if self._random.random() < self._config["submit_error_rate"]:
+            return None
+        now = self._now()
+        drives = TransferManager._drives
+        if len(drives) < self._config["drives"]:
+            drives.append(now)
+        slot = min(range(len(drives)), key=drives.__getitem__)
+        start = max(now, drives[slot])
+        end = int(start + self._latency(action))
+        drives[slot] = end
+        outcome = "F" if self._random.random() < self._config["failure_rate"] else "D"
+        TransferManager._counter += 1
+        return f"{start}:{end}:{outcome}:{TransferManager._counter % 1000000}"
+
+    def stage(self, source, dest):
+        """Simulate the copy from cold to hot."""
+        return self._submit("stage")
+
+    def archive(self, source, dest):
+        """Simulate the copy from hot to cold."""
+        return self._submit("archive")
+
+    def transfer_status(self, transfer_id):
+        """Return the status of a particular transfer at the current time of the simulation."""
+        try:
+            start, end, outcome, _ = transfer_id.split(":")
+            start, end = int(start), int(end)
+        except (AttributeError, ValueError):
+            return None, None
+        now = self._now()
+        if now < start:
+            return "SUBMITTED", None
+        if now < end:
+            return "ACTIVE", None
+        if outcome == "F":
+            return "FAILED", "Simulated failure"
+        return "DONE", None
@@ -47,7 +47,11 @@ from invenio_stats.queries import TermsQuery
 from invenio_stats.tasks import StatsAggregationTask, StatsEventTask
 from urllib3.exceptions import InsecureRequestWarning
 
-from cernopendata.cold_storage.tasks import CheckTransfersTask
+from cernopendata.cold_storage.tasks import (
+    CheckTransfersTask,
+    EvictHotCopiesTask,
+    RollupTransfersTask,
+)
 
 # noinspection PyUnresolvedReferences
 # from cernopendata.modules.pages.config import *
@@ -109,6 +113,30 @@ COLD_ACTIVE_ARCHIVING_TRANSFERS_THRESHOLD = 1000
 # Maximum number of transfers that should be active at a given moment
 COLD_ACTIVE_STAGING_TRANSFERS_THRESHOLD = 50
 # Maximum number of transfers that should be active at a given moment
+COLD_HOT_QUOTA = int(os.environ.get("COLD_HOT_QUOTA", 0))
+# Maximum size (in bytes) of the hot copies of files that also exist on cold storage. 0 disables the eviction
+COLD_EVICTION_BATCH_SIZE = 100
+# Number of least recently accessed files that are evicted at once
+COLD_EVICTION_GRACE_PERIOD = 86400
+# Hot copies staged less than this number of seconds ago are not evicted
+COLD_TRANSFERS_RETENTION_DAYS = 90
+# Finished transfers older than this are summarised into daily aggregates. 0 keeps all of them
+COLD_TRANSFERS_ROLLUP_BATCH_SIZE = 10000
+# Number of transfers that are summarised in a single transaction
+COLD_SIMULATED_TRANSFERS = {
+    "stage_latency": (3600, 1800),
+    "archive_latency": (600, 300),
+    "drives": 10,
+    "failure_rate": 0.01,
+    "submit_error_rate": 0.0,
+    "seed": None,
+}
+# Parameters of the simulated transfers (cernopendata.cold_storage.transfer.simulated): mean and standard
+# deviation of the duration (in seconds), number of concurrent transfers, and probability of errors
+COLD_METRICS_TOKEN = os.environ.get("COLD_METRICS_TOKEN")
+# Token needed to read the metrics of the cold storage. Without it, the metrics are not published
+COLD_METRICS_CACHE_TIMEOUT = 60
+# Seconds that the totals of the transfers are cached between scrapes of the metrics
 
 LOGGING_SENTRY_CELERY = os.environ.get("LOGGING_SENTRY_CELERY", False)
 
@@ -297,9 +325,27 @@ CELERY_BEAT_SCHEDULE = {
         **CheckTransfersTask,
         "schedule": timedelta(minutes=5),  # Every thirty minutes
     },
+    "cold-storage-rollup": {
+        **RollupTransfersTask,
+        "schedule": crontab(minute=0, hour=2),
+    },
+    "cold-storage-eviction": {
+        **EvictHotCopiesTask,
+        "schedule": timedelta(hours=1),
+    },
     "process-eos-dump": {
         **ProcessEosDumpTask,
-        "schedule": crontab(minute=0, hour=3),
+        "schedule": crontab(minute=0, hour=3, day_of_week="mon-sat"),
+    },
+    # Changes in the records do not show up in the dump: once a week, all the entries are processed
+    "process-eos-dump-full": {
+        **ProcessEosDumpTask,
+        "schedule": crontab(minute=0, hour=3, day_of_week="sun"),
+        "kwargs": {"full": True},
+    },
+    "releases-validation-cache": {
+        "task": "cernopendata.modules.releases.tasks.prune_validation_cache",
+        "schedule": crontab(minute=30, hour=2),
     },
 }
 # JSONSchemas
@@ -679,6 +725,42 @@ CERNOPENDATA_DISABLE_DOWNLOADS = os.environ.get("CERNOPENDATA_DISABLE_DOWNLOADS"
 CERNOPENDATA_IMAGES_PATH = os.environ.get(
     "CERNOPENDATA_IMAGES_PATH", "/opt/invenio/var/instance/static/upload"
 )
+#: Number of shards of the EOS dump that are processed in parallel
+CERNOPENDATA_EOS_DUMP_WORKERS = int(os.environ.get("CERNOPENDATA_EOS_DUMP_WORKERS", 1))
+#: Fingerprint of the last EOS dump. If defined, only the entries that changed are processed
+CERNOPENDATA_EOS_DUMP_FINGERPRINT = os.environ.get("CERNOPENDATA_EOS_DUMP_FINGERPRINT")
+#: Local snapshot of the paths known by the indices, built at the beginning of each EOS dump run
+CERNOPENDATA_EOS_DUMP_SNAPSHOT = os.environ.get("CERNOPENDATA_EOS_DUMP_SNAPSHOT")
+#: Number of levels of the directories in the summary of the dark files of the EOS dump
+CERNOPENDATA_DARK_REPORT_DEPTH = 4
+#: How to update the last access of the files in the indices: 'bulk' (partial updates by id) or
+#: 'update_by_query', with the size and concurrency of the requests, and the retries on 429
+CERNOPENDATA_EOS_DUMP_UPDATES = {
+    "strategy": "bulk",
+    "chunk_size": 500,
+    "concurrency": 1,
+    "max_retries": 3,
+    "initial_backoff": 2,
+}
+#: Concurrency of the release validations: threads for the ones that wait on the database
+#: or the storage, and processes for the CPU-bound ones on releases with many items. The
+#: processes are only used from celery tasks and the CLI, never inside a web request
+CERNOPENDATA_RELEASE_VALIDATION = {
+    "threads": 4,
+    "processes": 2,
+    "process_min_items": 1000,
+}
+#: Days that the results of the validations of the release items are cached
+CERNOPENDATA_RELEASE_VALIDATION_CACHE_DAYS = 30
+#: Concurrent access to the storage when fixing the files of a release: number of threads,
+#: connections per endpoint, retries of the transient errors and seconds of the first backoff
+CERNOPENDATA_GFAL_POOL = {
+    "workers": 16,
+    "per_endpoint": 8,
+    "retries": 3,
+    "backoff": 1,
+    "progress_every": 1000,
+}
 # Search
 # ======
 #: Default OpenSearch document type.
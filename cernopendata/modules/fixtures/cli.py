@@ -19,11 +19,17 @@
 
 """Command line interface for CERN Open Data Portal."""
 
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
+import re
 import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import lru_cache
 from os.path import exists, isdir
 
 import click
@@ -31,19 +37,53 @@ import pkg_resources
 from flask import current_app
 from flask.cli import with_appcontext
 from invenio_db import db
-from invenio_files_rest.models import FileInstance, ObjectVersion
+from invenio_files_rest.models import BucketTag, FileInstance, ObjectVersion
 from invenio_indexer.api import RecordIndexer
 from invenio_pidstore.errors import PIDDoesNotExistError
 from invenio_pidstore.models import PersistentIdentifier
 from invenio_records import Record
+from invenio_search.proxies import current_search_client
+from invenio_search.utils import build_alias_name
+from jsonschema.validators import validator_for
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm.attributes import flag_modified
 
 from cernopendata.api import FileIndexMetadata, MultiURIFileObject, RecordFilesWithIndex
+from cernopendata.cold_storage.api import FileURI
+from cernopendata.modules.fixtures.models import RecordContentHashMetadata
+from cernopendata.modules.fixtures.timing import (
+    PhaseTimer,
+    phase,
+    timed_iter,
+    timing,
+)
 from cernopendata.modules.records.minters.docid import cernopendata_docid_minter
 from cernopendata.modules.records.minters.recid import cernopendata_recid_minter
 from cernopendata.modules.records.minters.termid import cernopendata_termid_minter
 
+NDJSON_EXTENSIONS = (".jsonl", ".ndjson")
+
+STREAM_CHUNK_SIZE = 1 << 20
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Errors this close to the end of the buffer can come from an entry cut by the chunk
+_JSON_TRUNCATION_MARGIN = 8
+
+_RECID_FIELD = re.compile(r'"recid"\s*:\s*("[^"\\]*(?:\\.[^"\\]*)*"|-?\d+)')
+
+# Part of a chunk kept for the next one, in case it cuts a recid field
+_RECID_FIELD_MARGIN = 256
+
+FIXTURE_SCHEMAS = {
+    "record": ("records/record-v1.0.0.json", "recid"),
+    "terms": ("records/glossary-term-v1.0.0.json", "anchor"),
+    "docs": ("records/docs-v1.0.0.json", "slug"),
+}
+"""Schema and identifier of each type of fixture."""
+
+STATISTICS = ("inserted", "updated", "error", "skipped", "deleted")
+
 MODE_OPTIONS = [
     "insert",
     "replace",
@@ -73,23 +113,134 @@ option_verbose = click.option(
 )
 
 
+def iter_json_entries(filename, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield one by one the entries of a fixture file.
+
+    The file can contain either a JSON array or newline-delimited JSON. It is read in
+    chunks, so that the memory does not depend on the size of the file.
+    """
+    with open(filename, encoding="utf-8") as source:
+        if filename.endswith(NDJSON_EXTENSIONS):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        decoder = json.JSONDecoder()
+        buffer = source.read(chunk_size)
+        pos = _JSON_WHITESPACE.match(buffer).end()
+        if not buffer.startswith("[", pos):
+            raise ValueError(f"{filename} does not contain a JSON array")
+        pos += 1
+        while True:
+            pos = _JSON_WHITESPACE.match(buffer, pos).end()
+            if buffer.startswith("]", pos):
+                return
+            if buffer.startswith(",", pos):
+                pos += 1
+                continue
+            try:
+                entry, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if not _json_truncated(e, buffer):
+                    raise ValueError(f"Invalid JSON array in {filename}: {e}") from e
+                end = None
+            if end is None or end == len(buffer):
+                # The entry might continue in the next chunk
+                chunk = source.read(chunk_size)
+                if chunk:
+                    buffer, pos = buffer[pos:] + chunk, 0
+                    continue
+                if end is None:
+                    raise ValueError(f"Invalid or truncated JSON array in {filename}")
+            yield entry
+            pos = end
+
+
+def _json_truncated(error, buffer):
+    """Whether a decoding error can be fixed by reading more of the file."""
+    return (
+        error.msg.startswith("Unterminated string")
+        or len(buffer) - error.pos <= _JSON_TRUNCATION_MARGIN
+    )
+
+
 def get_jsons_from_dir(dir):
     """Get JSON files inside a dir."""
     res = []
     for root, dirs, files in os.walk(dir):
         for file in files:
-            if file.endswith(".json"):
+            if file.endswith((".json",) + NDJSON_EXTENSIONS):
                 res.append(os.path.join(root, file))
     return res
 
 
-def _handle_record_files(record, data, logger=None):
-    """Handles record files."""
+def _existing_record_files(record):
+    """Return the direct files and the file indices that a record has, by key."""
+    files = {}
+    if record.bucket:
+        files = {o.key: o for o in ObjectVersion.get_by_bucket(record.bucket).all()}
+    indices = {index["key"]: index for index in record.get("_file_indices", [])}
+    return {"files": files, "indices": indices}
+
+
+def _reuse_file(existing, filename, file):
+    """Return the existing object of a direct file, if it has not changed."""
+    obj = existing["files"].get(filename)
+    if not obj:
+        return None
+    if (obj.file.uri, obj.file.checksum, obj.file.size) == (
+        file["uri"],
+        file["checksum"],
+        file["size"],
+    ):
+        del existing["files"][filename]
+        return obj
+    return None
+
+
+def _reuse_file_index(existing, filename, file, description):
+    """Return the information of an existing file index, if it has not changed."""
+    index = existing["indices"].get(filename)
+    if not index or not index.get("bucket"):
+        return None
+    if BucketTag.get_value(index["bucket"], "checksum") != file["checksum"]:
+        return None
+    del existing["indices"][filename]
+    if index.get("description") != description:
+        BucketTag.create_or_update(index["bucket"], "description", description)
+        index["description"] = description
+    return index
+
+
+def _remove_record_files(existing, logger):
+    """Remove the direct files and file indices that a record does not have anymore."""
+    for obj in existing["files"].values():
+        logger.info(f"  -> Removing file {obj.key}")
+        FileURI.delete_by_bucket(obj.bucket_id, obj.key)
+        file_id = obj.file_id
+        obj.remove()
+        FileInstance.query.filter_by(id=file_id).delete()
+    for key, index in existing["indices"].items():
+        logger.info(f"  -> Removing file index {key}")
+        if index.get("bucket"):
+            FileIndexMetadata.delete(index["bucket"])
+    existing["files"], existing["indices"] = {}, {}
+
+
+def _handle_record_files(record, data, logger=None, existing=None):
+    """Handles record files.
+
+    When the record is updated, ``existing`` contains the files and file indices that
+    it had before. The ones that have not changed are kept as they are, together
+    with their tags, and the rest are removed.
+    """
     # let's make a copy of files, since we might change it
     logger = logging.getLogger(__name__) if not logger else logger
     verbose = logger.getEffectiveLevel() == logging.DEBUG
+    existing = existing or {"files": {}, "indices": {}}
     real_files = []
     if "files" not in data:
+        _remove_record_files(existing, logger)
         if "distribution" in record and "availability" in record["distribution"]:
             record["availability"] = record["distribution"]["availability"]
         else:
@@ -104,39 +255,70 @@ def _handle_record_files(record, data, logger=None):
         assert "uri" in file
         assert "size" in file
         assert "checksum" in file
-        f = FileInstance.create()
         filename = file.get("uri").split("/")[-1:][0]
-        f.set_uri(file.get("uri"), file.get("size"), file.get("checksum"))
         if "type" in file and file["type"] == "index.json":
+            description = file.get("description", filename)
+            index = _reuse_file_index(existing, filename, file, description)
+            if index:
+                if verbose:
+                    logger.info(f"  -> Keeping the unchanged index {file.get('uri')}")
+                record["_file_indices"].append(index)
+                continue
+            old_index = existing["indices"].pop(filename, None)
             # We don't need to store the index
-            FileIndexMetadata.create(
-                record,
-                f,
-                description=file.get("description", filename),
-                logger=logger,
-            )
+            f = FileInstance.create()
+            f.set_uri(file.get("uri"), file.get("size"), file.get("checksum"))
+            with phase("file_index"):
+                if old_index and old_index.get("bucket"):
+                    FileIndexMetadata.update(
+                        record,
+                        old_index["bucket"],
+                        f,
+                        description=description,
+                        logger=logger,
+                    )
+                else:
+                    FileIndexMetadata.create(
+                        record,
+                        f,
+                        description=description,
+                        logger=logger,
+                    )
             f.delete()
         elif "type" in file and file["type"] == "index.txt":
-            # The txt indexes should be ignored. Just delete the file
-            f.delete()
+            # The txt indexes should be ignored
+            continue
         else:
             if verbose:
                 logger.info(f"  -> Detected direct file {file.get('uri')}")
             real_files.append(file)
+            obj = _reuse_file(existing, filename, file)
             try:
-                obj = MultiURIFileObject.create_version(record.bucket, filename, f.id)
+                if not obj:
+                    old_obj = existing["files"].pop(filename, None)
+                    if old_obj:
+                        _remove_record_files(
+                            {"files": {filename: old_obj}, "indices": {}}, logger
+                        )
+                    f = FileInstance.create()
+                    f.set_uri(file.get("uri"), file.get("size"), file.get("checksum"))
+                    obj = MultiURIFileObject.create_version(
+                        record.bucket, filename, f.id
+                    )
+                    FileURI.add(file["uri"], record.id, obj.bucket_id, obj.key)
                 file_info = {
                     "bucket": str(obj.bucket_id),
                     "checksum": obj.file.checksum,
                     "key": obj.key,
                     "version_id": str(obj.version_id),
-                    "availability": "online",
+                    "availability": MultiURIFileObject(obj, {}).availability,
                 }
                 file.update(file_info)
             except Exception as e:
                 logger.error(
                     f"  -> Recid {data.get('recid')} file {filename} could not be loaded due to {str(e)}."
                 )
+    _remove_record_files(existing, logger)
     record["files"] = real_files
     data["files"] = real_files
     if record.files:
@@ -150,22 +332,25 @@ def _handle_record_files(record, data, logger=None):
 def create_record(data, skip_files, logger=None):
     """Creates a new record."""
     id = uuid.uuid4()
-    cernopendata_recid_minter(id, data)
+    with phase("pid"):
+        cernopendata_recid_minter(id, data)
     record = RecordFilesWithIndex.create(data, id_=id, with_bucket=not skip_files)
     if not skip_files:
-        _handle_record_files(record, data, logger)
+        with phase("files"):
+            _handle_record_files(record, data, logger)
 
     return record
 
 
 def update_record(pid, data, skip_files, logger=None):
-    """Updates the given record."""
+    """Updates the given record.
+
+    Only the files that have changed are replaced; the rest keep their objects, tags and
+    file indices.
+    """
     record = RecordFilesWithIndex.get_record(pid.object_uuid)
     if not skip_files:
-        for o in ObjectVersion.get_by_bucket(record.bucket).all():
-            o.remove()
-            FileInstance.query.filter_by(id=o.file_id).delete()
-        FileIndexMetadata.delete_by_record(record=record)
+        existing = _existing_record_files(record)
     # This is to ensure that fields that do not appear in the new data
     # are not just kept from the previous version
     for k in list(record.keys()):
@@ -176,9 +361,10 @@ def update_record(pid, data, skip_files, logger=None):
         del record[k]
     record.update(data)
     if not skip_files:
-        _handle_record_files(record, data, logger)
+        with phase("files"):
+            _handle_record_files(record, data, logger, existing)
         record.update(data)
-        db.session.commit()
+        db.session.flush()
     return record
 
 
@@ -190,6 +376,8 @@ def delete_record(pid, pid_field, logger=None):
             o.remove()
             FileInstance.query.filter_by(id=o.file_id).delete()
         FileIndexMetadata.delete_by_record(record=record)
+        FileURI.delete_by_record(record.id)
+        RecordContentHashMetadata.query.filter_by(record_uuid=record.id).delete()
         record.delete()
     except NoResultFound:
         logger.error(
@@ -262,6 +450,164 @@ def _get_list_of_fixture_files(files, type, logger):
     return get_jsons_from_dir(data_dir)
 
 
+@contextmanager
+def _refresh_disabled(index):
+    """Disable the refresh of an index, and restore the previous value at the end."""
+    settings = current_search_client.indices.get_settings(
+        index=index, name="index.refresh_interval"
+    )
+    intervals = {
+        name: value.get("settings", {}).get("index", {}).get("refresh_interval")
+        for name, value in settings.items()
+    }
+    current_search_client.indices.put_settings(
+        index=index, body={"index": {"refresh_interval": "-1"}}
+    )
+    try:
+        yield
+    finally:
+        for name, interval in intervals.items():
+            current_search_client.indices.put_settings(
+                index=name, body={"index": {"refresh_interval": interval}}
+            )
+        current_search_client.indices.refresh(index=index)
+
+
+def _fixture_index(schema_name):
+    """Return the index where the entries of a fixture schema are stored."""
+    schema = current_app.extensions["invenio-jsonschemas"].path_to_url(schema_name)
+    return build_alias_name(RecordIndexer().record_to_index({"$schema": schema}))
+
+
+class DeferredIndexer:
+    """Collect the records loaded from the fixtures, and index them in bulk at the end.
+
+    The refresh of the indices is disabled while the records are loaded, and restored
+    once they have been indexed. With ``manage_refresh=False``, the caller takes care
+    of it; this is what the parallel load does, since the refresh is a setting of the
+    whole index, shared by all the processes.
+    """
+
+    def __init__(self, chunk_size=500, logger=None, manage_refresh=True):
+        """Initialize the collection of records."""
+        self._chunk_size = chunk_size
+        self._logger = logger or logging.getLogger(__name__)
+        self._manage_refresh = manage_refresh
+        self._indexer = RecordIndexer()
+        self._record_ids = {}
+        self._indices = set()
+        self._refresh = ExitStack()
+
+    def add(self, record):
+        """Schedule the indexing of a record."""
+        if self._manage_refresh:
+            index = build_alias_name(self._indexer.record_to_index(record))
+            if index not in self._indices:
+                self._refresh.enter_context(_refresh_disabled(index))
+                self._indices.add(index)
+        self._record_ids.setdefault(type(record), []).append(str(record.id))
+
+    def flush(self):
+        """Index all the records collected so far, and restore the refresh."""
+        with phase("indexing"):
+            return self._flush()
+
+    def _flush(self):
+        indexed, errors = 0, 0
+        try:
+            for record_cls, record_ids in self._record_ids.items():
+                indexer = RecordIndexer(record_cls=record_cls)
+                self._logger.info(f"Indexing {len(record_ids)} records in bulk...")
+                indexer.bulk_index(record_ids)
+                ok, failed = indexer.process_bulk_queue(
+                    search_bulk_kwargs={
+                        "chunk_size": self._chunk_size,
+                        "raise_on_error": False,
+                    },
+                    bulk_index_max_items=len(record_ids),
+                )
+                indexed += ok
+                errors += failed
+            self._record_ids = {}
+        finally:
+            self._refresh.close()
+            self._indices = set()
+        if errors:
+            self._logger.error(f"==> Error indexing {errors} records")
+        self._logger.info(f"Indexed {indexed} records ({errors} errors)")
+        return indexed, errors
+
+
+def record_content_hash(data, skip_files):
+    """Hash of the content of a fixture entry, including its list of files."""
+    content = json.dumps([data, skip_files], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _get_content_hash(record_uuid):
+    """Return the hash of the content used for the last update of a record."""
+    entry = RecordContentHashMetadata.query.get(record_uuid)
+    return entry.hash if entry else None
+
+
+def _set_content_hash(record_uuid, content_hash):
+    """Store the hash of the content of a record."""
+    db.session.merge(
+        RecordContentHashMetadata(record_uuid=record_uuid, hash=content_hash)
+    )
+
+
+class FixtureBatch:
+    """Group the entries loaded from the fixtures in transactions of several entries."""
+
+    def __init__(self, size, index_record, entry_type, logger):
+        """Initialize an empty batch."""
+        self.statistics = {key: 0 for key in STATISTICS}
+        self.statistics["batch_seconds"] = []
+        self._size = size
+        self._index_record = index_record
+        self._entry_type = entry_type
+        self._logger = logger
+        self._entries = []
+        self._start = time.time()
+
+    def add(self, pid, record, action):
+        """Add an entry to the batch, committing it if it is full."""
+        self._entries.append((pid, record, action))
+        if len(self._entries) >= self._size:
+            return self.commit()
+        return True
+
+    def commit(self):
+        """Commit the entries of the batch, and index them."""
+        if not self._entries:
+            return True
+        entries, self._entries = self._entries, []
+        try:
+            with phase("commit"):
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._logger.error(f"==> There was an exception during the commit: {e}")
+            self.statistics["error"] += len(entries)
+            return False
+        for pid, record, action in entries:
+            self.statistics[action] += 1
+            self._logger.info(f"==> {self._entry_type.capitalize()} {pid} {action}")
+            if record:
+                with phase("indexing"):
+                    self._index_record(record)
+        db.session.expunge_all()
+        duration = time.time() - self._start
+        self.statistics["batch_seconds"].append(duration)
+        if self._size > 1:
+            self._logger.info(
+                f"==> Committed {len(entries)} {self._entry_type}s in {duration:.2f} seconds"
+            )
+        self._start = time.time()
+        return True
+
+
 def _process_fixture_files(
     files,
     entry_type,
@@ -274,6 +620,11 @@ def _process_fixture_files(
     create_function=create_record,
     delete_function=delete_record,
     logger=None,
+    index_chunk_size=None,
+    batch_size=1,
+    skip_unchanged=False,
+    timer=None,
+    manage_refresh=True,
 ):
     logger = logging.getLogger(__name__) if not logger else logger
     if mode not in MODE_OPTIONS:
@@ -281,7 +632,75 @@ def _process_fixture_files(
             f"Error: mode '{mode}' not understood. Available options are '{MODE_OPTIONS}'"
         )
         return
-    indexer = RecordIndexer()
+    if timer:
+        with timing(timer), timer.instrument(
+            RecordFilesWithIndex, "_validate", "validation"
+        ):
+            return _process_fixture_files(
+                files,
+                entry_type,
+                schema_name,
+                skip_files,
+                mode,
+                load_entry_data,
+                pid_field,
+                update_function,
+                create_function,
+                delete_function,
+                logger,
+                index_chunk_size,
+                batch_size,
+                skip_unchanged,
+                manage_refresh=manage_refresh,
+            )
+    deferred = (
+        DeferredIndexer(index_chunk_size, logger, manage_refresh)
+        if index_chunk_size
+        else None
+    )
+    batch = FixtureBatch(
+        batch_size,
+        deferred.add if deferred else RecordIndexer().index,
+        entry_type,
+        logger,
+    )
+    try:
+        return _load_fixture_entries(
+            files,
+            entry_type,
+            schema_name,
+            skip_files,
+            mode,
+            load_entry_data,
+            pid_field,
+            update_function,
+            create_function,
+            delete_function,
+            logger,
+            batch,
+            skip_unchanged,
+        )
+    finally:
+        batch.commit()
+        if deferred:
+            deferred.flush()
+
+
+def _load_fixture_entries(
+    files,
+    entry_type,
+    schema_name,
+    skip_files,
+    mode,
+    load_entry_data,
+    pid_field,
+    update_function,
+    create_function,
+    delete_function,
+    logger,
+    batch,
+    skip_unchanged,
+):
     schema = current_app.extensions["invenio-jsonschemas"].path_to_url(schema_name)
     verbose = logger.getEffectiveLevel() == logging.DEBUG
 
@@ -289,73 +708,96 @@ def _process_fixture_files(
 
     i = 1
     total_files = len(record_json)
-    statistics = {"inserted": 0, "updated": 0, "error": 0, "skipped": 0, "deleted": 0}
+    statistics = batch.statistics
     for filename in record_json:
         logger.info(f"Loading records from {filename} ({i}/{total_files})...")
         i += 1
-        with open(filename, "rb") as source:
-            json_data = json.load(source)
-            for data in json_data:
-                pid = load_entry_data(data, filename)
-                if not pid:
-                    continue
-                logger.info(f"==> Processing {entry_type} {pid}")
-                if verbose:
-                    logger.info(f"  -> Detected DOI {data.get('doi')}")
-                data["$schema"] = schema
-                try:
-                    pid_object = PersistentIdentifier.get(pid_field, pid)
-                    if mode == "insert":
-                        logger.error(
-                            f"==> {entry_type.capitalize()} {pid} exists already; cannot insert it."
-                        )
-                        statistics["error"] += 1
-                        return statistics
-                    if mode == "insert-or-skip":
-                        logger.warning(
-                            f"==> {entry_type.capitalize()} {pid} already exists... skipping"
-                        )
-                        statistics["skipped"] += 1
-                        continue
-                    if mode in ("delete", "delete-or-skip"):
-                        record = delete_function(pid_object, pid_field)
-                        action = "deleted"
-                    else:
-                        record = update_function(pid_object, data, skip_files, logger)
-                        action = "updated"
-                except PIDDoesNotExistError:
-                    if mode in ("replace", "delete", "delete-or-skip"):
-                        logger.error(
-                            f"==> {entry_type.capitalize()} {pid} does not exist; cannot {mode} it."
-                        )
-                        statistics["error"] += 1
-                        if mode == "delete-or-skip":
+        for data in timed_iter(iter_json_entries(filename), "parse"):
+            pid = load_entry_data(data, filename)
+            if not pid:
+                continue
+            logger.info(f"==> Processing {entry_type} {pid}")
+            if verbose:
+                logger.info(f"  -> Detected DOI {data.get('doi')}")
+            data["$schema"] = schema
+            content_hash = record_content_hash(data, skip_files)
+            try:
+                # Each entry has its own savepoint, so that a broken one does not
+                # affect the rest of the batch
+                with db.session.begin_nested():
+                    try:
+                        with phase("pid"):
+                            pid_object = PersistentIdentifier.get(pid_field, pid)
+                        if mode == "insert":
+                            logger.error(
+                                f"==> {entry_type.capitalize()} {pid} exists already; cannot insert it."
+                            )
+                            statistics["error"] += 1
+                            return statistics
+                        if mode == "insert-or-skip":
+                            logger.warning(
+                                f"==> {entry_type.capitalize()} {pid} already exists... skipping"
+                            )
+                            statistics["skipped"] += 1
+                            continue
+                        if mode in ("delete", "delete-or-skip"):
+                            with phase("record"):
+                                record = delete_function(pid_object, pid_field)
+                            action = "deleted"
+                        elif skip_unchanged and content_hash == _get_content_hash(
+                            pid_object.object_uuid
+                        ):
+                            logger.info(
+                                f"==> {entry_type.capitalize()} {pid} has not changed... skipping"
+                            )
+                            statistics["skipped"] += 1
                             continue
-                        return statistics
-                    record = create_function(data, skip_files, logger)
-                    action = "inserted"
-                try:
+                        else:
+                            with phase("record"):
+                                record = update_function(
+                                    pid_object, data, skip_files, logger
+                                )
+                            action = "updated"
+                    except PIDDoesNotExistError:
+                        if mode in ("replace", "delete", "delete-or-skip"):
+                            logger.error(
+                                f"==> {entry_type.capitalize()} {pid} does not exist; cannot {mode} it."
+                            )
+                            statistics["error"] += 1
+                            if mode == "delete-or-skip":
+                                continue
+                            return statistics
+                        with phase("record"):
+                            record = create_function(data, skip_files, logger)
+                        action = "inserted"
                     if record:
-                        record.commit()
-                    db.session.commit()
-                    statistics[action] += 1
-                except Exception as e:
-                    logger.error(f"==> There was an exception during the commit: {e}")
-                    statistics["error"] += 1
-                    return statistics
-                logger.info(f"==> {entry_type.capitalize()} {pid} {action}")
-                if record:
-                    indexer.index(record)
-                db.session.expunge_all()
+                        with phase("commit"):
+                            record.commit()
+                            _set_content_hash(record.id, content_hash)
+            except Exception as e:
+                logger.error(
+                    f"==> There was an exception processing {entry_type} {pid}: {e}"
+                )
+                statistics["error"] += 1
+                continue
+            if not batch.add(pid, record, action):
+                return statistics
     return statistics
 
 
 def _log_statistics(statistics, type, start_time, logger):
-    total_records = sum([value for value in statistics.values()])
+    total_records = sum([statistics[key] for key in STATISTICS])
     logger.info(
         f"Processed {total_records} {type} ({statistics['inserted']} created, {statistics['updated']} updated, "
         f"{statistics['error']} error, {statistics['skipped']} skipped, {statistics['deleted']} deleted))"
     )
+    batches = statistics.get("batch_seconds")
+    committed = statistics["inserted"] + statistics["updated"] + statistics["deleted"]
+    if batches and len(batches) < committed:
+        logger.info(
+            f"Committed {len(batches)} batches (min {min(batches):.2f}, "
+            f"average {sum(batches) / len(batches):.2f}, max {max(batches):.2f} seconds)"
+        )
     end_time = time.time()
     duration_seconds = end_time - start_time
     records_per_second = total_records / duration_seconds if duration_seconds > 0 else 0
@@ -365,6 +807,158 @@ def _log_statistics(statistics, type, start_time, logger):
     )
 
 
+def _load_record_data(data, filename):
+    """Get the recid of an entry of a record fixture file."""
+    if not data:
+        setup_cli_logger().warning(
+            f"IGNORING a possibly broken or corrupted record entry in file {filename} ..."
+        )
+        return False
+    return data["recid"]
+
+
+def _load_records(files, skip_files, mode, logger, **options):
+    """Load the records of the given fixture files."""
+    return _process_fixture_files(
+        files,
+        "record",
+        "records/record-v1.0.0.json",
+        skip_files=skip_files,
+        mode=mode,
+        load_entry_data=_load_record_data,
+        pid_field="recid",
+        update_function=update_record,
+        create_function=create_record,
+        delete_function=delete_record,
+        logger=logger,
+        **options,
+    )
+
+
+def _load_records_worker(files, skip_files, mode, verbose, options, timed=False):
+    """Load some fixture files in a separate process, with its own application."""
+    from cernopendata.factory import create_app
+
+    app = create_app()
+    with app.app_context():
+        logger = setup_cli_logger(verbose)
+        timer = PhaseTimer() if timed else None
+        result = _load_records(files, skip_files, mode, logger, timer=timer, **options)
+        if timer and result is not None:
+            result["timing"] = timer.samples
+        return result
+
+
+def _iter_fixture_recids(filename, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the recids that appear in a fixture file, without decoding its entries.
+
+    The recids that the entries refer to, like the ones of their relations, are
+    included as well, which can only put more files in the same group.
+    """
+    with open(filename, encoding="utf-8") as source:
+        buffer = ""
+        while True:
+            chunk = source.read(chunk_size)
+            buffer += chunk
+            end = 0
+            for match in _RECID_FIELD.finditer(buffer):
+                if chunk and match.end() == len(buffer):
+                    # A number might continue in the next chunk
+                    break
+                yield str(json.loads(match.group(1)))
+                end = match.end()
+            if not chunk:
+                return
+            start = max(end, len(buffer) - _RECID_FIELD_MARGIN)
+            buffer = buffer[start:]
+
+
+def _partition_fixture_files(files, workers):
+    """Distribute the fixture files in groups of similar size.
+
+    The files that contain the same recid end up in the same group, so that two processes
+    never create the same record.
+    """
+    parent = {filename: filename for filename in files}
+
+    def _find(filename):
+        while parent[filename] != filename:
+            parent[filename] = parent[parent[filename]]
+            filename = parent[filename]
+        return filename
+
+    owner = {}
+    for filename in files:
+        for recid in _iter_fixture_recids(filename):
+            if recid in owner:
+                parent[_find(filename)] = _find(owner[recid])
+            else:
+                owner[recid] = filename
+
+    groups = {}
+    for filename in files:
+        groups.setdefault(_find(filename), []).append(filename)
+
+    partitions = [[] for _ in range(workers)]
+    sizes = [0] * workers
+    for group in sorted(
+        groups.values(),
+        key=lambda group: sum(os.path.getsize(f) for f in group),
+        reverse=True,
+    ):
+        smallest = sizes.index(min(sizes))
+        partitions[smallest] += group
+        sizes[smallest] += sum(os.path.getsize(f) for f in group)
+    return [partition for partition in partitions if partition]
+
+
+def _load_records_in_parallel(
+    files, skip_files, mode, workers, verbose, logger, **options
+):
+    """Load the records with a pool of processes, and aggregate their statistics."""
+    timer = options.pop("timer", None)
+    statistics = {key: 0 for key in STATISTICS}
+    statistics["batch_seconds"] = []
+    record_json = _get_list_of_fixture_files(files, "record", logger)
+    if not record_json:
+        return statistics
+    partitions = _partition_fixture_files(record_json, workers)
+    logger.info(f"Loading {len(record_json)} files with {len(partitions)} processes...")
+    refresh = nullcontext()
+    if options.get("index_chunk_size"):
+        # The refresh is disabled once for all the processes, and restored when all of them finish
+        options["manage_refresh"] = False
+        refresh = _refresh_disabled(_fixture_index("records/record-v1.0.0.json"))
+    with refresh, ProcessPoolExecutor(
+        max_workers=len(partitions), mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = {
+            executor.submit(
+                _load_records_worker,
+                partition,
+                skip_files,
+                mode,
+                verbose,
+                options,
+                timer is not None,
+            ): partition
+            for partition in partitions
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result() or {}
+            except Exception as e:
+                logger.error(f"==> The process loading {futures[future]} failed: {e}")
+                statistics["error"] += 1
+                continue
+            if "timing" in result:
+                timer.merge(result.pop("timing"))
+            logger.info(f"==> Process finished with {result}")
+            for key, value in result.items():
+                statistics[key] += value
+    return statistics
+
+
 @fixtures.command()
 @click.option("--skip-files", is_flag=True, default=False, help="Skip loading of files")
 @click.option(
@@ -383,9 +977,57 @@ def _log_statistics(statistics, type, start_time, logger):
     type=click.Choice(MODE_OPTIONS),
     default="insert-or-replace",
 )
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of processes that load the files in parallel.",
+)
+@click.option(
+    "--bulk-index",
+    is_flag=True,
+    default=False,
+    help="Index all the records in bulk at the end of the load, instead of one by one.",
+)
+@click.option(
+    "--index-chunk-size",
+    default=500,
+    type=click.IntRange(min=1),
+    help="Number of records per bulk request, when using --bulk-index.",
+)
+@click.option(
+    "--batch-size",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of records committed in the same transaction.",
+)
+@click.option(
+    "--skip-unchanged",
+    is_flag=True,
+    default=False,
+    help="Do not update the records whose content has not changed since the last load.",
+)
+@click.option(
+    "--timing",
+    "timing_report",
+    type=click.File("w"),
+    help="Write a JSON report with the time spent in each phase ('-' for stdout).",
+)
 @option_verbose
 @with_appcontext
-def records(skip_files, files, profile, mode, verbose):
+def records(
+    skip_files,
+    files,
+    profile,
+    mode,
+    workers,
+    bulk_index,
+    index_chunk_size,
+    batch_size,
+    skip_unchanged,
+    timing_report,
+    verbose,
+):
     """Load all records."""
     start_time = time.time()
     logger = setup_cli_logger(verbose)
@@ -397,27 +1039,18 @@ def records(skip_files, files, profile, mode, verbose):
         pr = cProfile.Profile()
         pr.enable()
 
-    def load_record_data(data, filename):
-        if not data:
-            logger.warning(
-                f"IGNORING a possibly broken or corrupted record entry in file {filename} ..."
-            )
-            return False
-        return data["recid"]
-
-    result = _process_fixture_files(
-        files,
-        "record",
-        "records/record-v1.0.0.json",
-        skip_files=skip_files,
-        mode=mode,
-        load_entry_data=load_record_data,
-        pid_field="recid",
-        update_function=update_record,
-        create_function=create_record,
-        delete_function=delete_record,
-        logger=logger,
-    )
+    options = {
+        "index_chunk_size": index_chunk_size if bulk_index else None,
+        "batch_size": batch_size,
+        "skip_unchanged": skip_unchanged,
+        "timer": PhaseTimer() if timing_report else None,
+    }
+    if workers > 1:
+        result = _load_records_in_parallel(
+            files, skip_files, mode, workers, verbose, logger, **options
+        )
+    else:
+        result = _load_records(files, skip_files, mode, logger, **options)
 
     if profile:
         pr.disable()
@@ -428,6 +1061,10 @@ def records(skip_files, files, profile, mode, verbose):
         print(s.getvalue())
 
     _log_statistics(result, "records", start_time, logger)
+    if timing_report:
+        report = options["timer"].report(sum(result[key] for key in STATISTICS))
+        json.dump(report, timing_report, indent=2, sort_keys=True)
+        timing_report.write("\n")
 
 
 @fixtures.command()
@@ -599,3 +1236,122 @@ def pids():
             db.session.add(record)
             db.session.commit()
             db.session.expunge_all()
+
+
+@lru_cache(maxsize=None)
+def _get_schema_validator(schema_name):
+    """Compile the validator of a schema, once per process."""
+    with open(
+        pkg_resources.resource_filename("cernopendata", f"jsonschemas/{schema_name}")
+    ) as source:
+        schema = json.load(source)
+    validator_cls = validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+
+def _validate_fixture_file(filename, entry_type):
+    """Validate all the entries of a fixture file, without touching the database."""
+    schema_name, pid_field = FIXTURE_SCHEMAS[entry_type]
+    validator = _get_schema_validator(schema_name)
+    errors = {}
+    entries = 0
+    try:
+        for position, data in enumerate(iter_json_entries(filename)):
+            entries += 1
+            if not data:
+                continue
+            for error in validator.iter_errors(data):
+                path = "/" + "/".join(str(p) for p in error.absolute_path)
+                errors.setdefault(path, []).append(
+                    {
+                        "entry": position,
+                        "pid": data.get(pid_field),
+                        "message": error.message,
+                    }
+                )
+    except ValueError as e:
+        errors.setdefault("", []).append(
+            {"entry": entries, "pid": None, "message": str(e)}
+        )
+    return {"entries": entries, "errors": dict(sorted(errors.items()))}
+
+
+@fixtures.command()
+@click.option(
+    "files",
+    "--file",
+    "-f",
+    multiple=True,
+    type=click.Path(exists=True),
+    help="Path to the file(s) to be validated. If not provided, all"
+    "files will be validated",
+)
+@click.option(
+    "--type",
+    "entry_type",
+    type=click.Choice(list(FIXTURE_SCHEMAS)),
+    default="record",
+    help="Type of the fixtures.",
+)
+@click.option(
+    "--workers",
+    default=os.cpu_count() or 1,
+    type=click.IntRange(min=1),
+    help="Number of processes that validate the files in parallel.",
+)
+@click.option("--json", "output_json", is_flag=True, help="Print the errors as JSON.")
+@option_verbose
+def validate(files, entry_type, workers, output_json, verbose):
+    """Validate the fixtures against their schemas, without loading them."""
+    start_time = time.time()
+    logger = setup_cli_logger(verbose)
+    fixture_files = _get_list_of_fixture_files(files, entry_type, logger) or []
+    if workers > 1 and len(fixture_files) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(fixture_files)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            results = dict(
+                zip(
+                    fixture_files,
+                    executor.map(
+                        _validate_fixture_file,
+                        fixture_files,
+                        [entry_type] * len(fixture_files),
+                    ),
+                )
+            )
+    else:
+        results = {
+            filename: _validate_fixture_file(filename, entry_type)
+            for filename in fixture_files
+        }
+    results = dict(sorted(results.items()))
+
+    entries = sum(result["entries"] for result in results.values())
+    errors = sum(
+        len(values)
+        for result in results.values()
+        for values in result["errors"].values()
+    )
+    if output_json:
+        click.echo(json.dumps(results, indent=2))
+    else:
+        for filename, result in results.items():
+            for path, values in result["errors"].items():
+                click.echo(f"{filename} {path or '(file)'}: {len(values)} errors")
+                by_message = {}
+                for value in values:
+                    by_message.setdefault(value["message"], []).append(value["pid"])
+                for message, pids in by_message.items():
+                    more = f" and {len(pids) - 5} more" if len(pids) > 5 else ""
+                    click.echo(
+                        f"    {message} (in {', '.join(map(str, pids[:5]))}{more})"
+                    )
+    logger.info(
+        f"Validated {entries} {entry_type} entries in {len(results)} files in "
+        f"{time.time() - start_time:.2f} seconds: {errors} errors"
+    )
+    if errors:
+        raise SystemExit(1)
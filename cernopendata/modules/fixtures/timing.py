@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Open Data Portal.
+# Copyright (C) 2026 CERN.
+#
+# CERN Open Data Portal is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# CERN Open Data Portal is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CERN Open Data Portal; if not, write to the
+# Free Software Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+# MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Time spent in each phase of the loading of the fixtures."""
+
+import time
+from contextlib import contextmanager
+
+from cernopendata.utils import percentiles
+
+PHASES = (
+    "parse",
+    "validation",
+    "pid",
+    "record",
+    "files",
+    "file_index",
+    "commit",
+    "indexing",
+)
+
+_current = None
+
+
+class PhaseTimer:
+    """Measure the time spent in each phase.
+
+    The phases can be nested; the time of a phase does not include the time of the
+    phases that run inside it, so that the sum of all of them is the total time.
+    """
+
+    def __init__(self):
+        """Initialize the timer, without any measurement."""
+        self.samples = {name: [] for name in PHASES}
+        self._stack = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Measure a phase."""
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            nested = self._stack.pop()
+            self.samples.setdefault(name, []).append(duration - nested)
+            if self._stack:
+                self._stack[-1] += duration
+
+    @contextmanager
+    def instrument(self, cls, method, name):
+        """Measure all the calls to a method of a class as a phase."""
+        original = getattr(cls, method)
+        inherited = method not in vars(cls)
+
+        def _timed(*args, **kwargs):
+            with self.phase(name):
+                return original(*args, **kwargs)
+
+        setattr(cls, method, _timed)
+        try:
+            yield
+        finally:
+            if inherited:
+                delattr(cls, method)
+            else:
+                setattr(cls, method, original)
+
+    def merge(self, samples):
+        """Add the samples measured by another timer."""
+        for name, values in samples.items():
+            self.samples.setdefault(name, []).extend(values)
+
+    def report(self, entries):
+        """Totals, percentiles and throughput of each phase, as a dictionary.
+
+        The share of a phase is its part of the time of all the phases, which, with
+        several workers, is larger than the duration of the load.
+        """
+        duration = time.perf_counter() - self._start
+        measured = sum(sum(values) for values in self.samples.values())
+        phases = {}
+        for name, values in self.samples.items():
+            total = sum(values)
+            phases[name] = {
+                "count": len(values),
+                "total": round(total, 6),
+                "share": round(total / measured, 4) if measured else None,
+                "per_second": round(len(values) / total, 2) if total else None,
+                **{
+                    key: round(value, 6) if value is not None else None
+                    for key, value in percentiles(values).items()
+                },
+            }
+        return {
+            "entries": entries,
+            "duration": round(duration, 6),
+            "per_second": round(entries / duration, 2) if duration else None,
+            "phases": phases,
+        }
+
+
+@contextmanager
+def timing(timer):
+    """Use a timer for all the phases measured in this block."""
+    global _current
+    previous, _current = _current, timer
+    try:
+        yield timer
+    finally:
+        _current = previous
+
+
+@contextmanager
+def phase(name):
+    """Measure a phase with the current timer, if there is one."""
+    if _current is None:
+        yield
+    else:
+        with _current.phase(name):
+            yield
+
+
+def timed_iter(iterable, name):
+    """Measure the time spent getting each item of an iterable."""
+    iterator = iter(iterable)
+    while True:
+        with phase(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
@@ -24,6 +24,7 @@
 
 """Pages for CERN Open Data Portal."""
 
+import hmac
 import json
 
 import pkg_resources
@@ -44,6 +45,7 @@ from markupsafe import escape
 from speaklater import make_lazy_string
 from webargs.flaskparser import use_args
 
+from cernopendata.cold_storage import metrics
 from cernopendata.cold_storage.schemas import (
     TransferRequestQuerySchema,
     TransferRequestSchema,
@@ -362,6 +364,18 @@ def transfer_requests_index():
 transfer_request_schema = TransferRequestSchema(many=True)
 
 
+@blueprint.route("/transfer_requests/metrics")
+def transfer_requests_metrics():
+    """Metrics of the cold storage, in the Prometheus text format."""
+    token = current_app.config.get("COLD_METRICS_TOKEN")
+    if not token:
+        abort(404)
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization, "Bearer {}".format(token)):
+        abort(403)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @blueprint.route("/transfer_requests_content")
 @use_args(TransferRequestQuerySchema())
 def transfer_requests(args):
@@ -53,12 +53,16 @@ from cernopendata.modules.fixtures.cli import (
     update_record,
 )
 
+from .cache import ValidationCache
+from .hashing import content_hash
 from .models import (
     ReleaseHistory,
     ReleaseMetadata,
+    ReleaseRecordMetadata,
     ReleaseStatus,
     ReleaseValidationMetadata,
 )
+from .scheduler import ReleaseSnapshot, ValidationScheduler
 from .validations import VALIDATIONS
 from .validations.base import Validation
 
@@ -126,11 +130,42 @@ class ReleaseValidation:
 
         return cls(metadata)
 
-    def validate(self):
-        """Run the validation."""
+    @property
+    def state(self):
+        """Content hashes and errors of the items in the last validation."""
+        return self._metadata.state
+
+    def set_state(self, state):
+        """Keep the state of the last validation."""
+        self._metadata.state = state
+
+    def run(self, release, hashes=None, state=None):
+        """Run the validation over a release, returning the errors and the new state.
+
+        If the content hashes of the items are given, and the validator supports it,
+        only the items that changed since the previous run are validated.
+        """
         if not self.validator:
-            return []
-        return self.validator.validate(self._metadata.release)
+            return [], None
+        return self.validator.run(release, hashes, state)
+
+    def load_cache(self, release, hashes):
+        """Add to the state the cached results of the items that changed.
+
+        Returns the cache, to save the new results after the validation, or None if
+        the validation can't reuse the results of single items.
+        """
+        if not self.validator or not self.validator.incremental:
+            return None
+        cache = ValidationCache(self.name, self.validator.version(release))
+        self.set_state(cache.complete(self.state, hashes, self.validator.item_kinds()))
+        return cache
+
+    def validate(self, hashes=None):
+        """Run the validation."""
+        errors, state = self.run(self._metadata.release, hashes, self.state)
+        self.set_state(state)
+        return errors
 
     def fix(self):
         """Execute the fix for a validation."""
@@ -189,6 +224,36 @@ class Release:
         """Records of the release."""
         return self._metadata.records or []
 
+    def records_page(self, page=1, size=100):
+        """Records of a page of the release, read from their rows."""
+        return [
+            row.data
+            for row in ReleaseRecordMetadata.query.filter_by(
+                release_id=self._metadata.id
+            )
+            .order_by(ReleaseRecordMetadata.position)
+            .offset((page - 1) * size)
+            .limit(size)
+        ]
+
+    def iter_records(self, chunk_size=1000):
+        """Records of the release, in order, read from their rows in chunks."""
+        query = ReleaseRecordMetadata.query.filter_by(
+            release_id=self._metadata.id
+        ).order_by(ReleaseRecordMetadata.position)
+        for row in query.yield_per(chunk_size):
+            yield row.data
+
+    def records_by_recid(self, recids):
+        """Records of the release with one of the given recids, in order."""
+        return [
+            row.data
+            for row in ReleaseRecordMetadata.query.filter(
+                ReleaseRecordMetadata.release_id == self._metadata.id,
+                ReleaseRecordMetadata.recid.in_([str(recid) for recid in recids]),
+            ).order_by(ReleaseRecordMetadata.position)
+        ]
+
     @property
     def documents(self):
         """Documents of the release."""
@@ -381,7 +446,6 @@ class Release:
                 record["$schema"] = schema
         current.extend(new_records)
         self._metadata.records = current
-        flag_modified(self._metadata, "records")
         self.validate(current_user)
         db.session.add(self._metadata)
         db.session.commit()
@@ -421,22 +485,35 @@ class Release:
         self._metadata.num_files = 0
         self._metadata.num_file_indices = 0
         self._metadata.errors = []
+        hashes = {
+            "records": self._metadata.save_records(),
+            "documents": [content_hash(doc) for doc in self._metadata.documents or []],
+        }
 
-        for validation in self.validations:
-            if validation.enabled:
-                try:
-                    errors = validation.validate()
-                except Exception as e:
-                    current_app.logger.error(
-                        f"Validator {validation.name} crashed: {e}"
-                    )
-                    errors = [
-                        f"Validator '{validation.name}' encountered an unexpected error."
-                    ]
-                if errors:
-                    self._metadata.errors.extend(errors)
-                validation.set_status(len(errors) == 0)
-                db.session.add(validation._metadata)
+        validations = [v for v in self.validations if v.enabled]
+        release = ReleaseSnapshot.from_metadata(self._metadata)
+        caches = [validation.load_cache(release, hashes) for validation in validations]
+        scheduler = ValidationScheduler(
+            current_app.config.get("CERNOPENDATA_RELEASE_VALIDATION")
+        )
+        outcomes = scheduler.run(validations, release, hashes)
+        for validation, cache, outcome in zip(validations, caches, outcomes):
+            if isinstance(outcome, Exception):
+                current_app.logger.error(
+                    f"Validator {validation.name} crashed: {outcome}"
+                )
+                errors = [
+                    f"Validator '{validation.name}' encountered an unexpected error."
+                ]
+            else:
+                errors, state = outcome
+                validation.set_state(state)
+                if cache:
+                    cache.save(state)
+            if errors:
+                self._metadata.errors.extend(errors)
+            validation.set_status(len(errors) == 0)
+            db.session.add(validation._metadata)
 
         for i, entry in enumerate(self._metadata.records):
             if "files" in entry:
@@ -446,7 +523,6 @@ class Release:
                     else:
                         self._metadata.num_files += 1
 
-        flag_modified(self._metadata, "records")
         flag_modified(self._metadata, "errors")
         self._metadata.num_errors = len(self._metadata.errors)
         if self._metadata.num_errors == 0:
@@ -627,7 +703,7 @@ class Release:
                 records_modified += 1
 
         if records_modified:
-            flag_modified(self._metadata, "records")
+            self._metadata.save_records()
         self.validate(current_user)
 
         db.session.add(self._metadata)
@@ -653,7 +729,7 @@ class Release:
                 del record["doi"]
                 errors.append({"recid": record.get("recid"), "error": str(error)})
 
-        flag_modified(self._metadata, "records")
+        self._metadata.save_records()
 
         return errors
 
@@ -675,7 +751,7 @@ class Release:
             self.change_status(ReleaseStatus.DRAFT, current_user)
         else:
             self.validate(current_user)
-        flag_modified(self._metadata, "records")
+        self._metadata.save_records()
         flag_modified(self._metadata, "documents")
         db.session.add(self._metadata)
         db.session.commit()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Open Data Portal.
+# Copyright (C) 2024 CERN.
+#
+# CERN Open Data Portal is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# CERN Open Data Portal is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CERN Open Data Portal; if not, write to the
+# Free Software Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+# MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+
+"""Cache of the errors of the validations of the items of a release."""
+
+from datetime import datetime
+
+from invenio_db import db
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from .models import ReleaseValidationCacheMetadata
+
+
+class ValidationCache:
+    """Errors of a validation for each item, reused across runs and releases.
+
+    The results are keyed by the version of the validation, and by the kind, position
+    and content hash of the item. A change in the code or the configuration of the
+    validation changes its version, and the previous results are ignored. Since
+    several versions can be in use at the same time (the configuration can depend on
+    the release), the old results are not removed on write: `prune` deletes the ones
+    that are older than a given age.
+    """
+
+    chunk_size = 1000
+
+    def __init__(self, name, version):
+        """Create the cache of a version of a validation."""
+        self.name = name
+        self.version = version
+        self._misses = []
+
+    def complete(self, state, hashes, kinds):
+        """Add to the state the cached results of the items that changed.
+
+        The items that are not in the cache are remembered, to save their results
+        once they are validated.
+        """
+        state = dict(state or {})
+        if state.get("version") != self.version:
+            state = {"version": self.version}
+        changed = []
+        for kind in kinds:
+            previous = (state.get(kind) or {}).get("hashes") or []
+            for i, item_hash in enumerate(hashes[kind]):
+                if i >= len(previous) or previous[i] != item_hash:
+                    changed.append((kind, i, item_hash))
+        cached = self._lookup(changed)
+        self._misses = [key for key in changed if key not in cached]
+        for kind in kinds:
+            entries = [(i, h) for k, i, h in cached if k == kind]
+            if not entries:
+                continue
+            previous = state.get(kind) or {}
+            kind_hashes = list(previous.get("hashes") or [])
+            kind_hashes += [None] * (len(hashes[kind]) - len(kind_hashes))
+            kind_errors = dict(previous.get("errors") or {})
+            for i, item_hash in entries:
+                kind_hashes[i] = item_hash
+                kind_errors.pop(str(i), None)
+                if cached[(kind, i, item_hash)]:
+                    kind_errors[str(i)] = cached[(kind, i, item_hash)]
+            state[kind] = {"hashes": kind_hashes, "errors": kind_errors}
+        return state
+
+    def _lookup(self, keys):
+        cached = {}
+        for start in range(0, len(keys), self.chunk_size):
+            end = start + self.chunk_size
+            chunk = keys[start:end]
+            rows = ReleaseValidationCacheMetadata.query.filter(
+                ReleaseValidationCacheMetadata.name == self.name,
+                ReleaseValidationCacheMetadata.version == self.version,
+                tuple_(
+                    ReleaseValidationCacheMetadata.kind,
+                    ReleaseValidationCacheMetadata.position,
+                    ReleaseValidationCacheMetadata.hash,
+                ).in_(chunk),
+            )
+            for row in rows:
+                cached[(row.kind, row.position, row.hash)] = row.errors
+        return cached
+
+    def save(self, state):
+        """Save, without committing, the results of the items that were validated."""
+        if not state or state.get("version") != self.version:
+            return
+        values = []
+        now = datetime.utcnow()
+        for kind, i, item_hash in self._misses:
+            if kind not in state:
+                continue
+            values.append(
+                {
+                    "name": self.name,
+                    "version": self.version,
+                    "kind": kind,
+                    "position": i,
+                    "hash": item_hash,
+                    "errors": state[kind]["errors"].get(str(i), []),
+                    "created": now,
+                }
+            )
+        table = ReleaseValidationCacheMetadata.__table__
+        for start in range(0, len(values), self.chunk_size):
+            end = start + self.chunk_size
+            db.session.execute(
+                insert(table).values(values[start:end]).on_conflict_do_nothing()
+            )
+        self._misses = []
+
+    @staticmethod
+    def prune(max_age):
+        """Delete, without committing, the results older than a timedelta.
+
+        Returns the number of results that have been deleted.
+        """
+        before = datetime.utcnow() - max_age
+        return ReleaseValidationCacheMetadata.query.filter(
+            ReleaseValidationCacheMetadata.created < before
+        ).delete(synchronize_session=False)
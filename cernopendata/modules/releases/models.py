@@ -24,11 +24,16 @@
 
 """CERN Open Data Release models."""
 
+from datetime import datetime
 from enum import Enum
 
 from invenio_db import db
+from sqlalchemy import event
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import deferred
+from sqlalchemy.orm.attributes import flag_modified
+
+from .hashing import content_hash
 
 
 class ReleaseStatus(str, Enum):
@@ -69,6 +74,9 @@ class ReleaseValidationMetadata(db.Model):
         default=False,
     )
 
+    # Content hashes and errors of each item in the last validation.
+    state = deferred(db.Column(JSONB, nullable=True))
+
     release = db.relationship(
         "ReleaseMetadata",
         back_populates="validations",
@@ -81,6 +89,26 @@ class ReleaseValidationMetadata(db.Model):
     )
 
 
+class ReleaseValidationCacheMetadata(db.Model):
+    """Errors of a validation for an item of a release, by the content of the item.
+
+    The entries are shared by all the releases, and they are only valid for the
+    version of the validation that produced them.
+    """
+
+    __tablename__ = "releases_validation_cache"
+
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.String(16), primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    hash = db.Column(db.String(16), primary_key=True)
+    errors = db.Column(JSONB, nullable=False, default=list)
+    created = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, index=True
+    )
+
+
 class ReleaseHistory(db.Model):
     """History of a release."""
 
@@ -137,11 +165,53 @@ class ReleaseMetadata(db.Model):
     experiment = db.Column(db.String(50), nullable=False)
 
     # --- Content ---
-    json_fields = ["records", "documents", "errors"]
+    json_fields = ["documents", "errors"]
     for f in json_fields:
         default = list if f == "errors" else dict
         locals()[f] = deferred(db.Column(JSONB, nullable=False, default=default))
 
+    record_rows = db.relationship(
+        "ReleaseRecordMetadata",
+        back_populates="release",
+        order_by="ReleaseRecordMetadata.position",
+        cascade="all, delete-orphan",
+    )
+
+    _records = None
+
+    @property
+    def records(self):
+        """Content of the records of the release, in order."""
+        if self._records is None:
+            self._records = [row.data for row in self.record_rows]
+        return self._records
+
+    @records.setter
+    def records(self, records):
+        self._records = list(records or [])
+        self.save_records()
+
+    def save_records(self):
+        """Write the records that changed into their rows. Returns their hashes."""
+        records = self.records
+        rows = self.record_rows
+        hashes = []
+        for position, data in enumerate(records):
+            data_hash = content_hash(data)
+            hashes.append(data_hash)
+            if position == len(rows):
+                rows.append(ReleaseRecordMetadata(position=position))
+            row = rows[position]
+            if row.hash != data_hash:
+                row.data = data
+                row.hash = data_hash
+                recid = data.get("recid") if isinstance(data, dict) else None
+                row.recid = str(recid) if recid else None
+                flag_modified(row, "data")
+        kept = len(records)
+        del rows[kept:]
+        return hashes
+
     # --- Counters ---
     int_fields = [
         "num_records",
@@ -177,3 +247,33 @@ class ReleaseMetadata(db.Model):
         nullable=False,
         default=0,
     )
+
+
+@event.listens_for(ReleaseMetadata, "expire")
+@event.listens_for(ReleaseMetadata, "refresh")
+def _forget_records(target, *args):
+    """Read the records again from their rows once the release is expired."""
+    target.__dict__.pop("_records", None)
+
+
+class ReleaseRecordMetadata(db.Model):
+    """A record of a release.
+
+    Each record is kept in its own row, so that editing a record only writes that
+    record, and the records can be read a page at a time.
+    """
+
+    __tablename__ = "releases_records"
+
+    release_id = db.Column(
+        db.Integer,
+        db.ForeignKey("releases_metadata.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    position = db.Column(db.Integer, primary_key=True)
+    recid = db.Column(db.String(255), nullable=True, index=True)
+    data = db.Column(JSONB, nullable=False)
+    hash = db.Column(db.String(16), nullable=False)
+    """Content hash of the data, to write the record only when it changes."""
+
+    release = db.relationship("ReleaseMetadata", back_populates="record_rows")
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Open Data Portal.
+# Copyright (C) 2024 CERN.
+#
+# CERN Open Data Portal is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# CERN Open Data Portal is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CERN Open Data Portal; if not, write to the
+# Free Software Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+# MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Concurrent execution of the validations of a release."""
+
+import multiprocessing
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import ExitStack
+
+from flask import current_app, has_request_context
+
+DEFAULT_CONFIG = {"threads": 4, "processes": 2, "process_min_items": 1000}
+
+_process_pools = {}
+_process_pools_lock = threading.Lock()
+
+
+def _shared_process_pool(processes):
+    """Pool of processes of the current worker, created once and reused by all the releases."""
+    with _process_pools_lock:
+        if processes not in _process_pools:
+            _process_pools[processes] = ProcessPoolExecutor(
+                processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pools[processes]
+
+
+class ReleaseSnapshot:
+    """Content of a release that the validations can read from threads and processes."""
+
+    FIELDS = ("id", "name", "experiment", "status", "max_recid", "records", "documents")
+
+    def __init__(self, **fields):
+        """Create the snapshot from the fields of the release."""
+        self.__dict__.update(fields)
+
+    @classmethod
+    def from_metadata(cls, metadata):
+        """Copy the fields of a ReleaseMetadata."""
+        return cls(**{field: getattr(metadata, field, None) for field in cls.FIELDS})
+
+
+class ValidationScheduler:
+    """Run the validations of a release, concurrently when they are independent.
+
+    The validations that wait on the database or the storage run in threads, and the
+    CPU-bound ones run in processes if the release is large enough and the scheduler
+    runs from a celery task or the CLI. Inside a web request they run in the calling
+    thread, like the rest. A validation starts once all the validations that it depends
+    on have finished.
+    """
+
+    def __init__(self, config=None):
+        """Create the scheduler, with the configuration of the pools."""
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self._app = None
+        self._pools = None
+        self._threads = None
+
+    def run(self, validations, release, hashes=None):
+        """Run the validations.
+
+        Returns, in the same order as the validations, either the errors and the new
+        state of each validation, or the exception that it raised.
+        """
+        outcomes = [None] * len(validations)
+        names = {validation.name for validation in validations}
+        pending = dict(enumerate(validations))
+        running = {}
+        finished = set()
+        with ExitStack() as pools:
+            self._pools = pools
+            while pending or running:
+                ready = [
+                    i
+                    for i, validation in pending.items()
+                    if all(
+                        name in finished or name not in names
+                        for name in self._depends_on(validation)
+                    )
+                ]
+                if not ready and not running:
+                    for i in pending:
+                        outcomes[i] = RuntimeError(
+                            f"Circular dependency in the validation {validations[i].name}"
+                        )
+                    break
+                inline = []
+                for i in ready:
+                    validation = pending.pop(i)
+                    future = self._submit(validation, release, hashes)
+                    if future is None:
+                        inline.append(i)
+                    else:
+                        running[future] = i
+                for i in inline:
+                    validation = validations[i]
+                    try:
+                        outcomes[i] = validation.run(release, hashes, validation.state)
+                    except Exception as e:
+                        outcomes[i] = e
+                    finished.add(validation.name)
+                if inline or not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    try:
+                        outcomes[i] = future.result()
+                    except Exception as e:
+                        outcomes[i] = e
+                    finished.add(validations[i].name)
+        self._pools = self._threads = None
+        return outcomes
+
+    @staticmethod
+    def _depends_on(validation):
+        return getattr(validation.validator, "depends_on", ())
+
+    def _submit(self, validation, release, hashes):
+        """Start the validation in a pool. Returns None if it should run inline."""
+        validator = validation.validator
+        if validator is None:
+            return None
+        if validator.cpu_bound and self._use_processes(release):
+            validator.prepare(release)
+            return self._process_pool().submit(
+                validator.run, release, hashes, validation.state
+            )
+        if validator.io_bound and self.config["threads"]:
+            return self._thread_pool().submit(
+                self._run_in_app_context,
+                self._current_app(),
+                validation,
+                release,
+                hashes,
+                validation.state,
+            )
+        return None
+
+    def _use_processes(self, release):
+        if has_request_context():
+            return False
+        items = len(release.records or []) + len(release.documents or [])
+        return self.config["processes"] and items >= self.config["process_min_items"]
+
+    def _current_app(self):
+        if self._app is None:
+            self._app = current_app._get_current_object()
+        return self._app
+
+    def _thread_pool(self):
+        if self._threads is None:
+            self._threads = self._pools.enter_context(
+                ThreadPoolExecutor(self.config["threads"])
+            )
+        return self._threads
+
+    def _process_pool(self):
+        return _shared_process_pool(self.config["processes"])
+
+    @staticmethod
+    def _run_in_app_context(app, validation, release, hashes, state):
+        """Run a validation in a thread, with its own application context."""
+        with app.app_context():
+            return validation.run(release, hashes, state)
@@ -1,11 +1,14 @@
 """Celery tasks for the release curation process."""
 
+from datetime import timedelta
+
 from celery import shared_task
 from flask import current_app
 from invenio_accounts.models import User
 from invenio_db import db
 
 from .api import Release
+from .cache import ValidationCache
 
 
 @shared_task
@@ -34,3 +37,12 @@ def publish_release(experiment, release_id, user_id):
         db.session.rollback()
         release = Release.get(experiment, release_id)
         release.mark_publishing_failed(str(exc), user)
+
+
+@shared_task
+def prune_validation_cache():
+    """Delete the cached results of the validations that are too old."""
+    days = current_app.config["CERNOPENDATA_RELEASE_VALIDATION_CACHE_DAYS"]
+    deleted = ValidationCache.prune(timedelta(days=days))
+    db.session.commit()
+    current_app.logger.info("Deleted %s cached validation results", deleted)
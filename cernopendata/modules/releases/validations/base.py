@@ -23,6 +23,27 @@
 # as an Intergovernmental Organization or submit itself to any jurisdiction.
 """Top Class to validate releases."""
 
+import hashlib
+import inspect
+import json
+from functools import lru_cache
+
+ITEM_KINDS = (("records", "Record"), ("documents", "Document"))
+"""Lists of items of a release, and the label used in the error messages."""
+
+
+@lru_cache(maxsize=None)
+def _source(cls):
+    """Source code of a validation class and of the validations that it extends."""
+    sources = []
+    for klass in cls.__mro__:
+        if issubclass(klass, Validation):
+            try:
+                sources.append(inspect.getsource(klass))
+            except (OSError, TypeError):
+                sources.append(f"{klass.__module__}.{klass.__qualname__}")
+    return "\n".join(sources)
+
 
 class Validation:
     """Base validation class."""
@@ -35,6 +56,14 @@ class Validation:
     experiment = None
     optional = False
     applies_to = {"records"}
+    depends_on_other_items = False
+    """Whether the errors of an item depend on the other items of the release."""
+    depends_on = ()
+    """Names of the validations that have to finish before this one starts."""
+    io_bound = False
+    """Whether the validation waits on the database or the storage."""
+    cpu_bound = False
+    """Whether the validation is CPU-bound, and worth running in another process."""
 
     def __init_subclass__(cls, **kwargs):
         """Keep a registry of all the validations."""
@@ -42,8 +71,97 @@ class Validation:
         if cls.__name__ != "Validation" and not cls.abstract:
             Validation.registry.append(cls)
 
+    @property
+    def incremental(self):
+        """Whether the items can be validated independently, reusing unchanged results."""
+        return (
+            type(self).validate_item is not Validation.validate_item
+            and not self.depends_on_other_items
+        )
+
+    def prepare(self, release):
+        """Load what the validation needs from the application, before running it."""
+
+    def run(self, release, hashes=None, state=None):
+        """Validate a release, incrementally if possible. Returns the errors and state."""
+        if hashes is None or not self.incremental:
+            return self.validate(release), None
+        return self.validate_changes(release, hashes, state)
+
     def validate(self, release):
-        """Validate a release. The method should be implemented in the child classes."""
+        """Validate a release. The child classes implement this method or validate_item."""
+        if type(self).validate_item is Validation.validate_item:
+            raise NotImplementedError
+        errors = []
+        for kind, items in self._items(release):
+            item_errors = self.check_items(release, kind, items)
+            if not item_errors:
+                for i, item in enumerate(items):
+                    item_errors.extend(self.validate_item(release, kind, i, item))
+            errors.extend(item_errors)
+        return errors
+
+    def validate_changes(self, release, hashes, state=None):
+        """Validate only the items that changed since the previous validation.
+
+        ``hashes`` contains the content hash of each item, and ``state`` the hashes and
+        errors of the previous validation. Returns the errors and the new state.
+        """
+        version = self.version(release)
+        state = state or {}
+        if state.get("version") != version:
+            state = {}
+        errors, new_state = [], {"version": version}
+        for kind, items in self._items(release):
+            item_errors = self.check_items(release, kind, items)
+            if item_errors:
+                errors.extend(item_errors)
+                continue
+            previous = state.get(kind) or {}
+            previous_hashes = previous.get("hashes") or []
+            previous_errors = previous.get("errors") or {}
+            current_errors = {}
+            for i, item in enumerate(items):
+                if i < len(previous_hashes) and previous_hashes[i] == hashes[kind][i]:
+                    item_errors = previous_errors.get(str(i), [])
+                else:
+                    item_errors = self.validate_item(release, kind, i, item)
+                if item_errors:
+                    current_errors[str(i)] = item_errors
+                    errors.extend(item_errors)
+            new_state[kind] = {"hashes": hashes[kind], "errors": current_errors}
+        return errors, new_state
+
+    def configuration(self, release):
+        """Settings that the items are validated against, besides the code."""
+        return {"experiment": getattr(release, "experiment", None)}
+
+    def version(self, release):
+        """Identify the code and the configuration of the validation.
+
+        The results of the items are only reused while the version stays the same.
+        """
+        content = json.dumps(
+            [_source(type(self)), self.configuration(release)],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+    def item_kinds(self):
+        """Lists of items of the release that this validation applies to."""
+        return [kind for kind, _ in ITEM_KINDS if kind in self.applies_to]
+
+    def _items(self, release):
+        for kind in self.item_kinds():
+            yield kind, getattr(release, kind) or []
+
+    def check_items(self, release, kind, items):
+        """Check the list of items. The items are not validated if this fails."""
+        return []
+
+    def validate_item(self, release, kind, index, item):
+        """Validate a single item of a release, returning its errors."""
         raise NotImplementedError
 
     def fix(self, release):
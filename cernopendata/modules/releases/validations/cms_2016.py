@@ -37,6 +37,8 @@ class CMS_2016_Simulated(ExpectedFieldsValidation):
     )
     experiment = "cms"
     optional = True
+    # The relations of a record are looked up among the other records.
+    depends_on_other_items = True
 
     def get_abstract(self, release, record):
         """Getting the title."""
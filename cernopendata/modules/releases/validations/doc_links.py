@@ -16,6 +16,7 @@ class ValidDocLinks(Validation):
     name = "Valid document links"
     error_message = "Some document links do not resolve."
     applies_to = {"documents"}
+    io_bound = True
 
     def validate(self, release):
         """Check each doc link resolves: it can be a slug in the current release or a registered PID."""
@@ -13,6 +13,7 @@ class ValidDoi(Validation):
     name = "Valid DOI"
     error_message = "DOIs must use the correct prefix and have a unique suffix."
     applies_to = {"records"}
+    io_bound = True
 
     def _validate_prefix(self):
         """Return True only on the production instance, where DOI prefixes are validated."""
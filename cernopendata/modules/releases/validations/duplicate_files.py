@@ -33,6 +33,7 @@ class CheckDuplicateFiles(Validation):
 
     name = "Duplicate files"
     error_message = "Some of the files of the records are already registered"
+    io_bound = True
 
     def validate(self, release):
         """Check that URIs in this release are not already persisted in the system."""
@@ -43,43 +43,60 @@ class CheckExpandDirectories(ValidFiles):
 
     modified = False
 
-    def _walk(self, ctx, base_uri):
-        """Recursively yield all file paths under base_uri."""
-        http_uri = base_uri.replace("root://", "https://")
-        try:
-            entries = ctx.listdir(http_uri)
-        except gfal2.GError:
-            raise FileExpansionError
-
-        for entry in entries:
-            full_uri = f"{base_uri}/{entry}"
-            is_dir, size, checksum = self._get_entry_details(ctx, f"{http_uri}/{entry}")
-
-            # If it's a directory, recurse
-            if is_dir:
-                yield from self._walk(ctx, full_uri)
-            else:
-                file = {"uri": full_uri, "size": size}
-                if checksum:
-                    file["checksum"] = checksum
-                yield file
-
-    def validate(self, release):
+    @staticmethod
+    def _listdir(ctx, uri):
+        return ctx.listdir(uri)
+
+    def _walk(self, base_uri, pool=None):
+        """Yield all file paths under base_uri.
+
+        Each level of the tree is listed, and its entries are checked, concurrently.
+        """
+        if pool is None:
+            pool = self._pool()
+        directories = [base_uri]
+        while directories:
+            listings = pool.map(
+                self._listdir,
+                [uri.replace("root://", "https://") for uri in directories],
+            )
+            entries = []
+            for uri, listing in zip(directories, listings):
+                if isinstance(listing, gfal2.GError):
+                    raise FileExpansionError
+                if isinstance(listing, Exception):
+                    raise listing
+                entries.extend(f"{uri}/{entry}" for entry in listing)
+
+            details = pool.map(
+                self._get_entry_details,
+                [uri.replace("root://", "https://") for uri in entries],
+            )
+            directories = []
+            for uri, detail in zip(entries, details):
+                if isinstance(detail, Exception):
+                    raise detail
+                is_dir, size, checksum = detail
+                if is_dir:
+                    directories.append(uri)
+                else:
+                    file = {"uri": uri, "size": size}
+                    if checksum:
+                        file["checksum"] = checksum
+                    yield file
+
+    def validate_item(self, release, kind, index, record):
         """Check if there are any directories as input for a record."""
         errors = []
-        for record in release.records:
-            if "files" not in record:
-                continue
-
-            for file in record["files"]:
-                if "uri" in file and file["uri"].endswith("*"):
-                    errors.append(f"The record has a path like {file['uri']}")
+        for file in record.get("files", []):
+            if "uri" in file and file["uri"].endswith("*"):
+                errors.append(f"The record has a path like {file['uri']}")
         return errors
 
     def fix(self, release):
         """Fix the records that contain directories."""
         errors = []
-        ctx = gfal2.creat_context()
+        pool = self._pool()
 
         for record in release.records:
             if "files" not in record:
@@ -90,7 +107,7 @@ class CheckExpandDirectories(ValidFiles):
                 if "uri" in file and file["uri"].endswith("*"):
                     basedir = file["uri"][:-1]
                     try:
-                        for f in self._walk(ctx, basedir):
+                        for f in self._walk(basedir, pool):
                             new_files.append(f)
                     except FileExpansionError:
                         errors.append(
@@ -22,7 +22,7 @@
 # waive the privileges and immunities granted to it by virtue of its status
 # as an Intergovernmental Organization or submit itself to any jurisdiction.
 """Validation process."""
-from .base import Validation
+from .base import ITEM_KINDS, Validation
 
 
 class ExpectedFieldsValidation(Validation):
@@ -64,21 +64,15 @@ class ExpectedFieldsValidation(Validation):
         self.set_nested(item, field, expected_value)
         return None
 
-    def validate(self, release):
-        """Validation that all the fields have the expected values."""
+    def validate_item(self, release, kind, index, item):
+        """Validation that all the fields of an item have the expected values."""
+        label = dict(ITEM_KINDS)[kind]
         errors = []
-        for kind, label in (("records", "Record"), ("documents", "Document")):
-            if kind not in self.applies_to:
-                continue
-            items = getattr(release, kind) or []
-            for field, expected in self.expected_fields.items():
-                for i, item in enumerate(items):
-                    expected_value = self.resolve_expected_value(
-                        expected, release, item
-                    )
-                    error = self._check_field(label, i, item, field, expected_value)
-                    if error:
-                        errors.append(error)
+        for field, expected in self.expected_fields.items():
+            expected_value = self.resolve_expected_value(expected, release, item)
+            error = self._check_field(label, index, item, field, expected_value)
+            if error:
+                errors.append(error)
         return errors
 
     def fix(self, release):
@@ -5,6 +5,7 @@ import stat
 import gfal2
 
 from .base import Validation
+from .gfal_pool import GfalPool
 
 
 class ValidFiles(Validation):
@@ -21,21 +22,17 @@ class ValidFiles(Validation):
         parts = str(checksum).split(":")
         return len(parts) == 2 and all(parts)
 
-    def validate(self, release):
+    def validate_item(self, release, kind, index, record):
         """Check that the files have size and a checksum in the correct format."""
         errors = []
-        for i, record in enumerate(release.records):
-            if "files" in record:
-                for j, file in enumerate(record["files"]):
-                    file_label = f"Entry {i + 1}, file {j + 1}"
-                    if "size" not in file:
-                        errors.append(f"{file_label}: Missing size")
-                    if "checksum" not in file:
-                        errors.append(f"{file_label}: Missing checksum")
-                    elif not self._has_checksum_prefix(file["checksum"]):
-                        errors.append(
-                            f"{file_label}: Invalid checksum '{file['checksum']}'"
-                        )
+        for j, file in enumerate(record.get("files", [])):
+            file_label = f"Entry {index + 1}, file {j + 1}"
+            if "size" not in file:
+                errors.append(f"{file_label}: Missing size")
+            if "checksum" not in file:
+                errors.append(f"{file_label}: Missing checksum")
+            elif not self._has_checksum_prefix(file["checksum"]):
+                errors.append(f"{file_label}: Invalid checksum '{file['checksum']}'")
         return errors
 
     def _get_entry_details(self, ctx, url):
@@ -52,26 +49,31 @@ class ValidFiles(Validation):
 
         return False, st.st_size, checksum
 
+    def _pool(self):
+        """Pool to access the storage, shared by all the files of a fix."""
+        return GfalPool.from_config(context_factory=gfal2.creat_context)
+
     def fix(self, release):
         """Add the size and checksum to the files."""
-        ctx = gfal2.creat_context()
+        pending = [
+            file
+            for record in release.records
+            for file in record.get("files", [])
+            if not self._has_checksum_prefix(file.get("checksum", ""))
+            or "size" not in file
+        ]
+        details = self._pool().map(
+            self._get_entry_details,
+            [file["uri"].replace("root://", "https://") for file in pending],
+        )
         errors = []
-        for record in release.records:
-            if "files" not in record:
+        for file, detail in zip(pending, details):
+            if isinstance(detail, Exception):
+                errors.append(f"Errors getting the metadata of {file['uri']}: {detail}")
                 continue
-            for file in record["files"]:
-                valid_checksum = self._has_checksum_prefix(file.get("checksum", ""))
-                if valid_checksum and "size" in file:
-                    continue
-                try:
-                    _, size, checksum = self._get_entry_details(
-                        ctx, file["uri"].replace("root://", "https://")
-                    )
-                except Exception as e:
-                    errors.append(f"Errors getting the metadata of {file['uri']}: {e}")
-                    continue
-                if not valid_checksum and checksum:
-                    file["checksum"] = checksum
-                if "size" not in file:
-                    file["size"] = size
+            _, size, checksum = detail
+            if not self._has_checksum_prefix(file.get("checksum", "")) and checksum:
+                file["checksum"] = checksum
+            if "size" not in file:
+                file["size"] = size
         return errors
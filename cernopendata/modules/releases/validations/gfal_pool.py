@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Open Data Portal.
+# Copyright (C) 2024 CERN.
+#
+# CERN Open Data Portal is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# CERN Open Data Portal is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CERN Open Data Portal; if not, write to the
+# Free Software Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+# MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+
+"""Concurrent access to the storage through gfal."""
+
+import errno
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import gfal2
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "workers": 16,
+    "per_endpoint": 8,
+    "retries": 3,
+    "backoff": 1,
+    "progress_every": 1000,
+}
+
+#: Errors that will not go away by trying again
+PERMANENT_ERRORS = {
+    errno.ENOENT,
+    errno.EACCES,
+    errno.EPERM,
+    errno.ENOTDIR,
+    errno.EISDIR,
+}
+
+
+class GfalPool:
+    """Run gfal operations concurrently, with a limit of connections per endpoint.
+
+    Each thread gets its own gfal context. The operations that fail with a transient
+    error are retried, with an exponential backoff.
+    """
+
+    def __init__(self, context_factory=None, progress=None, **config):
+        """Create the pool. The configuration keys are the ones of DEFAULT_CONFIG."""
+        self.config = {**DEFAULT_CONFIG, **config}
+        self._context_factory = context_factory or gfal2.creat_context
+        self._progress = progress or self._log_progress
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    @classmethod
+    def from_config(cls, **kwargs):
+        """Create the pool with the configuration of the application, if there is one."""
+        config = {}
+        if has_app_context():
+            config = current_app.config.get("CERNOPENDATA_GFAL_POOL") or {}
+        return cls(**{**config, **kwargs})
+
+    def map(self, function, uris):
+        """Call ``function(ctx, uri)`` for each uri.
+
+        Returns the results in the same order as the uris. If an operation fails,
+        its result is the exception.
+        """
+        uris = list(uris)
+        if not uris:
+            return []
+        done = [0]
+
+        def run(uri):
+            try:
+                return self._call(function, uri)
+            except Exception as e:
+                return e
+            finally:
+                with self._lock:
+                    done[0] += 1
+                    count = done[0]
+                if count == len(uris) or count % self.config["progress_every"] == 0:
+                    self._progress(count, len(uris))
+
+        workers = min(self.config["workers"], len(uris))
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(run, uris))
+
+    def _call(self, function, uri):
+        """Call the function within the limit of the endpoint, retrying transient errors.
+
+        The endpoint is released while waiting to try again, so that the other
+        operations on it can go on.
+        """
+        endpoint = self._endpoint(uri)
+        for attempt in range(self.config["retries"] + 1):
+            with endpoint:
+                try:
+                    return function(self._context(), uri)
+                except gfal2.GError as e:
+                    if e.code in PERMANENT_ERRORS or attempt == self.config["retries"]:
+                        raise
+            time.sleep(self.config["backoff"] * 2**attempt)
+
+    def _context(self):
+        if not hasattr(self._local, "ctx"):
+            self._local.ctx = self._context_factory()
+        return self._local.ctx
+
+    def _endpoint(self, uri):
+        parts = urlsplit(uri)
+        endpoint = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if endpoint not in self._endpoints:
+                self._endpoints[endpoint] = threading.BoundedSemaphore(
+                    self.config["per_endpoint"]
+                )
+            return self._endpoints[endpoint]
+
+    @staticmethod
+    def _log_progress(done, total):
+        logger.info(f"Checked {done}/{total} entries in the storage")
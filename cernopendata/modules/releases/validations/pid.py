@@ -14,6 +14,7 @@ class PIDValidation(Validation):
     items_attr = None
     id_field = None
     pid_type = None
+    io_bound = True
 
     def validate(self, release):
         """Check that each item has a non-empty, unique, unregistered identifier."""
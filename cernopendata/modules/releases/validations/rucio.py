@@ -15,13 +15,11 @@ class RucioDatasets(Validation):
     experiment = "cms"
     optional = True
 
-    def validate(self, release):
-        """Check if there are any entries with rucio_dataset and no files."""
-        errors = []
-        for i, record in enumerate(release.records):
-            if "rucio_dataset" in record and "files" not in record:
-                errors.append(f"The record {i + 1} has a rucio rule and no files")
-        return errors
+    def validate_item(self, release, kind, index, record):
+        """Check if the entry has a rucio_dataset and no files."""
+        if "rucio_dataset" in record and "files" not in record:
+            return [f"The record {index + 1} has a rucio rule and no files"]
+        return []
 
     def _get_files_from_rucio_dataset(self, rucio_client, did):
         result = []
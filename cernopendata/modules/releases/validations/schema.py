@@ -17,9 +17,37 @@ class SchemaValidation(Validation):
     items_attr = None
     label = None
     excluded_keys = set()
+    cpu_bound = True
+
+    _schema = None
+    _schema_error = None
+
+    def item_kinds(self):
+        """The list of items validated against the schema."""
+        return [self.items_attr]
+
+    def configuration(self, release):
+        """The schema is part of the configuration."""
+        if self._schema is None and self._schema_error is None:
+            self.prepare(release)
+        return {**super().configuration(release), "schema": self._schema}
 
     def validate(self, release):
         """Validate all items against the configured JSON schema."""
+        try:
+            return super().validate(release)
+        except Exception as e:
+            return [f"Could not validate the schema: {e}"]
+
+    def validate_changes(self, release, hashes, state=None):
+        """Validate the items that changed against the configured JSON schema."""
+        try:
+            return super().validate_changes(release, hashes, state)
+        except Exception as e:
+            return [f"Could not validate the schema: {e}"], None
+
+    def prepare(self, release):
+        """Load the JSON schema."""
         schema_path = (
             current_app.extensions["invenio-jsonschemas"].get_schema_dir(
                 self.schema_file
@@ -28,31 +56,32 @@ class SchemaValidation(Validation):
         )
         try:
             with open(schema_path) as f:
-                schema = json.load(f)
+                self._schema = json.load(f)
         except (OSError, ValueError) as e:
-            return [f"Could not load validation schema '{self.schema_file}': {e}"]
+            self._schema_error = (
+                f"Could not load validation schema '{self.schema_file}': {e}"
+            )
+
+    def check_items(self, release, kind, items):
+        """Check that the schema could be loaded, and that the items are a list."""
+        if self._schema is None and self._schema_error is None:
+            self.prepare(release)
+        if self._schema_error:
+            return [self._schema_error]
 
-        items = getattr(release, self.items_attr) or []
-        if not items:
-            return []
-        if not isinstance(items, list):
+        if items and not isinstance(items, list):
             return [f"The field '{self.items_attr}' is not a list"]
+        self._validator = Draft4Validator(self._schema)
+        return []
 
+    def validate_item(self, release, kind, index, item):
+        """Validate an item against the JSON schema."""
+        if not isinstance(item, dict):
+            return [f"{self.label} {index + 1} is not an object"]
+        if self.excluded_keys:
+            item = {k: v for k, v in item.items() if k not in self.excluded_keys}
         errors = []
-        validator = Draft4Validator(schema)
-        try:
-            for i, item in enumerate(items):
-                if not isinstance(item, dict):
-                    errors.append(f"{self.label} {i + 1} is not an object")
-                    continue
-                if self.excluded_keys:
-                    item = {
-                        k: v for k, v in item.items() if k not in self.excluded_keys
-                    }
-                for error in validator.iter_errors(item):
-                    path = ".".join(str(p) for p in error.path)
-                    errors.append(f"{self.label} {i + 1} -> {path}: {error.message}")
-        except Exception as e:
-            return [f"Could not validate the schema: {e}"]
-
+        for error in self._validator.iter_errors(item):
+            path = ".".join(str(p) for p in error.path)
+            errors.append(f"{self.label} {index + 1} -> {path}: {error.message}")
         return errors
@@ -40,6 +40,7 @@ from flask import (
     redirect,
     render_template,
     request,
+    stream_with_context,
 )
 from flask_login import current_user, login_required
 from invenio_db import db
@@ -289,6 +290,40 @@ def _release_download_filename(name, release_id):
     return f"{base or f'release-{release_id}'}.json"
 
 
+def _dump_release_json(body):
+    """Yield the release as indented JSON, one item of its lists at a time."""
+    yield "{"
+    for number, (key, value) in enumerate(body.items()):
+        yield "\n  " if number == 0 else ",\n  "
+        yield f"{json.dumps(key)}: "
+        if isinstance(value, (str, dict)) or value is None:
+            yield json.dumps(value, indent=2).replace("\n", "\n  ")
+            continue
+        separator = "["
+        for item in value:
+            yield separator + "\n    "
+            yield json.dumps(item, indent=2).replace("\n", "\n    ")
+            separator = ","
+        yield "[]" if separator == "[" else "\n  ]"
+    yield "\n}"
+
+
+@blueprint.route("/releases/api/<experiment>/<int:release_id>/records")
+def release_records(experiment, release_id):
+    """Get a page of the records of a release."""
+    release = _get_release(experiment, release_id)
+    page = max(request.args.get("page", 1, type=int), 1)
+    size = min(max(request.args.get("size", 100, type=int), 1), 1000)
+    return jsonify(
+        {
+            "page": page,
+            "size": size,
+            "total": release._metadata.num_records,
+            "records": release.records_page(page, size),
+        }
+    )
+
+
 @blueprint.route("/releases/api/<experiment>/<int:release_id>")
 def release_json(experiment, release_id):
     """Get the release in json."""
@@ -298,12 +333,12 @@ def release_json(experiment, release_id):
         "name": metadata.name,
         "description": metadata.description,
         "discussion_url": metadata.discussion_url,
-        "records": metadata.records or [],
+        "records": release.iter_records(),
         "documents": metadata.documents or [],
     }
     filename = _release_download_filename(metadata.name, release_id)
     return Response(
-        json.dumps(body, indent=2),
+        stream_with_context(_dump_release_json(body)),
         mimetype="application/json",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
@@ -323,7 +358,7 @@ def generate_doi(experiment, release_id):
     return jsonify(
         {
             "status": "ok",
-            "records": release.records,
+            "records": release.records_by_recid(recids),
             "errors": errors,
         }
     )
@@ -53,7 +53,12 @@ export default function RecordsTable({
         throw new Error(json.error || "Request failed");
       }
       const data = await response.json();
-      setRecords(data.records);
+      const updated = new Map(
+        data.records.map((record) => [String(record.recid), record]),
+      );
+      setRecords(
+        records.map((record) => updated.get(String(record.recid)) || record),
+      );
       setDoiErrors(data.errors || []);
     } catch (err) {
       alert(err.message);
@@ -2,20 +2,36 @@
 """Celery tasks used by the CERN Open Data portal."""
 
 import hashlib
+import heapq
 import json
 import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
+from functools import lru_cache
 
-from celery import shared_task
+from celery import chord, shared_task
 from flask import current_app
 from invenio_db import db
-from invenio_files_rest.models import BucketTag, FileInstance, ObjectVersion
 from invenio_records.models import RecordMetadata
-from invenio_records_files.models import RecordsBuckets
 from invenio_search.engine import search
 from invenio_search.proxies import current_search_client
-from sqlalchemy import cast, or_
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from cernopendata.cold_storage.api import FileURI
+from cernopendata.cold_storage.models import (
+    DarkDirectoryMetadata,
+    EosDumpCheckpoint,
+    FileURIMetadata,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -24,64 +40,508 @@ EOS_DUMP_PATH = "/eos/workspace/c/cernod/dumps/opendata/latest"
 IGNORED_PATH = "/upload/"
 PREFIX = "root://eospublic.cern.ch/"
 BATCH_SIZE = 1000
+FINGERPRINT_CHUNK_SIZE = 1000000
+SNAPSHOT_LOOKUP_SIZE = 500
+CHECKPOINT_BATCHES = 10
+ISO_CACHE_SIZE = 100000
+# Fields of the dump that are used. The rest are dropped while parsing
+DUMP_FIELDS = ("path", "size", "adler32", "mtime", "atime")
 
 ProcessEosDumpTask = {"task": "cernopendata.tasks.process_eos_dump"}
 
 
 @shared_task
-def process_eos_dump():
-    """Process the latest EOS dump."""
+def process_eos_dump(full=False):
+    """Process the latest EOS dump.
+
+    The dump is split in shards aligned on lines, which are processed in parallel.
+    The counters of all the shards are aggregated at the end.
+
+    If CERNOPENDATA_EOS_DUMP_FINGERPRINT is defined, only the entries that are new or
+    that have been accessed since the previous dump are processed, unless `full` is set.
+    When all the entries are processed, the shards also write the fingerprint of the dump.
+
+    When all the entries are processed, the summary of the dark files per directory is rebuilt.
+    """
     logging.info("Starting processing EOS dump...")
+    dump_path = EOS_DUMP_PATH
+    fingerprint = current_app.config.get("CERNOPENDATA_EOS_DUMP_FINGERPRINT")
+    if fingerprint:
+        dump_path = _prepare_incremental_dump(EOS_DUMP_PATH, fingerprint, full)
+    snapshot = current_app.config.get("CERNOPENDATA_EOS_DUMP_SNAPSHOT")
+    if snapshot:
+        DumpSnapshot.build(snapshot)
+    workers = current_app.config.get("CERNOPENDATA_EOS_DUMP_WORKERS", 1)
+    shards = _split_dump_file(dump_path, workers)
+    fresh = _prepare_checkpoints(dump_path)
+    dark_report = dump_path == EOS_DUMP_PATH
+    if dark_report and fresh:
+        DarkReport.reset()
+    # In a full run, the shards write the fingerprint while they read the dump
+    shard_fingerprint = fingerprint if dark_report else None
+    if shard_fingerprint and fresh:
+        _remove_fingerprint_runs(shard_fingerprint)
+    if len(shards) <= 1:
+        return summarise_eos_dump(
+            [
+                _process_shard(
+                    dump_path, start, end, snapshot, dark_report, shard_fingerprint
+                )
+                for start, end in shards
+            ],
+            fingerprint,
+            dump_path,
+        )
+    logging.info(f"Processing the dump in {len(shards)} shards")
+    chord(
+        process_eos_dump_shard.s(
+            dump_path, start, end, snapshot, dark_report, shard_fingerprint
+        )
+        for start, end in shards
+    )(summarise_eos_dump.s(fingerprint, dump_path))
+
+
+@shared_task
+def process_eos_dump_shard(
+    filepath, start, end, snapshot=None, dark_report=False, fingerprint=None
+):
+    """Process the entries of the EOS dump between two offsets."""
+    return _process_shard(filepath, start, end, snapshot, dark_report, fingerprint)
+
+
+@shared_task
+def summarise_eos_dump(results, fingerprint=None, dump_path=None):
+    """Aggregate the counters of all the shards of the EOS dump.
+
+    If all the entries were processed, the fingerprint of the dump becomes the reference for the next run.
+    In a full run, it is merged from the fingerprints written by the shards.
+    """
+    summary = {"processed": 0, "skipped": 0, "failed": 0}
+    for result in results:
+        for key in summary:
+            summary[key] += result.get(key, 0)
+    logging.info(
+        f"Finished processing: Processed {summary['processed']} entries. "
+        f"Skipped {summary['skipped']} entries. "
+        f"Failed to process {summary['failed']} entries."
+    )
+    if fingerprint and dump_path and dump_path != f"{fingerprint}.delta":
+        runs = [result.get("fingerprint") for result in results]
+        if runs and all(runs) and not summary["failed"]:
+            _merge_sorted_files(runs, f"{fingerprint}.new")
+        elif not summary["failed"]:
+            # A shard was resumed, and only saw part of its entries
+            _write_fingerprint(dump_path, f"{fingerprint}.new")
+        _remove_fingerprint_runs(fingerprint)
+    if fingerprint and os.path.exists(f"{fingerprint}.new"):
+        if summary["failed"]:
+            logger.error("Some entries failed. Keeping the previous fingerprint")
+            os.remove(f"{fingerprint}.new")
+        else:
+            os.replace(f"{fingerprint}.new", fingerprint)
+            if os.path.exists(f"{fingerprint}.delta"):
+                os.remove(f"{fingerprint}.delta")
+    return summary
+
+
+def _prepare_incremental_dump(filepath, fingerprint, full=False):
+    """Write the entries that changed since the previous dump, and return the path of that file.
+
+    The entries that disappeared from the dump are removed from the dark files.
+    """
+    delta = f"{fingerprint}.delta"
+    source_mtime = os.stat(filepath).st_mtime_ns
+    if (
+        not full
+        and os.path.exists(f"{fingerprint}.new")
+        and os.path.exists(delta)
+        and os.stat(delta).st_mtime_ns == source_mtime
+    ):
+        logging.info("Resuming the processing of the changes of this dump")
+        return delta
+
+    if full or not os.path.exists(fingerprint):
+        logging.info("Processing the full dump")
+        return filepath
+    _write_fingerprint(filepath, f"{fingerprint}.new")
+
+    changed = []
+    removed = []
+    for change, entry in _diff_fingerprints(fingerprint, f"{fingerprint}.new"):
+        if change == "removed":
+            removed.append(entry[0])
+        else:
+            changed.append(int(entry[2]))
+    logging.info(
+        f"Since the previous dump, {len(changed)} entries are new or have been accessed, "
+        f"and {len(removed)} entries have been removed"
+    )
+    if removed:
+        _remove_dark_files(removed)
+
+    # The fingerprint has the offset of each entry, so there is no need to read the whole dump again
+    with open(filepath, "rb") as source, open(delta, "wb") as f:
+        for offset in sorted(changed):
+            source.seek(offset)
+            f.write(source.readline().rstrip(b"\n") + b"\n")
+    # The delta keeps the modification time of the dump, to resume it after an interruption
+    os.utime(delta, ns=(source_mtime, source_mtime))
+    return delta
+
+
+def _fingerprint_line(offset, entry):
+    return f"{_path_to_id(entry['path'])} {entry['atime']} {offset}\n"
+
+
+def _write_fingerprint(filepath, output, chunk_size=FINGERPRINT_CHUNK_SIZE):
+    """Write the sorted list of (path hash, atime, offset) of all the entries of the dump."""
+    writer = SortedLinesWriter(output, chunk_size)
+    for offset, _, entry in _read_dump_file(filepath):
+        if IGNORED_PATH not in entry["path"]:
+            writer.add(_fingerprint_line(offset, entry))
+    writer.close()
+
+
+class SortedLinesWriter:
+    """Write lines in order, without keeping all of them in memory.
+
+    The lines are sorted in chunks, which are then merged.
+    """
+
+    def __init__(self, output, chunk_size=FINGERPRINT_CHUNK_SIZE):
+        """Prepare the writer of the given file."""
+        self.output = output
+        self.chunk_size = chunk_size
+        self._chunk = []
+        self._runs = []
+
+    def add(self, line):
+        """Add a line to the file."""
+        self._chunk.append(line)
+        if len(self._chunk) >= self.chunk_size:
+            self._runs.append(
+                _write_sorted_run(self._chunk, self.output, len(self._runs))
+            )
+            self._chunk = []
+
+    def close(self):
+        """Write the file with all the lines, sorted."""
+        try:
+            self._chunk.sort()
+            with ExitStack() as stack:
+                files = [stack.enter_context(open(run)) for run in self._runs]
+                with open(self.output, "w") as f:
+                    f.writelines(heapq.merge(self._chunk, *files))
+        finally:
+            for run in self._runs:
+                os.remove(run)
+            self._runs = []
+            self._chunk = []
+
+
+def _write_sorted_run(lines, output, number):
+    run = f"{output}.{number}"
+    lines.sort()
+    with open(run, "w") as f:
+        f.writelines(lines)
+    return run
+
+
+def _merge_sorted_files(filepaths, output):
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(filepath)) for filepath in filepaths]
+        with open(output, "w") as f:
+            f.writelines(heapq.merge(*files))
+
+
+def _fingerprint_run(fingerprint, start):
+    """File with the fingerprint of the entries of the shard that starts at an offset."""
+    return f"{fingerprint}.shard-{start}"
+
+
+def _remove_fingerprint_runs(fingerprint):
+    directory, name = os.path.split(os.path.abspath(fingerprint))
+    for filename in os.listdir(directory):
+        if filename.startswith(f"{name}.shard-"):
+            os.remove(os.path.join(directory, filename))
+
+
+def _read_fingerprint(filepath):
+    with open(filepath) as f:
+        for line in f:
+            yield line.split()
+
+
+def _diff_fingerprints(old_path, new_path):
+    """Compare two sorted fingerprints, yielding ('new'|'accessed'|'removed', entry).
+
+    The entries of the new fingerprint are returned for the new and accessed paths.
+    """
+    old = _read_fingerprint(old_path)
+    new = _read_fingerprint(new_path)
+    old_entry = next(old, None)
+    new_entry = next(new, None)
+    while old_entry or new_entry:
+        if new_entry is None or (old_entry and old_entry[0] < new_entry[0]):
+            yield "removed", old_entry
+            old_entry = next(old, None)
+        elif old_entry is None or new_entry[0] < old_entry[0]:
+            yield "new", new_entry
+            new_entry = next(new, None)
+        else:
+            if old_entry[1] != new_entry[1]:
+                yield "accessed", new_entry
+            old_entry = next(old, None)
+            new_entry = next(new, None)
+
+
+def _remove_dark_files(ids):
+    """Delete the files that are no longer in the dump from the dark files index."""
+    index_prefix = current_app.config.get("SEARCH_INDEX_PREFIX")
+    dark_index = f"{index_prefix}dark-files"
+    actions = ({"_op_type": "delete", "_index": dark_index, "_id": id} for id in ids)
+    # Most of them were not dark files: the 'not found' errors are expected
+    success, _ = search.helpers.bulk(
+        current_search_client, actions, stats_only=True, raise_on_error=False
+    )
+    logger.info(f"Removed {success} files that disappeared from the dump")
+
+
+def _split_dump_file(filepath, num_shards):
+    """Split the file in byte ranges that start at the beginning of a line."""
+    size = os.path.getsize(filepath)
+    # Every shard has at least one byte, so that the offsets below are never 0
+    num_shards = min(num_shards, size)
+    if num_shards <= 1:
+        return [(0, size)]
+    boundaries = [0]
+    with open(filepath, "rb") as f:
+        for i in range(1, num_shards):
+            offset = max(size * i // num_shards, boundaries[-1])
+            # Move to the beginning of the next line (or stay if the offset already is)
+            f.seek(offset - 1)
+            f.readline()
+            boundaries.append(f.tell())
+    boundaries.append(size)
+    return [
+        (start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start
+    ]
+
+
+def _process_shard(
+    filepath, start=0, end=None, snapshot=None, dark_report=False, fingerprint=None
+):
+    """Process the entries of a shard, resuming from its checkpoint if there is one.
+
+    With `fingerprint`, it also writes the fingerprint of the entries of the shard. A resumed
+    shard does not, since it does not read all of them.
+    """
+    if end is None:
+        end = os.path.getsize(filepath)
+    checkpoint = _get_checkpoint(filepath, start, end)
+    counters = {
+        "processed": checkpoint.processed,
+        "skipped": checkpoint.skipped,
+        "failed": checkpoint.failed,
+    }
+    run = _fingerprint_run(fingerprint, start) if fingerprint else None
+    if checkpoint.finished:
+        logging.info(f"The shard {start}-{end} was already processed")
+        if run and os.path.exists(run):
+            counters["fingerprint"] = run
+        return counters
+    if checkpoint.position > start:
+        logging.info(f"Resuming the shard {start}-{end} from {checkpoint.position}")
+        run = None
+    writer = SortedLinesWriter(run, FINGERPRINT_CHUNK_SIZE) if run else None
+    checkpoint_id = checkpoint.id
     current_batch = []
     batch_count = 0
-    processed_count = 0
-    skipped_count = 0
-    failed_count = 0
+    lookup = DumpSnapshot(snapshot) if snapshot else None
+    report = DarkReport() if dark_report else None
 
-    for entry in _stream_dump_file(EOS_DUMP_PATH):
+    def _flush():
+        nonlocal batch_count
+        batch_count += 1
+        logging.info(f"- Processing batch {batch_count} of size {len(current_batch)}")
+        try:
+            dark_entries = _process_batch(current_batch, lookup)
+            if report and dark_entries:
+                report.add(dark_entries)
+            counters["processed"] += len(current_batch)
+        except Exception as e:
+            logger.error(f"Failed to process batch {batch_count}: {str(e)}")
+            counters["failed"] += len(current_batch)
+
+    for offset, position, entry in _read_dump_file(filepath, checkpoint.position, end):
         path = entry["path"]
 
         if IGNORED_PATH in path:
-            skipped_count += 1
+            counters["skipped"] += 1
             continue
 
+        if writer:
+            writer.add(_fingerprint_line(offset, entry))
         current_batch.append(entry)
 
         if len(current_batch) >= BATCH_SIZE:
-            batch_count += 1
-            try:
-                _process_batch(current_batch)
-                processed_count += len(current_batch)
-            except Exception as e:
-                logger.error(f"Failed to process batch {batch_count}: {str(e)}")
-                failed_count += len(current_batch)
+            _flush()
             current_batch = []
+            if not batch_count % CHECKPOINT_BATCHES:
+                _save_checkpoint(checkpoint_id, position, counters, report=report)
 
     if current_batch:
-        batch_count += 1
-        logging.info(f"- Processing batch {batch_count} of size {len(current_batch)}")
-        try:
-            _process_batch(current_batch)
-        except Exception as e:
-            logger.error(f"Failed to process batch {batch_count}: {str(e)}")
-
-    logging.info(
-        f"Finished processing: Processed {processed_count} entries. "
-        f"Skipped {skipped_count} entries. "
-        f"Failed to process {failed_count} entries."
+        _flush()
+    if writer:
+        writer.close()
+    _save_checkpoint(checkpoint_id, end, counters, finished=True, report=report)
+    if writer:
+        counters["fingerprint"] = run
+    if lookup:
+        lookup.close()
+    return counters
+
+
+def _dump_identity(filepath):
+    """Identify a version of the dump file by its inode, size and modification time."""
+    stat = os.stat(filepath)
+    return f"{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _prepare_checkpoints(filepath):
+    """Keep the checkpoints of an interrupted processing of this dump, and remove the rest.
+
+    If there are checkpoints of this dump and all of them are finished, the dump is processed again.
+    It returns False if a previous processing is resumed.
+    """
+    dump = _dump_identity(filepath)
+    EosDumpCheckpoint.query.filter(EosDumpCheckpoint.dump != dump).delete()
+    checkpoints = EosDumpCheckpoint.query.filter_by(dump=dump)
+    resume = checkpoints.filter(EosDumpCheckpoint.finished.is_(None)).count() > 0
+    if not resume:
+        checkpoints.delete()
+    db.session.commit()
+    return not resume
+
+
+def _get_checkpoint(filepath, start, end):
+    dump = _dump_identity(filepath)
+    checkpoint = EosDumpCheckpoint.query.filter_by(
+        dump=dump, start_offset=start
+    ).one_or_none()
+    if not checkpoint or checkpoint.end_offset != end:
+        if checkpoint:
+            db.session.delete(checkpoint)
+        checkpoint = EosDumpCheckpoint(
+            dump=dump,
+            path=filepath,
+            start_offset=start,
+            end_offset=end,
+            position=start,
+            processed=0,
+            skipped=0,
+            failed=0,
+        )
+        db.session.add(checkpoint)
+        db.session.commit()
+    return checkpoint
+
+
+def _save_checkpoint(checkpoint_id, position, counters, finished=False, report=None):
+    now = datetime.utcnow()
+    # The summary of the dark files is stored in the same transaction, so that it is consistent
+    if report:
+        report.save()
+    EosDumpCheckpoint.query.filter_by(id=checkpoint_id).update(
+        {
+            "position": position,
+            "updated": now,
+            "finished": now if finished else None,
+            **counters,
+        }
     )
+    db.session.commit()
 
 
-def _stream_dump_file(filepath):
-    with open(filepath, "r") as f:
+def get_eos_dump_progress():
+    """Summary of the progress of the processing of the EOS dump, per dump file."""
+    progress = {}
+    for checkpoint in EosDumpCheckpoint.query.order_by(
+        EosDumpCheckpoint.dump, EosDumpCheckpoint.start_offset
+    ):
+        summary = progress.setdefault(
+            checkpoint.dump,
+            {
+                "path": checkpoint.path,
+                "shards": 0,
+                "finished_shards": 0,
+                "size": 0,
+                "done": 0,
+                "processed": 0,
+                "skipped": 0,
+                "failed": 0,
+                "updated": None,
+            },
+        )
+        summary["shards"] += 1
+        summary["finished_shards"] += 1 if checkpoint.finished else 0
+        summary["size"] += checkpoint.end_offset - checkpoint.start_offset
+        summary["done"] += checkpoint.position - checkpoint.start_offset
+        for key in ("processed", "skipped", "failed"):
+            summary[key] += getattr(checkpoint, key)
+        if not summary["updated"] or checkpoint.updated > summary["updated"]:
+            summary["updated"] = checkpoint.updated
+    return progress
+
+
+def reset_eos_dump_progress():
+    """Remove all the checkpoints, so that the next run processes the dump from the beginning."""
+    deleted = EosDumpCheckpoint.query.delete()
+    db.session.commit()
+    return deleted
+
+
+def _read_dump_file(filepath, start=0, end=None):
+    """Yield the entries of the dump, with the offsets where their line and the next one start."""
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        position = start
         for line in f:
+            if end is not None and position >= end:
+                break
+            offset = position
+            position += len(line)
             try:
-                yield json.loads(line)
-            except json.JSONDecodeError:
+                entry = _loads(line)
+            except ValueError:
                 continue
+            yield offset, position, {
+                key: entry[key] for key in DUMP_FIELDS if key in entry
+            }
+
+
+def _loads(line):
+    """Decode a line of the dump, with orjson if it is installed."""
+    if orjson:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+@lru_cache(maxsize=ISO_CACHE_SIZE)
+def _to_iso(epoch):
+    """Convert a timestamp of the dump to the format of the indices.
+
+    Many files share the same timestamps, so the conversions are cached.
+    """
+    return datetime.fromtimestamp(epoch).isoformat()
 
 
-def _process_batch(dump_entries):
+def _stream_dump_file(filepath, start=0, end=None):
+    for _, _, entry in _read_dump_file(filepath, start, end):
+        yield entry
+
+
+def _process_batch(dump_entries, snapshot=None):
     index_prefix = current_app.config.get("SEARCH_INDEX_PREFIX")
     mapping_index = f"{index_prefix}records-recid_mapping"
     dark_index = f"{index_prefix}dark-files"
@@ -90,12 +550,15 @@ def _process_batch(dump_entries):
     actions = []
 
     # Compare dump entries with mapping index
-    existing_mapping_info = _get_existing_mapping_info(dump_entries, mapping_index)
+    if snapshot:
+        existing_mapping_info = snapshot.lookup(dump_entries, "mapping")
+    else:
+        existing_mapping_info = _get_existing_mapping_info(dump_entries, mapping_index)
     existing_entries_to_update = []
     for entry in dump_entries:
         path = entry.get("path")
         if path in existing_mapping_info:
-            dump_last_accessed = datetime.fromtimestamp(entry["atime"]).isoformat()
+            dump_last_accessed = _to_iso(entry["atime"])
             if existing_mapping_info[path]["last_accessed"] != dump_last_accessed:
                 existing_entries_to_update.append(entry)
         else:
@@ -107,7 +570,7 @@ def _process_batch(dump_entries):
         _update_last_accessed(existing_entries_to_update, mapping_index)
 
     if not needs_db_check:
-        return
+        return []
 
     # Query database for dump entries not found in the index
     dump_mapping = {
@@ -116,8 +579,12 @@ def _process_batch(dump_entries):
     records = _get_records_by_paths(dump_mapping.keys())
     db_mapping = {record[0]: record[1] for record in records}
 
-    existing_dark_info = _get_existing_mapping_info(needs_db_check, dark_index)
+    if snapshot:
+        existing_dark_info = snapshot.lookup(needs_db_check, "dark")
+    else:
+        existing_dark_info = _get_existing_mapping_info(needs_db_check, dark_index)
     dark_entries_to_update = []
+    dark_entries = []
     for full_uri, dump_entry in dump_mapping.items():
         path = dump_entry.get("path")
         if full_uri in db_mapping:
@@ -141,11 +608,13 @@ def _process_batch(dump_entries):
                     }
                 )
         elif path in existing_dark_info:
+            dark_entries.append(dump_entry)
             # If already in dark index, update last_accessed if it has changed
-            dump_last_accessed = datetime.fromtimestamp(dump_entry["atime"]).isoformat()
+            dump_last_accessed = _to_iso(dump_entry["atime"])
             if existing_dark_info[path]["last_accessed"] != dump_last_accessed:
                 dark_entries_to_update.append(dump_entry)
         else:
+            dark_entries.append(dump_entry)
             # If not in database and not in dark index, add it
             record = _transform_dark_file(dump_entry)
             actions.append(
@@ -166,12 +635,66 @@ def _process_batch(dump_entries):
             logger.info(f"Processed {success} items across indexes.")
 
     db.session.expunge_all()
+    return dark_entries
 
 
 def _update_last_accessed(entries, index):
-    last_accessed_mapping = {
-        entry["path"]: datetime.fromtimestamp(entry["atime"]).isoformat()
+    """Update the last access of the documents, with partial updates addressed by id.
+
+    The strategy, size of the requests, number of concurrent requests and the retries when the cluster is
+    overloaded (429) are defined in CERNOPENDATA_EOS_DUMP_UPDATES.
+    """
+    config = current_app.config.get("CERNOPENDATA_EOS_DUMP_UPDATES", {})
+    if config.get("strategy") == "update_by_query":
+        return _update_last_accessed_by_query(entries, index)
+
+    actions = [
+        {
+            "_op_type": "update",
+            "_index": index,
+            "_id": _path_to_id(entry["path"]),
+            "doc": {"last_accessed": _to_iso(entry["atime"])},
+        }
         for entry in entries
+    ]
+    chunk_size = config.get("chunk_size", 500)
+    client = current_search_client._get_current_object()
+
+    def _send(chunk):
+        return search.helpers.bulk(
+            client,
+            chunk,
+            chunk_size=chunk_size,
+            max_retries=config.get("max_retries", 3),
+            initial_backoff=config.get("initial_backoff", 2),
+            raise_on_error=False,
+        )
+
+    chunks = []
+    for start in range(0, len(actions), chunk_size):
+        end = start + chunk_size
+        chunks.append(actions[start:end])
+    concurrency = config.get("concurrency", 1)
+    if concurrency > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = executor.map(_send, chunks)
+    else:
+        results = map(_send, chunks)
+
+    updated = 0
+    errors = []
+    for success, failures in results:
+        updated += success
+        errors += failures
+    if errors:
+        logger.error(f"Failed to update {len(errors)} items: {errors[:10]}")
+    else:
+        logger.info(f"Successfully updated {updated} items.")
+
+
+def _update_last_accessed_by_query(entries, index):
+    last_accessed_mapping = {
+        entry["path"]: _to_iso(entry["atime"]) for entry in entries
     }
     body = {
         "query": {"terms": {"uri": list(last_accessed_mapping.keys())}},
@@ -190,6 +713,172 @@ def _update_last_accessed(entries, index):
         logger.info(f"Successfully updated {result.get('updated', 0)} items.")
 
 
+class DarkReport:
+    """Summary of the dark files per directory, up to CERNOPENDATA_DARK_REPORT_DEPTH levels."""
+
+    def __init__(self):
+        """Start an empty summary."""
+        self.depth = current_app.config.get("CERNOPENDATA_DARK_REPORT_DEPTH", 4)
+        self._directories = {}
+
+    def add(self, entries):
+        """Add dark files to the summary."""
+        for entry in entries:
+            directory = "/".join(entry["path"].split("/")[: self.depth + 1])
+            if directory == entry["path"]:
+                directory = os.path.dirname(directory)
+            summary = self._directories.get(directory)
+            atime = int(entry["atime"])
+            if not summary:
+                self._directories[directory] = [1, entry.get("size", 0), atime, atime]
+            else:
+                summary[0] += 1
+                summary[1] += entry.get("size", 0)
+                summary[2] = min(summary[2], atime)
+                summary[3] = max(summary[3], atime)
+
+    def save(self):
+        """Add the summary to the one in the database, without committing."""
+        if not self._directories:
+            return
+        table = DarkDirectoryMetadata.__table__
+        now = datetime.utcnow()
+        for directory, (files, size, oldest, newest) in self._directories.items():
+            # The shards update the same directories: add them atomically
+            statement = insert(table).values(
+                directory=directory,
+                files=files,
+                size=size,
+                oldest_atime=oldest,
+                newest_atime=newest,
+                updated=now,
+            )
+            db.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[table.c.directory],
+                    set_={
+                        "files": table.c.files + files,
+                        "size": table.c.size + size,
+                        "oldest_atime": func.least(table.c.oldest_atime, oldest),
+                        "newest_atime": func.greatest(table.c.newest_atime, newest),
+                        "updated": now,
+                    },
+                )
+            )
+        self._directories = {}
+
+    @staticmethod
+    def reset():
+        """Remove the summary, before processing the full dump again."""
+        DarkDirectoryMetadata.query.delete()
+        db.session.commit()
+
+    @staticmethod
+    def get(depth=None, limit=None):
+        """Return the summary, with the directories with more dark data first.
+
+        With a depth smaller than the one of the summary, the directories are aggregated further.
+        """
+        directories = {}
+        for row in DarkDirectoryMetadata.query:
+            directory = row.directory
+            if depth:
+                directory = "/".join(directory.split("/")[: depth + 1])
+            summary = directories.setdefault(
+                directory,
+                {
+                    "directory": directory,
+                    "files": 0,
+                    "size": 0,
+                    "oldest_atime": row.oldest_atime,
+                    "newest_atime": row.newest_atime,
+                    "updated": row.updated,
+                },
+            )
+            summary["files"] += row.files
+            summary["size"] += row.size
+            summary["oldest_atime"] = min(summary["oldest_atime"], row.oldest_atime)
+            summary["newest_atime"] = max(summary["newest_atime"], row.newest_atime)
+            summary["updated"] = max(summary["updated"], row.updated)
+        report = sorted(directories.values(), key=lambda d: d["size"], reverse=True)
+        for summary in report:
+            summary["oldest_access"] = _to_iso(summary.pop("oldest_atime"))
+            summary["newest_access"] = _to_iso(summary.pop("newest_atime"))
+            summary["updated"] = summary["updated"].isoformat()
+        return report[:limit] if limit else report
+
+
+class DumpSnapshot:
+    """Local copy of the paths known by the mapping and the dark files indices.
+
+    It is an SQLite file built once per run, so that the batches do not have to query the indices.
+    """
+
+    def __init__(self, filepath):
+        """Open an existing snapshot."""
+        self._connection = sqlite3.connect(f"file:{filepath}?mode=ro", uri=True)
+
+    @staticmethod
+    def build(filepath):
+        """Write the snapshot with the current content of the indices."""
+        index_prefix = current_app.config.get("SEARCH_INDEX_PREFIX")
+        indices = {
+            "mapping": f"{index_prefix}records-recid_mapping",
+            "dark": f"{index_prefix}dark-files",
+        }
+        tmp_path = f"{filepath}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        connection = sqlite3.connect(tmp_path)
+        connection.execute(
+            "CREATE TABLE known (kind TEXT, id TEXT, last_accessed TEXT, "
+            "PRIMARY KEY (kind, id)) WITHOUT ROWID"
+        )
+        for kind, index in indices.items():
+            try:
+                hits = search.helpers.scan(
+                    current_search_client,
+                    index=index,
+                    query={"_source": ["last_accessed"]},
+                    size=5000,
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO known VALUES (?, ?, ?)",
+                    (
+                        (kind, hit["_id"], hit["_source"].get("last_accessed"))
+                        for hit in hits
+                    ),
+                )
+            except search.exceptions.NotFoundError:
+                continue
+        connection.commit()
+        connection.close()
+        os.replace(tmp_path, filepath)
+        logger.info(f"Snapshot of the indices written in {filepath}")
+
+    def close(self):
+        """Close the snapshot."""
+        self._connection.close()
+
+    def lookup(self, entries, kind):
+        """Return the known entries, in the same format as `_get_existing_mapping_info`."""
+        paths = {_path_to_id(entry["path"]): entry["path"] for entry in entries}
+        ids = list(paths)
+        existing = {}
+        # Keep the number of parameters below the limit of older SQLite versions
+        for i in range(0, len(ids), SNAPSHOT_LOOKUP_SIZE):
+            end = i + SNAPSHOT_LOOKUP_SIZE
+            chunk = ids[i:end]
+            rows = self._connection.execute(
+                "SELECT id, last_accessed FROM known WHERE kind = ? AND id IN "
+                f"({','.join('?' * len(chunk))})",
+                [kind, *chunk],
+            )
+            for id, last_accessed in rows:
+                existing[paths[id]] = {"id": id, "last_accessed": last_accessed}
+        return existing
+
+
 def _get_existing_mapping_info(entries, index):
     if not entries:
         return {}
@@ -213,28 +902,16 @@ def _path_to_id(text):
 
 
 def _get_records_by_paths(paths):
+    hashes = [FileURI.hash(path) for path in paths]
     rows = (
         db.session.query(
-            FileInstance.uri,
+            FileURIMetadata.uri,
             RecordMetadata.json["title"].as_string().label("title"),
             RecordMetadata.json["recid"].as_string().label("recid"),
             RecordMetadata.json["date_published"].as_string().label("date_published"),
         )
-        .join(ObjectVersion, ObjectVersion.file_id == FileInstance.id)
-        .outerjoin(RecordsBuckets, RecordsBuckets.bucket_id == ObjectVersion.bucket_id)
-        .outerjoin(
-            BucketTag,
-            (BucketTag.bucket_id == ObjectVersion.bucket_id)
-            & (BucketTag.key == "record"),
-        )
-        .join(
-            RecordMetadata,
-            or_(
-                RecordMetadata.id == RecordsBuckets.record_id,
-                RecordMetadata.id == cast(BucketTag.value, UUID),
-            ),
-        )
-        .filter(FileInstance.uri.in_(paths))
+        .join(RecordMetadata, RecordMetadata.id == FileURIMetadata.record_uuid)
+        .filter(FileURIMetadata.uri_hash.in_(hashes))
         .all()
     )
     return [
@@ -257,7 +934,7 @@ def _transform_from_db(dump_entry, record_data):
         "title": record_data.get("title"),
         "recid": record_data.get("recid"),
         "year_published": record_data.get("date_published"),
-        "last_accessed": datetime.fromtimestamp(dump_entry["atime"]).isoformat(),
+        "last_accessed": _to_iso(dump_entry["atime"]),
     }
 
 
@@ -266,8 +943,8 @@ def _transform_dark_file(dump_entry):
         "uri": dump_entry["path"],
         "size": dump_entry["size"],
         "adler32": dump_entry.get("adler32"),
-        "last_modified": datetime.fromtimestamp(dump_entry["mtime"]).isoformat(),
-        "last_accessed": datetime.fromtimestamp(dump_entry["atime"]).isoformat(),
+        "last_modified": _to_iso(dump_entry["mtime"]),
+        "last_accessed": _to_iso(dump_entry["atime"]),
     }
 
 
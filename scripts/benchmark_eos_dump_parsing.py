@@ -0,0 +1,53 @@
+# This script measures how many lines per second of the EOS dump can be parsed
+# Run the script via cernopendata shell /code/scripts/benchmark_eos_dump_parsing.py
+# The number of lines can be changed with the environment variable BENCHMARK_LINES
+
+import json
+import os
+import random
+import tempfile
+import time
+
+from cernopendata import tasks
+
+LINES = int(os.environ.get("BENCHMARK_LINES", 1000000))
+
+with tempfile.TemporaryDirectory() as tmp:
+    dump = os.path.join(tmp, "dump")
+    print(f"Generating a synthetic dump with {LINES} lines...")
+    now = int(time.time())
+    with open(dump, "w") as f:
+        for i in range(LINES):
+            atime = now - random.randint(0, 5 * 365 * 86400)
+            entry = {
+                "path": f"/eos/opendata/cms/Run2016/dataset_{i // 1000}/file_{i}.root",
+                "adler32": f"{random.getrandbits(32):08x}",
+                "size": random.randint(1, 4 * 1024**3),
+                "mtime": atime - random.randint(0, 86400),
+                "atime": atime,
+                "ctime": atime,
+                "uid": 0,
+                "gid": 0,
+                "mode": 33188,
+                "fid": i,
+            }
+            f.write(json.dumps(entry) + "\n")
+
+    backends = [("json", None)]
+    if tasks.orjson:
+        backends.insert(0, ("orjson", tasks.orjson))
+    else:
+        print("orjson is not installed: only the json module is measured")
+    for name, backend in backends:
+        tasks.orjson = backend
+        tasks._to_iso.cache_clear()
+        start = time.monotonic()
+        count = 0
+        for entry in tasks._stream_dump_file(dump):
+            tasks._to_iso(entry["atime"])
+            tasks._to_iso(entry["mtime"])
+            count += 1
+        elapsed = time.monotonic() - start
+        print(
+            f"{name}: {count} lines in {elapsed:.2f} seconds ({count / elapsed:.0f} lines/second)"
+        )
@@ -0,0 +1,65 @@
+# This script compares the strategies to update the last access of the files found in the EOS dump
+# Run the script via cernopendata shell /code/scripts/benchmark_last_accessed.py
+# The number of documents can be changed with the environment variable BENCHMARK_DOCUMENTS
+
+import os
+import time
+
+from flask import current_app
+from invenio_search.proxies import current_search_client
+
+from cernopendata.tasks import (
+    BATCH_SIZE,
+    _path_to_id,
+    _update_last_accessed,
+    _update_last_accessed_by_query,
+)
+
+DOCUMENTS = int(os.environ.get("BENCHMARK_DOCUMENTS", 100000))
+INDEX = f"{current_app.config.get('SEARCH_INDEX_PREFIX')}benchmark-last-accessed"
+
+print(f"Creating the index {INDEX} with {DOCUMENTS} documents...")
+if current_search_client.indices.exists(index=INDEX):
+    current_search_client.indices.delete(index=INDEX)
+current_search_client.indices.create(
+    index=INDEX,
+    body={
+        "mappings": {
+            "properties": {
+                "uri": {"type": "keyword"},
+                "last_accessed": {"type": "date"},
+            }
+        }
+    },
+)
+paths = [f"/eos/opendata/benchmark/file_{i}.root" for i in range(DOCUMENTS)]
+for i in range(0, DOCUMENTS, BATCH_SIZE):
+    body = []
+    for path in paths[i : i + BATCH_SIZE]:
+        body.append({"index": {"_index": INDEX, "_id": _path_to_id(path)}})
+        body.append({"uri": path, "last_accessed": "2020-01-01T00:00:00"})
+    current_search_client.bulk(body=body)
+current_search_client.indices.refresh(index=INDEX)
+
+try:
+    for atime, (name, function) in enumerate(
+        [
+            ("update_by_query", _update_last_accessed_by_query),
+            ("bulk", _update_last_accessed),
+        ],
+        start=1,
+    ):
+        start = time.monotonic()
+        for i in range(0, DOCUMENTS, BATCH_SIZE):
+            function(
+                [{"path": path, "atime": atime} for path in paths[i : i + BATCH_SIZE]],
+                INDEX,
+            )
+        current_search_client.indices.refresh(index=INDEX)
+        elapsed = time.monotonic() - start
+        print(
+            f"{name}: {DOCUMENTS} documents in {elapsed:.2f} seconds "
+            f"({DOCUMENTS / elapsed:.0f} documents/second)"
+        )
+finally:
+    current_search_client.indices.delete(index=INDEX)
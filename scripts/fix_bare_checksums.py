@@ -9,7 +9,6 @@ from invenio_indexer.api import RecordIndexer
 from invenio_records_files.models import RecordsBuckets
 from sqlalchemy import cast
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm.attributes import flag_modified
 
 from cernopendata.api import RecordFilesWithIndex
 from cernopendata.modules.releases.models import ReleaseMetadata
@@ -93,7 +92,7 @@ for release in ReleaseMetadata.query.order_by(ReleaseMetadata.id):
     if not fixed:
         continue
     print(f" - {location}: {fixed} checksums")
-    flag_modified(release, "records")
+    release.save_records()
     db.session.add(release)
 db.session.commit()
 
@@ -0,0 +1,32 @@
+# This script moves the records of the releases from the `records` column of
+# `releases_metadata` to one row per record in `releases_records`
+# Run the script via cernopendata shell /code/scripts/migrate_release_records.py
+
+from invenio_db import db
+from sqlalchemy import inspect, text
+
+from cernopendata.modules.releases.models import (
+    ReleaseMetadata,
+    ReleaseRecordMetadata,
+)
+
+print("Starting script...")
+
+ReleaseRecordMetadata.__table__.create(db.engine, checkfirst=True)
+
+columns = {c["name"] for c in inspect(db.engine).get_columns("releases_metadata")}
+if "records" not in columns:
+    print("The records of the releases have already been moved")
+else:
+    rows = db.session.execute(text("SELECT id, records FROM releases_metadata"))
+    for release_id, records in rows.fetchall():
+        release = ReleaseMetadata.query.get(release_id)
+        if release.record_rows or not isinstance(records, list):
+            continue
+        release.records = records
+        print(f" - release {release_id} ({release.name}): {len(records)} records")
+        db.session.commit()
+    db.session.execute(text("ALTER TABLE releases_metadata DROP COLUMN records"))
+    db.session.commit()
+
+print("Script completed")
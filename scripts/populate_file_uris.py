@@ -0,0 +1,62 @@
+# This script fills the mapping between the uris of the files and their records (cold_file_uris)
+# for the records that were loaded before the mapping existed. It is safe to run it several times.
+# Run the script via cernopendata shell /code/scripts/populate_file_uris.py
+
+from invenio_db import db
+from invenio_files_rest.models import (
+    BucketTag,
+    FileInstance,
+    ObjectVersion,
+    ObjectVersionTag,
+)
+from invenio_records_files.models import RecordsBuckets
+from sqlalchemy import cast, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from cernopendata.cold_storage.api import FileURI
+from cernopendata.cold_storage.models import FileURIMetadata
+
+BATCH_SIZE = 10000
+
+print("Starting script...")
+
+record_uuid = func.coalesce(RecordsBuckets.record_id, cast(BucketTag.value, UUID))
+query = (
+    db.session.query(
+        FileInstance.uri,
+        ObjectVersionTag.value,
+        record_uuid,
+        ObjectVersion.bucket_id,
+        ObjectVersion.key,
+    )
+    .join(ObjectVersion, ObjectVersion.file_id == FileInstance.id)
+    .outerjoin(RecordsBuckets, RecordsBuckets.bucket_id == ObjectVersion.bucket_id)
+    .outerjoin(
+        BucketTag,
+        (BucketTag.bucket_id == ObjectVersion.bucket_id) & (BucketTag.key == "record"),
+    )
+    .outerjoin(
+        ObjectVersionTag,
+        (ObjectVersionTag.version_id == ObjectVersion.version_id)
+        & (ObjectVersionTag.key == "uri_cold"),
+    )
+    .filter(ObjectVersion.is_head.is_(True), record_uuid.isnot(None))
+)
+
+# Start from scratch, to avoid duplicates
+FileURIMetadata.query.delete()
+entries = []
+total = 0
+for uri, uri_cold, record, bucket_id, key in query.yield_per(BATCH_SIZE):
+    entries.append((uri, record, bucket_id, key))
+    if uri_cold:
+        entries.append((uri_cold, record, bucket_id, key))
+    if len(entries) >= BATCH_SIZE:
+        FileURI.add_many(entries)
+        total += len(entries)
+        entries = []
+FileURI.add_many(entries)
+total += len(entries)
+db.session.commit()
+
+print(f"Done! {total} uris added")
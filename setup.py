@@ -68,6 +68,8 @@ extras_require = {
         "Sphinx==7.2.6",
     ],
     "tests": tests_require,
+    # Faster parsing of the EOS dump
+    "eos": ["orjson>=3.9"],
 }
 
 extras_require["all"] = []
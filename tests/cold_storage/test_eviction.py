@@ -0,0 +1,140 @@
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+from cernopendata.cold_storage.catalog import Catalog
+from cernopendata.cold_storage.cli import cold
+from cernopendata.cold_storage.models import RequestMetadata, TransferMetadata
+from cernopendata.cold_storage.service import EvictionService
+
+from .utils import assert_list_output, run_command
+
+
+@patch(
+    "cernopendata.cold_storage.manager.Storage.verify_file", return_value=(False, None)
+)
+def test_evict_least_recently_accessed(
+    mock_verify, app, search, cli_runner, record_factory
+):
+    record = record_factory(
+        {
+            "recid": "1130",
+            "title": "Record with old and new files",
+            "file_specs": [
+                {"name": "old.txt", "content": b"Content of the old file."},
+                {"name": "new.txt", "content": b"Content of the new file."},
+            ],
+        }
+    )
+    old_path, new_path = record["hot_paths"]
+
+    # Before archiving, there is nothing that can be evicted
+    with patch("cernopendata.cold_storage.service.PREFIX", ""):
+        report = EvictionService.evict(quota=1, dry=True)
+    assert report["files"] == []
+    usage = Catalog.get_hot_usage()
+
+    run_command(cli_runner, app, cold, ["archive", record["id"], "--register"])
+    run_command(cli_runner, app, cold, ["process-transfers"])
+
+    # Only the files with a cold copy count against the quota
+    assert Catalog.get_hot_usage() - usage == 48
+
+    mapping_index = f"{app.config['SEARCH_INDEX_PREFIX']}records-recid_mapping"
+    for path, last_accessed in (
+        (old_path, "2020-01-01T00:00:00"),
+        (new_path, "2025-01-01T00:00:00"),
+    ):
+        search.index(
+            index=mapping_index,
+            body={"uri": path, "recid": "1130", "last_accessed": last_accessed},
+        )
+    search.indices.refresh()
+
+    # Freeing a single byte is enough to remove only the oldest file
+    quota = Catalog.get_hot_usage() - 1
+    with patch("cernopendata.cold_storage.service.PREFIX", ""):
+        report = EvictionService.evict(quota=quota, dry=True)
+        assert [f["uri"] for f in report["files"]] == [old_path]
+        assert os.path.exists(old_path)
+
+        report = EvictionService.evict(quota=quota)
+        assert [f["uri"] for f in report["files"]] == [old_path]
+        assert report["freed"] >= report["to_free"]
+
+    assert not os.path.exists(old_path)
+    assert os.path.exists(new_path)
+
+    result = run_command(cli_runner, app, cold, ["list", record["id"]])
+    assert_list_output(
+        result,
+        record["hot_paths"],
+        record["cold_paths"],
+        expected_hot_count=1,
+        expected_cold_count=2,
+    )
+
+
+def test_evict_without_quota(app, database):
+    with patch(
+        "cernopendata.cold_storage.service.Catalog.get_hot_usage"
+    ) as get_hot_usage:
+        report = EvictionService.evict(quota=0)
+    assert report["to_free"] == 0
+    assert report["usage"] is None
+    assert report["files"] == []
+    get_hot_usage.assert_not_called()
+
+
+@patch(
+    "cernopendata.cold_storage.manager.Storage.verify_file", return_value=(False, None)
+)
+def test_evict_keeps_staged_and_requested_files(
+    mock_verify, app, database, search, cli_runner, record_factory
+):
+    record = record_factory(
+        {
+            "recid": "1131",
+            "title": "Record with staged and requested files",
+            "file_specs": [{"name": "staged.txt", "content": b"Staged file."}],
+        }
+    )
+    (path,) = record["hot_paths"]
+    run_command(cli_runner, app, cold, ["archive", record["id"], "--register"])
+    run_command(cli_runner, app, cold, ["process-transfers"])
+    search.index(
+        index=f"{app.config['SEARCH_INDEX_PREFIX']}records-recid_mapping",
+        body={"uri": path, "recid": "1131", "last_accessed": "2019-01-01T00:00:00"},
+    )
+    search.indices.refresh()
+    file_id = Catalog.get_evictable_files([path])[path]["file_id"]
+
+    request = RequestMetadata(record_id=record["id"], status="started")
+    database.session.add(request)
+    database.session.commit()
+    with patch("cernopendata.cold_storage.service.PREFIX", ""):
+        assert EvictionService.evict(quota=1, dry=True)["files"] == []
+
+    request.status = "completed"
+    database.session.add(
+        TransferMetadata(
+            record_uuid=record["id"],
+            file_id=file_id,
+            action="stage",
+            new_filename=path,
+            method="cp",
+            method_id="1",
+            finished=datetime.now(),
+            status="DONE",
+        )
+    )
+    database.session.commit()
+    with patch("cernopendata.cold_storage.service.PREFIX", ""):
+        assert EvictionService.evict(quota=1, dry=True)["files"] == []
+
+        app.config["COLD_EVICTION_GRACE_PERIOD"] = 0
+        try:
+            report = EvictionService.evict(quota=1, dry=True)
+        finally:
+            app.config["COLD_EVICTION_GRACE_PERIOD"] = 86400
+    assert [f["uri"] for f in report["files"]] == [path]
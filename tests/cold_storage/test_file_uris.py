@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+from invenio_pidstore.models import PersistentIdentifier
+
+from cernopendata.cold_storage.api import FileURI
+from cernopendata.cold_storage.cli import cold
+from cernopendata.modules.fixtures.cli import update_record
+
+from .utils import run_command
+
+
+@patch(
+    "cernopendata.cold_storage.manager.Storage.verify_file", return_value=(False, None)
+)
+def test_file_uris(mock_verify, app, database, cli_runner, record_factory):
+    record = record_factory(
+        {
+            "recid": "1140",
+            "title": "Record with uris",
+            "file_specs": [
+                {"name": "uri_direct.txt", "content": b"Direct file."},
+                {
+                    "name": "index.json",
+                    "type": "index.json",
+                    "referenced_file_info": {
+                        "name": "uri_indexed.txt",
+                        "content": b"File in the index.",
+                    },
+                },
+            ],
+        }
+    )
+    direct_path, indexed_path = record["hot_paths"]
+    direct_cold, _ = record["cold_paths"]
+
+    # Both the direct files and the files of the index are in the mapping
+    found = dict(FileURI.get_records([direct_path, indexed_path, "/not/a/file"]))
+    assert {uri: str(uuid) for uri, uuid in found.items()} == {
+        direct_path: record["id"],
+        indexed_path: record["id"],
+    }
+
+    # The cold copies are added when the transfers finish
+    run_command(cli_runner, app, cold, ["archive", record["id"], "--register"])
+    run_command(cli_runner, app, cold, ["process-transfers"])
+    database.session.commit()
+    assert [str(uuid) for _, uuid in FileURI.get_records([direct_cold])] == [
+        record["id"]
+    ]
+
+    # Updating the record without files removes them from the mapping
+    data = {k: v for k, v in record["record_obj"].items() if not k.startswith("_")}
+    data["files"] = []
+    pid = PersistentIdentifier.get("recid", "1140")
+    update_record(pid, data, False)
+    database.session.commit()
+    assert FileURI.get_records([direct_path, indexed_path]) == []
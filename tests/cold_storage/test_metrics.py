@@ -0,0 +1,84 @@
+import uuid
+from datetime import datetime, timedelta
+
+from cernopendata.cold_storage import metrics
+from cernopendata.cold_storage.models import TransferMetadata
+
+
+def test_worker_metrics(app, monkeypatch):
+    monkeypatch.setattr(metrics, "_local_store", metrics._LocalStore())
+    metrics.observe("reindex_seconds", 0.3)
+    metrics.observe("reindex_seconds", 20)
+    metrics.inc("transfer_checks_total", 2, status="DONE")
+
+    text = metrics.render()
+    assert 'cernopendata_cold_reindex_seconds_bucket{le="0.5"} 1' in text
+    assert 'cernopendata_cold_reindex_seconds_bucket{le="+Inf"} 2' in text
+    assert "cernopendata_cold_reindex_seconds_count 2" in text
+    assert 'cernopendata_cold_transfer_checks_total{status="DONE"} 2' in text
+
+
+def test_worker_metrics_in_batch(app, monkeypatch):
+    monkeypatch.setattr(metrics, "_local_store", metrics._LocalStore())
+    metrics.observe_many("reindex_seconds", [0.3, 0.4, 20])
+    metrics.observe_many("reindex_seconds", [])
+
+    text = metrics.render()
+    assert 'cernopendata_cold_reindex_seconds_bucket{le="0.5"} 2' in text
+    assert 'cernopendata_cold_reindex_seconds_bucket{le="30"} 3' in text
+    assert "cernopendata_cold_reindex_seconds_count 3" in text
+    assert "cernopendata_cold_reindex_seconds_sum 20.7" in text
+
+
+def _add_transfer(database):
+    database.session.add(
+        TransferMetadata(
+            record_uuid=str(uuid.uuid4()),
+            file_id=str(uuid.uuid4()),
+            action="stage",
+            new_filename="file://hot/file.txt",
+            method="cernopendata.cold_storage.transfer.cp",
+            method_id="1",
+            submitted=datetime.utcnow() - timedelta(seconds=60),
+            size=10,
+        )
+    )
+    database.session.commit()
+
+
+def test_transfer_totals_are_cached(app, database, monkeypatch):
+    monkeypatch.setattr(metrics, "_totals_cache", {})
+    _add_transfer(database)
+    submitted, _ = metrics._transfer_totals()
+
+    _add_transfer(database)
+    assert metrics._transfer_totals()[0] == submitted
+
+    monkeypatch.setitem(app.config, "COLD_METRICS_CACHE_TIMEOUT", 0)
+    metrics._totals_cache["expires"] = 0
+    assert metrics._transfer_totals()[0]["stage"] == submitted["stage"] + 1
+
+
+def test_metrics_endpoint(app, database, client, monkeypatch):
+    monkeypatch.setattr(metrics, "_totals_cache", {})
+    _add_transfer(database)
+
+    assert client.get("/transfer_requests/metrics").status_code == 404
+
+    app.config["COLD_METRICS_TOKEN"] = "secret"
+    try:
+        assert client.get("/transfer_requests/metrics").status_code == 403
+        response = client.get(
+            "/transfer_requests/metrics", headers={"Authorization": "Bearer wrong"}
+        )
+        assert response.status_code == 403
+        response = client.get(
+            "/transfer_requests/metrics", headers={"Authorization": "Bearer secret"}
+        )
+    finally:
+        app.config["COLD_METRICS_TOKEN"] = None
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert "# TYPE cernopendata_cold_active_transfers gauge" in text
+    assert 'cernopendata_cold_active_transfers{action="stage"} 1' in text
+    assert 'cernopendata_cold_transfers_submitted_total{action="stage"}' in text
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from cernopendata.cold_storage.simulation import Simulation
+from cernopendata.cold_storage.transfer.simulated import TransferManager
+from cernopendata.utils import percentiles
+
+SIMULATED_TRANSFERS = {
+    "stage_latency": (600, 60),
+    "archive_latency": (600, 60),
+    "drives": 2,
+    "failure_rate": 0.0,
+    "submit_error_rate": 0.0,
+    "seed": 1,
+}
+
+
+def test_simulated_transfers_are_queued(app):
+    with patch.dict(app.config, {"COLD_SIMULATED_TRANSFERS": SIMULATED_TRANSFERS}):
+        TransferManager.reset(seed=1, now=0)
+        manager = TransferManager()
+        ids = [manager.stage("cold", "hot") for _ in range(3)]
+
+        # Only two transfers can be active at the same time
+        assert [manager.transfer_status(i)[0] for i in ids] == [
+            "ACTIVE",
+            "ACTIVE",
+            "SUBMITTED",
+        ]
+
+        TransferManager.now = 10000
+        assert [TransferManager().transfer_status(i)[0] for i in ids] == ["DONE"] * 3
+
+        # The same seed produces the same transfers
+        TransferManager.reset(seed=1, now=0)
+        assert [manager.stage("cold", "hot") for _ in range(3)] == ids
+    TransferManager.reset()
+
+
+def test_simulated_transfers_failures(app):
+    failing = {**SIMULATED_TRANSFERS, "failure_rate": 1.0}
+    with patch.dict(app.config, {"COLD_SIMULATED_TRANSFERS": failing}):
+        TransferManager.reset(seed=1, now=100000)
+        manager = TransferManager()
+        transfer_id = manager.stage("cold", "hot")
+        TransferManager.now = 200000
+        assert manager.transfer_status(transfer_id) == ("FAILED", "Simulated failure")
+        assert manager.transfer_status("not a simulated id") == (None, None)
+    TransferManager.reset()
+
+
+def test_percentiles():
+    assert percentiles([]) == {"p50": None, "p90": None, "p99": None, "max": None}
+    result = percentiles(list(range(1, 101)))
+    assert result == {"p50": 50, "p90": 90, "p99": 99, "max": 100}
+
+
+def test_percentiles_of_an_odd_number_of_values():
+    assert percentiles([5, 1, 4, 2, 3]) == {"p50": 3, "p90": 5, "p99": 5, "max": 5}
+    result = percentiles(list(range(1, 10)))
+    assert result == {"p50": 5, "p90": 9, "p99": 9, "max": 9}
+
+
+def test_simulation(app, database, search, location):
+    with patch.dict(app.config, {"COLD_SIMULATED_TRANSFERS": SIMULATED_TRANSFERS}):
+        simulation = Simulation(
+            num_records=2, files_per_record=3, cycles=20, cycle=300, seed=1
+        )
+        try:
+            simulation.setup()
+            report = simulation.run()
+        finally:
+            simulation.cleanup()
+            TransferManager.reset()
+
+    assert report["records"] == 2
+    assert report["files"] == 6
+    assert report["requests_completed"] == 2
+    assert report["transfers"] == {"DONE": 6}
+    assert report["queries"] > 0
+    assert report["time_to_online"]["max"] >= 600
+    assert report["requests_per_hour"] > 0
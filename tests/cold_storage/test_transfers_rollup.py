@@ -0,0 +1,62 @@
+import uuid
+from datetime import datetime, timedelta
+
+from cernopendata.cold_storage.api import Transfer
+from cernopendata.cold_storage.cli import cold
+from cernopendata.cold_storage.models import TransferDailySummary, TransferMetadata
+
+from .utils import run_command
+
+
+def _add_transfer(database, finished, status="DONE", size=10):
+    transfer = TransferMetadata(
+        record_uuid=str(uuid.uuid4()),
+        file_id=str(uuid.uuid4()),
+        action="stage",
+        new_filename="file://hot/file.txt",
+        method="cernopendata.cold_storage.transfer.cp",
+        method_id="1",
+        submitted=(finished or datetime.utcnow()) - timedelta(seconds=60),
+        finished=finished,
+        status=status,
+        size=size,
+    )
+    database.session.add(transfer)
+    database.session.commit()
+    return transfer.id
+
+
+def test_rollup_finished(app, database, cli_runner):
+    old = datetime(2020, 1, 1, 12, 0, 0)
+    old_ids = [
+        _add_transfer(database, old),
+        _add_transfer(database, old),
+        _add_transfer(database, old, status=None),
+    ]
+    recent_id = _add_transfer(database, datetime.utcnow())
+    ongoing_id = _add_transfer(database, None, status="SUBMITTED")
+
+    result = run_command(cli_runner, app, cold, ["rollup-transfers", "--dry"])
+    assert "3 transfers would be summarised" in result.output
+    assert TransferMetadata.query.filter(TransferMetadata.id.in_(old_ids)).count() == 3
+
+    assert Transfer.rollup_finished(datetime(2021, 1, 1), batch_size=2) == 3
+    assert TransferMetadata.query.filter(TransferMetadata.id.in_(old_ids)).count() == 0
+    assert TransferMetadata.query.get(recent_id)
+    assert TransferMetadata.query.get(ongoing_id)
+
+    done = TransferDailySummary.query.filter_by(
+        day=old.date(), action="stage", status="DONE"
+    ).one()
+    assert done.num_transfers == 2
+    assert done.size == 20
+    assert done.duration == 120
+
+    failed = TransferDailySummary.query.filter_by(
+        day=old.date(), action="stage", status="FAILED"
+    ).one()
+    assert failed.num_transfers == 1
+
+    # Running it again does not change the aggregates
+    assert Transfer.rollup_finished(datetime(2021, 1, 1)) == 0
+    assert TransferDailySummary.query.filter_by(day=old.date()).count() == 2
@@ -0,0 +1,145 @@
+import errno
+import threading
+import time
+import zlib
+
+import gfal2
+import pytest
+
+from cernopendata.modules.releases.validations.expand_files import (
+    CheckExpandDirectories,
+)
+from cernopendata.modules.releases.validations.files import ValidFiles
+from cernopendata.modules.releases.validations.gfal_pool import GfalPool
+
+
+class DummyRelease:
+    def __init__(self, records):
+        self.records = records
+
+
+@pytest.fixture
+def storage(tmp_path):
+    (tmp_path / "data" / "sub").mkdir(parents=True)
+    (tmp_path / "data" / "a.root").write_bytes(b"first file")
+    (tmp_path / "data" / "sub" / "b.root").write_bytes(b"second")
+    return tmp_path / "data"
+
+
+def test_map_keeps_the_order_and_returns_the_errors():
+    def function(ctx, uri):
+        if uri.endswith("bad"):
+            raise ValueError(uri)
+        time.sleep(0.01)
+        return uri.upper()
+
+    results = GfalPool(context_factory=object).map(
+        function, ["file:///a", "file:///bad", "file:///c"]
+    )
+    assert results[0] == "FILE:///A"
+    assert isinstance(results[1], ValueError)
+    assert results[2] == "FILE:///C"
+
+
+def test_map_limits_the_connections_per_endpoint():
+    running = {"https://one": 0, "https://two": 0}
+    peak = dict(running)
+    lock = threading.Lock()
+
+    def function(ctx, uri):
+        endpoint = uri.rsplit("/", 1)[0]
+        with lock:
+            running[endpoint] += 1
+            peak[endpoint] = max(peak[endpoint], running[endpoint])
+        time.sleep(0.02)
+        with lock:
+            running[endpoint] -= 1
+
+    uris = [f"https://one/{i}" for i in range(10)] + [
+        f"https://two/{i}" for i in range(10)
+    ]
+    GfalPool(context_factory=object, workers=10, per_endpoint=2).map(function, uris)
+    assert peak == {"https://one": 2, "https://two": 2}
+
+
+def test_map_retries_transient_errors():
+    calls = []
+    progress = []
+
+    def function(ctx, uri):
+        calls.append(uri)
+        if uri.endswith("missing"):
+            raise gfal2.GError("No such file", errno.ENOENT)
+        if len([c for c in calls if c == uri]) < 3:
+            raise gfal2.GError("Timeout", errno.ETIMEDOUT)
+        return "ok"
+
+    pool = GfalPool(
+        context_factory=object,
+        retries=3,
+        backoff=0,
+        progress=lambda done, total: progress.append((done, total)),
+        progress_every=1,
+    )
+    results = pool.map(function, ["file:///slow", "file:///missing"])
+    assert results[0] == "ok"
+    assert isinstance(results[1], gfal2.GError)
+    assert calls.count("file:///slow") == 3
+    assert calls.count("file:///missing") == 1
+    assert sorted(progress) == [(1, 2), (2, 2)]
+
+
+def test_map_releases_the_endpoint_during_the_backoff():
+    calls = {}
+
+    def function(ctx, uri):
+        calls.setdefault(uri, []).append(time.monotonic())
+        if uri.endswith("slow") and len(calls[uri]) == 1:
+            raise gfal2.GError("Timeout", errno.ETIMEDOUT)
+        return "ok"
+
+    pool = GfalPool(context_factory=object, workers=2, per_endpoint=1, backoff=0.5)
+    start = time.monotonic()
+    results = pool.map(function, ["https://one/slow", "https://one/other"])
+
+    assert results == ["ok", "ok"]
+    assert calls["https://one/other"][0] - start < 0.4
+    assert calls["https://one/slow"][1] - start >= 0.5
+
+
+def test_fix_files_with_file_uris(storage):
+    uri = f"file://{storage}/a.root"
+    release = DummyRelease([{"files": [{"uri": uri}]}])
+
+    assert ValidFiles().fix(release) == []
+
+    expected = f"adler32:{zlib.adler32(b'first file'):08x}"
+    assert release.records[0]["files"] == [
+        {"uri": uri, "size": 10, "checksum": expected}
+    ]
+
+
+def test_expand_directories_with_file_uris(storage):
+    release = DummyRelease([{"files": [{"uri": f"file://{storage}/*"}]}])
+
+    assert CheckExpandDirectories().fix(release) == []
+
+    files = release.records[0]["files"]
+    assert sorted((f["uri"].rsplit("/", 1)[1], f["size"]) for f in files) == [
+        ("a.root", 10),
+        ("b.root", 6),
+    ]
+
+
+def test_walk_creates_its_own_pool(storage, monkeypatch):
+    contexts = []
+
+    def creat_context():
+        contexts.append((threading.get_ident(), gfal2.creat_context()))
+        return contexts[-1][1]
+
+    monkeypatch.setattr(gfal2, "creat_context", creat_context)
+    files = list(CheckExpandDirectories()._walk(f"file://{storage}"))
+
+    assert sorted(f["uri"].rsplit("/", 1)[1] for f in files) == ["a.root", "b.root"]
+    assert len({thread for thread, _ in contexts}) == len(contexts)
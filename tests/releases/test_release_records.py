@@ -0,0 +1,61 @@
+from cernopendata.modules.releases.api import Release
+from cernopendata.modules.releases.models import (
+    ReleaseMetadata,
+    ReleaseRecordMetadata,
+    ReleaseStatus,
+)
+
+
+def _release(database, records):
+    metadata = ReleaseMetadata(
+        name="rows",
+        experiment="cms",
+        records=records,
+        documents=[],
+        status=ReleaseStatus.DRAFT.value,
+    )
+    database.session.add(metadata)
+    database.session.commit()
+    return metadata
+
+
+def test_records_are_stored_in_rows(database):
+    metadata = _release(database, [{"recid": 1}, {"recid": "2", "title": "b"}])
+
+    rows = ReleaseRecordMetadata.query.filter_by(release_id=metadata.id).all()
+    assert [(row.position, row.recid) for row in rows] == [(0, "1"), (1, "2")]
+    assert metadata.records == [{"recid": 1}, {"recid": "2", "title": "b"}]
+
+
+def test_save_records_only_writes_the_changed_rows(database):
+    metadata = _release(database, [{"recid": 1}, {"recid": 2}, {"recid": 3}])
+
+    metadata.records[1]["title"] = "changed"
+    metadata.save_records()
+
+    dirty = [obj for obj in database.session.dirty if obj in metadata.record_rows]
+    assert [row.position for row in dirty] == [1]
+    database.session.commit()
+
+    row = ReleaseRecordMetadata.query.filter_by(
+        release_id=metadata.id, position=1
+    ).one()
+    assert row.data == {"recid": 2, "title": "changed"}
+
+
+def test_records_can_be_removed_and_paginated(database):
+    metadata = _release(database, [{"recid": i} for i in range(5)])
+
+    metadata.records = [{"recid": i} for i in range(3)]
+    database.session.commit()
+
+    assert ReleaseRecordMetadata.query.filter_by(release_id=metadata.id).count() == 3
+    assert Release(metadata).records_page(page=2, size=2) == [{"recid": 2}]
+
+
+def test_records_are_read_in_chunks_and_by_recid(database):
+    metadata = _release(database, [{"recid": i} for i in range(5)])
+    release = Release(metadata)
+
+    assert list(release.iter_records(chunk_size=2)) == [{"recid": i} for i in range(5)]
+    assert release.records_by_recid([3, 1]) == [{"recid": 1}, {"recid": 3}]
@@ -222,7 +222,7 @@ def test_bulk_preview():
 
 def test_bulk_update(mocker):
     mock_session = mocker.patch("cernopendata.modules.releases.api.db.session")
-    mock_flag = mocker.patch("cernopendata.modules.releases.api.flag_modified")
+    mocker.patch("cernopendata.modules.releases.api.flag_modified")
 
     metadata = MagicMock()
     metadata.records = [{"a": 1}]
@@ -799,9 +799,9 @@ def test_validate_catches_validator_crash_and_records_synthetic_error(mocker):
 
     r = Release(metadata)
 
-    crashing_validation = MagicMock(enabled=True)
+    crashing_validation = MagicMock(enabled=True, validator=None)
     crashing_validation.name = "BrokenValidator"
-    crashing_validation.validate.side_effect = RuntimeError("unexpected crash")
+    crashing_validation.run.side_effect = RuntimeError("unexpected crash")
     mocker.patch.object(
         Release, "validations", new_callable=mocker.PropertyMock
     ).return_value = [crashing_validation]
@@ -819,6 +819,7 @@ def test_validate_catches_validator_crash_and_records_synthetic_error(mocker):
 def test_validate_with_errors_sets_status_draft(mocker):
     mocker.patch("cernopendata.modules.releases.api.db.session")
     mocker.patch("cernopendata.modules.releases.api.flag_modified")
+    mocker.patch("cernopendata.modules.releases.api.current_app")
 
     metadata = MagicMock()
     metadata.records = []
@@ -826,8 +827,8 @@ def test_validate_with_errors_sets_status_draft(mocker):
 
     r = Release(metadata)
 
-    failing_validation = MagicMock(enabled=True)
-    failing_validation.validate.return_value = ["bad field"]
+    failing_validation = MagicMock(enabled=True, validator=None)
+    failing_validation.run.return_value = (["bad field"], None)
     mocker.patch.object(
         Release, "validations", new_callable=mocker.PropertyMock
     ).return_value = [failing_validation]
@@ -1053,7 +1054,6 @@ def test_generate_doi_mints_missing_dois(mocker):
         "cernopendata.modules.releases.api.mint_doi", return_value="10.1234/NEW"
     )
     mocker.patch("cernopendata.modules.releases.api.validate_datacite_record")
-    mock_flag = mocker.patch("cernopendata.modules.releases.api.flag_modified")
     mock_current_app = mocker.patch("cernopendata.modules.releases.api.current_app")
     mock_current_app.config = {"PIDSTORE_DATACITE_DOI_PREFIX": "10.1234"}
 
@@ -1072,7 +1072,7 @@ def test_generate_doi_mints_missing_dois(mocker):
     assert metadata.records[1]["doi"] == "10.1234/EXISTING"
     assert "doi" not in metadata.records[2]
     mock_mint.assert_called_once_with("10.1234", "CMS")
-    mock_flag.assert_called_once_with(metadata, "records")
+    metadata.save_records.assert_called_once_with()
     assert errors == []
 
 
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from cernopendata.modules.releases.scheduler import (
+    ReleaseSnapshot,
+    ValidationScheduler,
+)
+
+
+class _Validator:
+    def __init__(self, io_bound=False, depends_on=(), cpu_bound=False):
+        self.io_bound = io_bound
+        self.cpu_bound = cpu_bound
+        self.depends_on = depends_on
+
+
+class _Validation:
+    def __init__(
+        self,
+        name,
+        log,
+        io_bound=False,
+        depends_on=(),
+        delay=0,
+        error=None,
+        cpu_bound=False,
+    ):
+        self.name = name
+        self.state = None
+        self.validator = _Validator(io_bound, depends_on, cpu_bound)
+        self.log = log
+        self.delay = delay
+        self.error = error
+
+    def run(self, release, hashes, state):
+        time.sleep(self.delay)
+        self.log.append((self.name, threading.current_thread().name))
+        if self.error:
+            raise self.error
+        return [f"{self.name} error"], None
+
+
+def _release():
+    return ReleaseSnapshot(records=[{"recid": "1"}], documents=[])
+
+
+def test_outcomes_keep_the_order_of_the_validations(app):
+    log = []
+    validations = [
+        _Validation("slow", log, io_bound=True, delay=0.2),
+        _Validation("fast", log, io_bound=True),
+        _Validation("inline", log),
+    ]
+    outcomes = ValidationScheduler().run(validations, _release())
+    assert outcomes == [
+        (["slow error"], None),
+        (["fast error"], None),
+        (["inline error"], None),
+    ]
+    assert log[-1][0] == "slow"
+
+
+def test_io_bound_validations_run_concurrently(app):
+    log = []
+    validations = [
+        _Validation(f"v{i}", log, io_bound=True, delay=0.2) for i in range(4)
+    ]
+    start = time.monotonic()
+    ValidationScheduler({"threads": 4}).run(validations, _release())
+    assert time.monotonic() - start < 0.6
+    assert all(thread != threading.current_thread().name for _, thread in log)
+
+
+def test_dependencies_finish_first(app):
+    log = []
+    validations = [
+        _Validation("second", log, depends_on=("first",)),
+        _Validation("first", log, io_bound=True, delay=0.1),
+        _Validation("other", log, depends_on=("disabled",)),
+    ]
+    ValidationScheduler().run(validations, _release())
+    names = [name for name, _ in log]
+    assert names.index("first") < names.index("second")
+    assert "other" in names
+
+
+def test_exceptions_are_returned(app):
+    error = RuntimeError("boom")
+    validations = [
+        _Validation("broken", [], io_bound=True, error=error),
+        _Validation("cycle-a", [], depends_on=("cycle-b",)),
+        _Validation("cycle-b", [], depends_on=("cycle-a",)),
+    ]
+    outcomes = ValidationScheduler().run(validations, _release())
+    assert outcomes[0] is error
+    assert isinstance(outcomes[1], RuntimeError)
+    assert isinstance(outcomes[2], RuntimeError)
+
+
+def test_cpu_bound_validations_run_inline_in_requests(app, mocker):
+    shared_pool = mocker.patch(
+        "cernopendata.modules.releases.scheduler._shared_process_pool"
+    )
+    log = []
+    validations = [_Validation("schema", log, cpu_bound=True)]
+    release = ReleaseSnapshot(records=[{"recid": "1"}] * 10, documents=[])
+    scheduler = ValidationScheduler({"processes": 2, "process_min_items": 1})
+
+    with app.test_request_context():
+        outcomes = scheduler.run(validations, release)
+
+    assert outcomes == [(["schema error"], None)]
+    assert log == [("schema", threading.current_thread().name)]
+    shared_pool.assert_not_called()
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from cernopendata.modules.releases.cache import ValidationCache
+from cernopendata.modules.releases.models import ReleaseValidationCacheMetadata
+
+HASHES = {"records": ["aaaa", "bbbb"]}
+
+
+def test_cache_reuses_the_results_of_the_same_version(database):
+    cache = ValidationCache("Valid test", "v1")
+    assert cache.complete(None, HASHES, ["records"]) == {"version": "v1"}
+
+    cache.save(
+        {
+            "version": "v1",
+            "records": {"hashes": ["aaaa", "bbbb"], "errors": {"1": ["Record 2"]}},
+        }
+    )
+    database.session.commit()
+
+    cache = ValidationCache("Valid test", "v1")
+    state = cache.complete(None, HASHES, ["records"])
+    assert state["records"] == {
+        "hashes": ["aaaa", "bbbb"],
+        "errors": {"1": ["Record 2"]},
+    }
+
+
+def test_cache_completes_the_previous_state(database):
+    cache = ValidationCache("Valid partial", "v1")
+    cache.complete(None, {"records": ["aaaa"]}, ["records"])
+    cache.save({"version": "v1", "records": {"hashes": ["aaaa"], "errors": {}}})
+    database.session.commit()
+
+    previous = {
+        "version": "v1",
+        "records": {"hashes": ["cccc", "bbbb"], "errors": {"0": ["Record 1"]}},
+    }
+    state = ValidationCache("Valid partial", "v1").complete(
+        previous, HASHES, ["records"]
+    )
+    assert state["records"] == {"hashes": ["aaaa", "bbbb"], "errors": {}}
+
+
+def test_cache_ignores_other_versions(database):
+    cache = ValidationCache("Valid versioned", "v1")
+    cache.complete(None, HASHES, ["records"])
+    cache.save(
+        {"version": "v1", "records": {"hashes": HASHES["records"], "errors": {}}}
+    )
+    database.session.commit()
+
+    previous = {"version": "v1", "records": {"hashes": HASHES["records"], "errors": {}}}
+    state = ValidationCache("Valid versioned", "v2").complete(
+        previous, HASHES, ["records"]
+    )
+    assert state == {"version": "v2"}
+
+
+def test_cache_prunes_the_old_results(database):
+    cache = ValidationCache("Valid pruned", "v1")
+    cache.complete(None, HASHES, ["records"])
+    cache.save(
+        {"version": "v1", "records": {"hashes": HASHES["records"], "errors": {}}}
+    )
+    database.session.commit()
+    query = ReleaseValidationCacheMetadata.query.filter_by(name="Valid pruned")
+    query.filter_by(hash="aaaa").update(
+        {"created": datetime.utcnow() - timedelta(days=40)}
+    )
+    database.session.commit()
+
+    assert ValidationCache.prune(timedelta(days=30)) >= 1
+    database.session.commit()
+    assert [row.hash for row in query] == ["bbbb"]
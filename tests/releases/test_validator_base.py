@@ -1,5 +1,6 @@
 import pytest
 
+from cernopendata.modules.releases.hashing import content_hash
 from cernopendata.modules.releases.validations import Validation
 
 
@@ -52,3 +53,75 @@ def test_fixable_true_when_overridden():
 
     v = FixValidation()
     assert v.fixable() is True
+
+
+class _Release:
+    def __init__(self, records):
+        self.records = records
+        self.experiment = "cms"
+
+
+class _CountingValidation(Validation):
+    def __init__(self):
+        self.validated = []
+
+    def validate_item(self, release, kind, index, item):
+        self.validated.append(index)
+        return [f"Record {index + 1}"] if item.get("bad") else []
+
+
+def _hashes(release):
+    return {"records": [content_hash(r) for r in release.records]}
+
+
+def test_validate_uses_validate_item():
+    """The default validate runs validate_item over all the items."""
+    v = _CountingValidation()
+    assert v.incremental is True
+    assert v.validate(_Release([{}, {"bad": 1}])) == ["Record 2"]
+    assert v.validated == [0, 1]
+
+
+def test_validate_changes_only_validates_changed_items():
+    """Unchanged items reuse the errors of the previous validation."""
+    v = _CountingValidation()
+    release = _Release([{"recid": 1}, {"recid": 2, "bad": 1}, {"recid": 3}])
+    errors, state = v.validate_changes(release, _hashes(release))
+    assert errors == ["Record 2"]
+    assert v.validated == [0, 1, 2]
+
+    v.validated = []
+    release.records[2]["bad"] = 1
+    errors, state = v.validate_changes(release, _hashes(release), state)
+    assert errors == ["Record 2", "Record 3"]
+    assert v.validated == [2]
+
+
+def test_validate_changes_revalidates_when_configuration_changes():
+    """The previous results are discarded if the experiment changes."""
+    v = _CountingValidation()
+    release = _Release([{"recid": 1}])
+    _, state = v.validate_changes(release, _hashes(release))
+    release.experiment = "lhcb"
+    v.validated = []
+    v.validate_changes(release, _hashes(release), state)
+    assert v.validated == [0]
+
+
+def test_cross_item_validation_is_not_incremental():
+    """Validations that depend on other items are always run in full."""
+
+    class CrossValidation(_CountingValidation):
+        depends_on_other_items = True
+
+    assert CrossValidation().incremental is False
+
+
+def test_version_changes_with_the_configuration():
+    """The version of a validation depends on its configuration."""
+    v = _CountingValidation()
+    release = _Release([])
+    version = v.version(release)
+    assert v.version(release) == version
+    release.experiment = "lhcb"
+    assert v.version(release) != version
@@ -5,6 +5,7 @@ from cernopendata.modules.releases.validations.expand_files import (
     CheckExpandDirectories,
     FileExpansionError,
 )
+from cernopendata.modules.releases.validations.gfal_pool import GfalPool
 
 
 class DummyRelease:
@@ -68,7 +69,7 @@ def test_walk_recursion(monkeypatch):
         staticmethod(fake_get_entry_details),
     )
 
-    results = list(validator._walk(DummyCtx(), "root://base"))
+    results = list(validator._walk("root://base", GfalPool(context_factory=DummyCtx)))
 
     assert len(results) == 2
     uris = [r["uri"] for r in results]
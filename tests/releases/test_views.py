@@ -603,11 +603,12 @@ def test_download_release_includes_records_and_documents(mock_get_release, clien
     metadata = MagicMock(
         description="Primary datasets",
         discussion_url="https://example.com/discussion",
-        records=records,
         documents=docs,
     )
     metadata.name = "CMS 2016 collision data"
-    mock_get_release.return_value = MagicMock(_metadata=metadata)
+    release = MagicMock(_metadata=metadata)
+    release.iter_records.return_value = iter(records)
+    mock_get_release.return_value = release
 
     resp = client.get("/releases/api/cms/1")
 
@@ -1519,7 +1520,7 @@ def test_generate_doi_endpoint_returns_records_and_errors(
 ):
     mock_release = MagicMock()
     mock_release.generate_doi.return_value = [{"recid": 1, "error": "bad field"}]
-    mock_release.records = [{"recid": 1, "doi": ""}]
+    mock_release.records_by_recid.return_value = [{"recid": 1, "doi": ""}]
     mock_get_release.return_value = mock_release
 
     response = logged_in_client.post(
@@ -1532,6 +1533,7 @@ def test_generate_doi_endpoint_returns_records_and_errors(
     assert data["records"] == [{"recid": 1, "doi": ""}]
     assert data["errors"] == [{"recid": 1, "error": "bad field"}]
     mock_release.generate_doi.assert_called_once_with([1])
+    mock_release.records_by_recid.assert_called_once_with([1])
     mock_db.session.commit.assert_called_once()
 
 
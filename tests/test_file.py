@@ -25,7 +25,7 @@
 import json
 
 import pytest
-from invenio_files_rest.models import Location
+from invenio_files_rest.models import Location, ObjectVersion, ObjectVersionTag
 from invenio_indexer.api import RecordIndexer
 from invenio_pidstore.models import PersistentIdentifier
 
@@ -112,3 +112,130 @@ def test_file(app, database, search):
     # was removing the bucket
     record = update_record(pid, data3, False)
     record.commit()
+
+
+def test_update_keeps_unchanged_files(app, database, search):
+    """Checking that an update only replaces the files that have changed"""
+    if not Location.query.filter_by(name="local").first():
+        database.session.add(Location(name="local", uri="var/data", default=True))
+
+    def _data(title, files):
+        return {
+            "$schema": app.extensions["invenio-jsonschemas"].path_to_url(
+                "records/record-v1.0.0.json"
+            ),
+            "recid": "71115",
+            "date_published": "2024",
+            "experiment": ["ALICE"],
+            "publisher": "CERN Open Data Portal",
+            "title": title,
+            "type": {"primary": "Dataset"},
+            "files": [
+                {"checksum": checksum, "size": 10, "uri": f"root://foo/{name}"}
+                for name, checksum in files
+            ],
+        }
+
+    record = create_record(
+        _data("Original", [("same", "adler32:1"), ("changed", "adler32:2")]), False
+    )
+    record.commit()
+    same = ObjectVersion.get(record.bucket, "same")
+    ObjectVersionTag.create(same, "uri_cold", "root://tape/same")
+
+    pid = PersistentIdentifier.get("recid", "71115")
+    record = update_record(
+        pid,
+        _data("Modified", [("same", "adler32:1"), ("changed", "adler32:3")]),
+        False,
+    )
+    record.commit()
+
+    objects = {o.key: o for o in ObjectVersion.get_by_bucket(record.bucket).all()}
+    assert objects["same"].version_id == same.version_id
+    assert ObjectVersionTag.get_value(objects["same"], "uri_cold") == "root://tape/same"
+    assert objects["changed"].file.checksum == "adler32:3"
+    assert sorted(f["key"] for f in record["_files"]) == ["changed", "same"]
+
+    record = update_record(pid, _data("Fewer files", [("same", "adler32:1")]), False)
+    record.commit()
+
+    assert [o.key for o in ObjectVersion.get_by_bucket(record.bucket).all()] == ["same"]
+
+
+def test_update_keeps_unchanged_index_entries(app, database, search, tmp_path):
+    """Checking that an update only replaces the entries of an index that have changed"""
+    if not Location.query.filter_by(name="local").first():
+        database.session.add(Location(name="local", uri="var/data", default=True))
+    index_path = tmp_path / "files_index.json"
+
+    def _data(title, entries):
+        content = json.dumps(
+            [
+                {"checksum": checksum, "size": 10, "uri": f"root://foo/{name}"}
+                for name, checksum in entries
+            ]
+        ).encode("utf-8")
+        index_path.write_bytes(content)
+        return {
+            "$schema": app.extensions["invenio-jsonschemas"].path_to_url(
+                "records/record-v1.0.0.json"
+            ),
+            "recid": "71116",
+            "date_published": "2024",
+            "experiment": ["ALICE"],
+            "publisher": "CERN Open Data Portal",
+            "title": title,
+            "type": {"primary": "Dataset"},
+            "files": [
+                {
+                    "checksum": f"adler32:{title}",
+                    "size": len(content),
+                    "type": "index.json",
+                    "uri": str(index_path),
+                }
+            ],
+        }
+
+    def _entries(bucket):
+        return {o.file.uri: o for o in ObjectVersion.get_by_bucket(bucket).all()}
+
+    record = create_record(
+        _data("Original", [("same", "adler32:1"), ("changed", "adler32:2")]), False
+    )
+    record.commit()
+    bucket = record["_file_indices"][0]["bucket"]
+    same = _entries(bucket)["root://foo/same"]
+    ObjectVersionTag.create(same, "uri_cold", "root://tape/same")
+
+    pid = PersistentIdentifier.get("recid", "71116")
+    record = update_record(
+        pid,
+        _data(
+            "Modified",
+            [("same", "adler32:1"), ("changed", "adler32:3"), ("new", "adler32:4")],
+        ),
+        False,
+    )
+    record.commit()
+
+    assert [index["bucket"] for index in record["_file_indices"]] == [bucket]
+    entries = _entries(bucket)
+    assert sorted(entries) == [
+        "root://foo/changed",
+        "root://foo/new",
+        "root://foo/same",
+    ]
+    assert entries["root://foo/same"].version_id == same.version_id
+    assert (
+        ObjectVersionTag.get_value(entries["root://foo/same"], "uri_cold")
+        == "root://tape/same"
+    )
+    assert entries["root://foo/changed"].file.checksum == "adler32:3"
+    assert len({o.key for o in entries.values()}) == 3
+    assert record["_file_indices"][0]["number_files"] == 3
+
+    record = update_record(pid, _data("Less", [("same", "adler32:1")]), False)
+    record.commit()
+
+    assert list(_entries(bucket)) == ["root://foo/same"]
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Open Data Portal.
+# Copyright (C) 2026 CERN.
+#
+# CERN Open Data Portal is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# CERN Open Data Portal is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CERN Open Data Portal; if not, write to the
+# Free Software Foundation, Inc., 59 Temple Place, Suite 330, Boston,
+# MA 02111-1307, USA.
+#
+# In applying this license, CERN does not
+# waive the privileges and immunities granted to it by virtue of its status
+# as an Intergovernmental Organization or submit itself to any jurisdiction.
+
+"""Tests for the loading of the record fixtures."""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_search.proxies import current_search_client
+
+from cernopendata.modules.fixtures.cli import (
+    DeferredIndexer,
+    _fixture_index,
+    _load_record_data,
+    _partition_fixture_files,
+    _process_fixture_files,
+    _refresh_disabled,
+    _validate_fixture_file,
+    create_record,
+    iter_json_entries,
+    validate,
+)
+from cernopendata.modules.fixtures.timing import PhaseTimer, phase, timing
+
+
+def _record(recid, title="Dummy record"):
+    return {
+        "recid": recid,
+        "date_published": "2026",
+        "experiment": ["CMS"],
+        "publisher": "CERN Open Data Portal",
+        "title": title,
+        "type": {"primary": "Dataset"},
+    }
+
+
+def _write_fixture(path, recids):
+    path.write_text(json.dumps([{"recid": recid} for recid in recids]))
+    return str(path)
+
+
+def test_partition_fixture_files(tmp_path):
+    """Checking that the files are distributed among the workers."""
+    files = [_write_fixture(tmp_path / f"f{i}.json", [i]) for i in range(4)]
+    partitions = _partition_fixture_files(files, 2)
+
+    assert len(partitions) == 2
+    assert sorted(sum(partitions, [])) == sorted(files)
+
+
+def test_partition_fixture_files_shared_recids(tmp_path):
+    """Checking that the files sharing a recid are loaded by the same worker."""
+    first = _write_fixture(tmp_path / "first.json", [1, 2])
+    second = _write_fixture(tmp_path / "second.json", [3])
+    third = _write_fixture(tmp_path / "third.json", [2, 4])
+    partitions = _partition_fixture_files([first, second, third], 3)
+
+    assert len(partitions) == 2
+    together = [partition for partition in partitions if first in partition][0]
+    assert third in together
+    assert second not in together
+
+
+def test_partition_fixture_files_does_not_decode_the_entries(tmp_path, monkeypatch):
+    """Checking that the files are partitioned without parsing their entries."""
+    monkeypatch.setattr(
+        "cernopendata.modules.fixtures.cli.iter_json_entries",
+        lambda *args, **kwargs: pytest.fail("The entries were decoded"),
+    )
+    first = _write_fixture(tmp_path / "first.json", ["1", 2])
+    second = _write_fixture(tmp_path / "second.json", [3])
+    third = _write_fixture(tmp_path / "third.json", ["2"])
+    partitions = _partition_fixture_files([first, second, third], 3)
+
+    assert sorted(map(sorted, partitions)) == [sorted([first, third]), [second]]
+
+
+def test_partition_fixture_files_more_workers(tmp_path):
+    """Checking that there are no empty partitions."""
+    files = [_write_fixture(tmp_path / "only.json", [1])]
+
+    assert _partition_fixture_files(files, 4) == [files]
+
+
+def test_deferred_indexer(app, database, search):
+    """Checking that the records are indexed in bulk, and the refresh restored."""
+    data = {
+        "$schema": app.extensions["invenio-jsonschemas"].path_to_url(
+            "records/record-v1.0.0.json"
+        ),
+        **_record("38001", "Deferred indexing"),
+    }
+    record = create_record(data, True)
+    record.commit()
+    database.session.commit()
+
+    deferred = DeferredIndexer(chunk_size=10)
+    deferred.add(record)
+    settings = current_search_client.indices.get_settings(
+        index="records-record-v1.0.0", name="index.refresh_interval"
+    )
+    assert [
+        value["settings"]["index"]["refresh_interval"] for value in settings.values()
+    ] == ["-1"]
+
+    assert deferred.flush() == (1, 0)
+    assert current_search_client.get(index="records-record-v1.0.0", id=str(record.id))[
+        "found"
+    ]
+    settings = current_search_client.indices.get_settings(
+        index="records-record-v1.0.0", name="index.refresh_interval"
+    )
+    assert not any(value.get("settings") for value in settings.values())
+
+
+def test_deferred_indexer_without_refresh(app, database, search):
+    """Checking that the refresh is left to the caller, as in the parallel load."""
+
+    def _refresh_interval():
+        settings = current_search_client.indices.get_settings(
+            index="records-record-v1.0.0", name="index.refresh_interval"
+        )
+        return [
+            value["settings"]["index"]["refresh_interval"]
+            for value in settings.values()
+            if value.get("settings")
+        ]
+
+    data = {
+        "$schema": app.extensions["invenio-jsonschemas"].path_to_url(
+            "records/record-v1.0.0.json"
+        ),
+        **_record("38002", "Deferred indexing in a worker"),
+    }
+    with _refresh_disabled(_fixture_index("records/record-v1.0.0.json")):
+        record = create_record(data, True)
+        record.commit()
+        database.session.commit()
+
+        deferred = DeferredIndexer(chunk_size=10, manage_refresh=False)
+        deferred.add(record)
+        assert deferred.flush() == (1, 0)
+        assert _refresh_interval() == ["-1"]
+
+    assert _refresh_interval() == []
+    assert current_search_client.get(index="records-record-v1.0.0", id=str(record.id))[
+        "found"
+    ]
+
+
+def test_batch_with_broken_record(app, database, search, tmp_path):
+    """Checking that a broken record does not affect the rest of its batch."""
+
+    def _create(data, skip_files, logger=None):
+        record = create_record(data, skip_files, logger)
+        if data["recid"] == "38012":
+            raise ValueError("Broken record")
+        return record
+
+    filename = tmp_path / "records.json"
+    filename.write_text(
+        json.dumps([_record(recid) for recid in ("38011", "38012", "38013")])
+    )
+    statistics = _process_fixture_files(
+        [str(filename)],
+        "record",
+        "records/record-v1.0.0.json",
+        skip_files=True,
+        mode="insert-or-replace",
+        load_entry_data=_load_record_data,
+        pid_field="recid",
+        create_function=_create,
+        batch_size=10,
+    )
+
+    assert statistics["inserted"] == 2
+    assert statistics["error"] == 1
+    assert len(statistics["batch_seconds"]) == 1
+    assert PersistentIdentifier.query.filter_by(
+        pid_type="recid", pid_value="38013"
+    ).count()
+    assert not PersistentIdentifier.query.filter_by(
+        pid_type="recid", pid_value="38012"
+    ).count()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_iter_json_entries(tmp_path, chunk_size):
+    """Checking that the fixture files can be read in chunks."""
+    entries = [{"recid": str(i), "title": "x" * i, "size": [1.5, i]} for i in range(20)]
+    filename = tmp_path / "records.json"
+    filename.write_text(json.dumps(entries, indent=2))
+
+    assert list(iter_json_entries(str(filename), chunk_size)) == entries
+
+
+def test_iter_json_entries_ndjson(tmp_path):
+    """Checking that the fixture files can be newline-delimited JSON."""
+    entries = [{"recid": str(i)} for i in range(5)]
+    filename = tmp_path / "records.ndjson"
+    filename.write_text("\n".join(json.dumps(entry) for entry in entries) + "\n")
+
+    assert list(iter_json_entries(str(filename))) == entries
+
+
+def test_iter_json_entries_truncated(tmp_path):
+    """Checking that a truncated fixture file is reported."""
+    filename = tmp_path / "records.json"
+    filename.write_text('[{"recid": "1"}, {"recid": ')
+
+    with pytest.raises(ValueError):
+        list(iter_json_entries(str(filename), 4))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_iter_json_entries_malformed(tmp_path, chunk_size):
+    """Checking that a malformed entry stops the reading of the fixture file."""
+    filename = tmp_path / "records.json"
+    tail = ", ".join(json.dumps({"recid": str(i)}) for i in range(1000))
+    filename.write_text(f'[{{"recid": "1"}}, {{"recid": tru}}, {tail}]')
+
+    entries = iter_json_entries(str(filename), chunk_size)
+    assert next(entries) == {"recid": "1"}
+    with pytest.raises(ValueError, match="Invalid JSON array"):
+        next(entries)
+
+
+def test_skip_unchanged_records(app, database, search, tmp_path):
+    """Checking that the records that have not changed are not updated."""
+    filename = tmp_path / "records.json"
+
+    def _load(title):
+        filename.write_text(json.dumps([_record("38021", title)]))
+        return _process_fixture_files(
+            [str(filename)],
+            "record",
+            "records/record-v1.0.0.json",
+            skip_files=True,
+            mode="insert-or-replace",
+            load_entry_data=_load_record_data,
+            pid_field="recid",
+            skip_unchanged=True,
+        )
+
+    assert _load("First title")["inserted"] == 1
+    assert _load("First title")["skipped"] == 1
+    assert _load("Second title")["updated"] == 1
+    assert _load("Second title")["skipped"] == 1
+
+
+def test_phase_timer():
+    """Checking that the nested phases are not counted twice."""
+
+    class _Dummy:
+        def work(self):
+            with phase("pid"):
+                return 1
+
+    original = _Dummy.work
+    timer = PhaseTimer()
+    with timing(timer), timer.instrument(_Dummy, "work", "record"):
+        assert _Dummy().work() == 1
+    assert _Dummy.work is original
+    assert [len(timer.samples[name]) for name in ("record", "pid")] == [1, 1]
+
+    report = timer.report(1)
+    assert report["entries"] == 1
+    assert report["phases"]["pid"]["count"] == 1
+    assert set(report["phases"]["pid"]) >= {"total", "p50", "p90", "p99", "per_second"}
+
+
+def test_phase_timer_merge():
+    """Checking that the samples of the workers are merged and shared out."""
+    timer = PhaseTimer()
+    timer.samples["parse"] = [1.0, 2.0, 3.0]
+    timer.merge({"parse": [4.0, 5.0], "record": [2.0, 4.0, 6.0, 8.0, 10.0]})
+
+    phases = timer.report(10)["phases"]
+    assert phases["parse"]["count"] == 5
+    assert phases["parse"]["total"] == 15.0
+    assert (phases["parse"]["p50"], phases["parse"]["p90"]) == (3.0, 5.0)
+    assert (phases["record"]["p50"], phases["record"]["p90"]) == (6.0, 10.0)
+    assert phases["parse"]["share"] == 0.3333
+    assert phases["record"]["share"] == 0.6667
+    assert sum(phase["share"] or 0 for phase in phases.values()) <= 1.0001
+
+
+def test_timing_report(app, database, search, tmp_path):
+    """Checking that the loading of the records reports the time of each phase."""
+    filename = tmp_path / "records.json"
+    filename.write_text(json.dumps([_record("38031", "Timing")]))
+    timer = PhaseTimer()
+    statistics = _process_fixture_files(
+        [str(filename)],
+        "record",
+        "records/record-v1.0.0.json",
+        skip_files=True,
+        mode="insert-or-replace",
+        load_entry_data=_load_record_data,
+        pid_field="recid",
+        timer=timer,
+    )
+
+    assert statistics["inserted"] == 1
+    phases = timer.report(1)["phases"]
+    for name in ("parse", "validation", "pid", "record", "commit", "indexing"):
+        assert phases[name]["count"] >= 1, name
+
+
+def test_validate_fixture_file(tmp_path):
+    """Checking that the errors are grouped by path."""
+    broken = _record("38042")
+    broken["experiment"] = "CMS"
+    missing = _record("38043")
+    del missing["title"]
+    filename = tmp_path / "records.json"
+    filename.write_text(json.dumps([_record("38041"), broken, missing]))
+
+    result = _validate_fixture_file(str(filename), "record")
+
+    assert result["entries"] == 3
+    assert list(result["errors"]) == ["/", "/experiment"]
+    assert [error["pid"] for error in result["errors"]["/experiment"]] == ["38042"]
+    assert [error["pid"] for error in result["errors"]["/"]] == ["38043"]
+
+
+def test_validate_command(tmp_path):
+    """Checking that the validation reports the errors of all the files."""
+    valid = tmp_path / "valid.json"
+    valid.write_text(json.dumps([_record("38051")]))
+    invalid = tmp_path / "invalid.ndjson"
+    invalid.write_text(json.dumps({"recid": "38052"}) + "\n")
+
+    runner = CliRunner()
+    result = runner.invoke(validate, ["-f", str(valid), "--workers", "1", "--json"])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)[str(valid)]["errors"] == {}
+
+    result = runner.invoke(
+        validate, ["-f", str(valid), "-f", str(invalid), "--workers", "2", "--json"]
+    )
+    assert result.exit_code == 1
+    report = json.loads(result.stdout)
+    assert report[str(invalid)]["entries"] == 1
+    assert len(report[str(invalid)]["errors"]["/"]) == 5
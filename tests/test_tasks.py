@@ -1,4 +1,5 @@
 import json
+import os
 from datetime import datetime
 from unittest.mock import patch
 
@@ -6,17 +7,25 @@ import pytest
 from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
 
+from cernopendata.cold_storage.cli import cold
 from cernopendata.modules.fixtures.cli import create_record, update_record
 from cernopendata.tasks import (
     BATCH_SIZE,
     IGNORED_PATH,
     PREFIX,
+    DumpSnapshot,
     _get_existing_mapping_info,
     _path_to_id,
     _process_batch,
+    _process_shard,
+    _split_dump_file,
     _stream_dump_file,
+    _to_iso,
     _update_last_accessed,
+    _update_last_accessed_by_query,
+    _write_fingerprint,
     process_eos_dump,
+    summarise_eos_dump,
 )
 
 
@@ -44,7 +53,7 @@ def mock_eos_dump(tmp_path):
 
 
 @pytest.fixture(scope="module", autouse=True)
-def task_indices(app, search):
+def task_indices(app, search, database):
     mapping_index = f"{app.config['SEARCH_INDEX_PREFIX']}records-recid_mapping"
     dark_index = f"{app.config['SEARCH_INDEX_PREFIX']}dark-files"
 
@@ -181,7 +190,7 @@ def test_process_eos_dump_skips_upload_paths(tmp_path):
     with patch("cernopendata.tasks.EOS_DUMP_PATH", str(dump_file)):
         with patch(
             "cernopendata.tasks._process_batch",
-            side_effect=lambda args: processed.extend(args),
+            side_effect=lambda args, snapshot=None: processed.extend(args),
         ):
             process_eos_dump()
 
@@ -203,7 +212,7 @@ def test_process_eos_dump_batch_size(tmp_path):
     with patch("cernopendata.tasks.EOS_DUMP_PATH", str(dump_file)):
         with patch(
             "cernopendata.tasks._process_batch",
-            side_effect=lambda args: batch_calls.append(len(args)),
+            side_effect=lambda args, snapshot=None: batch_calls.append(len(args)),
         ):
             process_eos_dump()
 
@@ -287,9 +296,31 @@ def test_update_last_accessed_failure(app):
         return_value=failed_result,
     ):
         # Verify that error will be logged if failure when updating last access dates
+        with patch("cernopendata.tasks.logger") as mock_logger:
+            _update_last_accessed_by_query(entries, mapping_index)
+            assert mock_logger.error.called
+
+
+def test_update_last_accessed_bulk_failure(app):
+    mapping_index = f"{app.config['SEARCH_INDEX_PREFIX']}records-recid_mapping"
+    entries = [{"path": "/eos/opendata/file.root", "atime": 0}]
+    with patch(
+        "cernopendata.tasks.search.helpers.bulk",
+        return_value=(0, [{"update": {"status": 429}}]),
+    ) as mock_bulk:
+        # Verify that error will be logged if the partial updates fail
         with patch("cernopendata.tasks.logger") as mock_logger:
             _update_last_accessed(entries, mapping_index)
             assert mock_logger.error.called
+    actions = mock_bulk.call_args[0][1]
+    assert actions == [
+        {
+            "_op_type": "update",
+            "_index": mapping_index,
+            "_id": _path_to_id("/eos/opendata/file.root"),
+            "doc": {"last_accessed": datetime.fromtimestamp(0).isoformat()},
+        }
+    ]
 
 
 def test_process_eos_dump_dark_file_last_accessed_update(app, search, tmp_path):
@@ -345,3 +376,272 @@ def test_get_existing_mapping_info_search_exception(mock_eos_dump):
             with patch("cernopendata.tasks.logger") as mock_logger:
                 process_eos_dump()
                 assert mock_logger.error.called
+
+
+def test_split_dump_file_shards(tmp_path):
+    entries = [
+        {"path": f"/eos/opendata/file_{i}.root", "size": 1, "mtime": 0, "atime": 0}
+        for i in range(2 * BATCH_SIZE + 10)
+    ]
+    dump_file = tmp_path / "test.dump"
+    dump_file.write_text("\n".join(json.dumps(e) for e in entries))
+
+    shards = _split_dump_file(str(dump_file), 4)
+    assert len(shards) == 4
+    assert shards[0][0] == 0
+    assert shards[-1][1] == dump_file.stat().st_size
+
+    # Verify that every entry is processed exactly once, across all the shards
+    processed = []
+    results = []
+    with patch(
+        "cernopendata.tasks._process_batch",
+        side_effect=lambda args, snapshot=None: processed.extend(
+            e["path"] for e in args
+        ),
+    ):
+        for start, end in shards:
+            results.append(_process_shard(str(dump_file), start, end))
+    assert sorted(processed) == sorted(e["path"] for e in entries)
+
+    summary = summarise_eos_dump(results)
+    assert summary == {"processed": len(entries), "skipped": 0, "failed": 0}
+
+
+def test_split_dump_file_single_shard(tmp_path):
+    dump_file = tmp_path / "test.dump"
+    dump_file.write_text("")
+    assert _split_dump_file(str(dump_file), 4) == [(0, 0)]
+
+
+def test_split_dump_file_smaller_than_the_shards(tmp_path):
+    dump_file = tmp_path / "test.dump"
+    dump_file.write_text('{"a"}\n{}')
+    assert _split_dump_file(str(dump_file), 20) == [(0, 6), (6, 8)]
+
+    dump_file.write_text("{}")
+    assert _split_dump_file(str(dump_file), 4) == [(0, 2)]
+
+
+def test_process_eos_dump_incremental(app, tmp_path):
+    fingerprint = str(tmp_path / "fingerprint")
+    entries = [
+        {"path": f"/eos/opendata/file_{i}.root", "size": 1, "mtime": 0, "atime": 0}
+        for i in range(5)
+    ]
+    dump_file = tmp_path / "test.dump"
+    dump_file.write_text("\n".join(json.dumps(e) for e in entries))
+
+    processed = []
+    removed = []
+    app.config["CERNOPENDATA_EOS_DUMP_FINGERPRINT"] = fingerprint
+    try:
+        with patch("cernopendata.tasks.EOS_DUMP_PATH", str(dump_file)), patch(
+            "cernopendata.tasks._process_batch",
+            side_effect=lambda args, snapshot=None: processed.extend(
+                e["path"] for e in args
+            ),
+        ), patch(
+            "cernopendata.tasks._remove_dark_files",
+            side_effect=lambda ids: removed.extend(ids),
+        ):
+            # The first time, all the entries are processed
+            process_eos_dump()
+            assert len(processed) == 5
+
+            # Nothing changed
+            processed.clear()
+            process_eos_dump()
+            assert processed == []
+
+            # One accessed, one new and one removed
+            entries[0]["atime"] = 10
+            entries[4]["path"] = "/eos/opendata/new_file.root"
+            dump_file.write_text("\n".join(json.dumps(e) for e in entries))
+            process_eos_dump()
+            assert sorted(processed) == [
+                "/eos/opendata/file_0.root",
+                "/eos/opendata/new_file.root",
+            ]
+            assert removed == [_path_to_id("/eos/opendata/file_4.root")]
+
+            # Unless the full dump is requested
+            processed.clear()
+            process_eos_dump(full=True)
+            assert len(processed) == 5
+    finally:
+        app.config["CERNOPENDATA_EOS_DUMP_FINGERPRINT"] = None
+
+
+def test_shards_write_the_fingerprint(app, tmp_path):
+    fingerprint = str(tmp_path / "fingerprint")
+    entries = [
+        {"path": f"/eos/opendata/file_{i}.root", "size": 1, "mtime": 0, "atime": i}
+        for i in range(50)
+    ]
+    entries[7]["path"] = f"/eos/opendata{IGNORED_PATH}file.root"
+    dump_file = tmp_path / "test.dump"
+    dump_file.write_text("\n".join(json.dumps(e) for e in entries))
+
+    with patch("cernopendata.tasks._process_batch"), patch(
+        "cernopendata.tasks.FINGERPRINT_CHUNK_SIZE", 4
+    ):
+        results = [
+            _process_shard(str(dump_file), start, end, fingerprint=fingerprint)
+            for start, end in _split_dump_file(str(dump_file), 3)
+        ]
+    summarise_eos_dump(results, fingerprint, str(dump_file))
+
+    _write_fingerprint(str(dump_file), str(tmp_path / "expected"))
+    with open(fingerprint) as f, open(tmp_path / "expected") as expected:
+        assert f.read() == expected.read()
+    assert sorted(os.listdir(tmp_path)) == ["expected", "fingerprint", "test.dump"]
+
+
+def test_process_eos_dump_with_snapshot(app, search, tmp_path, mock_eos_dump):
+    mapping_index = f"{app.config['SEARCH_INDEX_PREFIX']}records-recid_mapping"
+    path = "/eos/opendata/cms/test_file.root"
+    doc_id = _path_to_id(path)
+    search.index(
+        index=mapping_index,
+        id=doc_id,
+        body={"uri": path, "recid": "1114", "last_accessed": "2020-01-01T00:00:00"},
+    )
+    search.indices.refresh()
+
+    snapshot = str(tmp_path / "snapshot.sqlite")
+    DumpSnapshot.build(snapshot)
+    known = DumpSnapshot(snapshot).lookup([{"path": path}], "mapping")
+    assert known == {path: {"id": doc_id, "last_accessed": "2020-01-01T00:00:00"}}
+
+    app.config["CERNOPENDATA_EOS_DUMP_SNAPSHOT"] = snapshot
+    try:
+        with patch("cernopendata.tasks.EOS_DUMP_PATH", mock_eos_dump), patch(
+            "cernopendata.tasks._get_existing_mapping_info"
+        ) as mock_search:
+            process_eos_dump()
+            search.indices.refresh()
+            # Verify that the indices were not queried for every batch
+            mock_search.assert_not_called()
+
+        result = search.get(index=mapping_index, id=doc_id)
+        assert (
+            result["_source"]["last_accessed"]
+            == datetime.fromtimestamp(1774502518).isoformat()
+        )
+    finally:
+        app.config["CERNOPENDATA_EOS_DUMP_SNAPSHOT"] = None
+
+
+def test_process_eos_dump_resume(app, cli_runner, tmp_path):
+    entries = [
+        {"path": f"/eos/opendata/file_{i}.root", "size": 1, "mtime": 0, "atime": 0}
+        for i in range(3 * BATCH_SIZE)
+    ]
+    dump_file = tmp_path / "test.dump"
+    dump_file.write_text("\n".join(json.dumps(e) for e in entries))
+
+    class WorkerLost(BaseException):
+        pass
+
+    processed = []
+
+    def _crash_on_second_batch(batch, snapshot=None):
+        if len(processed) == BATCH_SIZE:
+            raise WorkerLost()
+        processed.extend(e["path"] for e in batch)
+
+    with patch("cernopendata.tasks.EOS_DUMP_PATH", str(dump_file)), patch(
+        "cernopendata.tasks.CHECKPOINT_BATCHES", 1
+    ):
+        with patch(
+            "cernopendata.tasks._process_batch", side_effect=_crash_on_second_batch
+        ):
+            with pytest.raises(WorkerLost):
+                process_eos_dump()
+        assert len(processed) == BATCH_SIZE
+
+        result = cli_runner.invoke(cold, ["eos-dump", "status"], obj=app)
+        assert "0/1 shards finished" in result.output
+        assert f"Processed {BATCH_SIZE} entries" in result.output
+
+        # The next run continues after the first batch
+        with patch(
+            "cernopendata.tasks._process_batch",
+            side_effect=lambda args, snapshot=None: processed.extend(
+                e["path"] for e in args
+            ),
+        ):
+            summary = process_eos_dump()
+        assert sorted(processed) == sorted(e["path"] for e in entries)
+        assert summary["processed"] == len(entries)
+
+    result = cli_runner.invoke(cold, ["eos-dump", "reset"], obj=app)
+    assert "1 checkpoints removed" in result.output
+
+
+@pytest.fixture()
+def synthetic_dump(tmp_path):
+    """Synthetic dump. The number of lines can be increased with EOS_DUMP_BENCHMARK_LINES."""
+    lines = int(os.environ.get("EOS_DUMP_BENCHMARK_LINES", 10000))
+    dump_file = tmp_path / "synthetic.dump"
+    with open(dump_file, "w") as f:
+        for i in range(lines):
+            entry = {
+                "path": f"/eos/opendata/dataset_{i // 1000}/file_{i}.root",
+                "adler32": "9719fd6a",
+                "size": i,
+                "mtime": 1774502519 - i % 3600,
+                "atime": 1774502519 - i % 86400,
+                "uid": 0,
+                "gid": 0,
+            }
+            f.write(json.dumps(entry) + "\n")
+    return str(dump_file), lines
+
+
+def test_stream_dump_file_fields(synthetic_dump):
+    dump_file, lines = synthetic_dump
+
+    entries = [
+        (entry, _to_iso(entry["atime"])) for entry in _stream_dump_file(dump_file)
+    ]
+
+    assert len(entries) == lines
+    # Only the fields that are used are kept
+    assert set(entries[0][0]) == {"path", "adler32", "size", "mtime", "atime"}
+    assert entries[0][1] == datetime.fromtimestamp(1774502519).isoformat()
+
+    # Both backends give the same result
+    with patch("cernopendata.tasks.orjson", None):
+        assert [entry for entry, _ in entries] == list(_stream_dump_file(dump_file))
+
+
+def test_dark_report(app, cli_runner, tmp_path):
+    entries = [
+        {"path": "/eos/opendata/cms/dark/a.root", "size": 10, "mtime": 0, "atime": 100},
+        {"path": "/eos/opendata/cms/dark/b.root", "size": 20, "mtime": 0, "atime": 300},
+        {"path": "/eos/opendata/atlas/c.root", "size": 5, "mtime": 0, "atime": 200},
+    ]
+    dump_file = tmp_path / "test.dump"
+    dump_file.write_text("\n".join(json.dumps(e) for e in entries))
+
+    with patch("cernopendata.tasks.EOS_DUMP_PATH", str(dump_file)), patch(
+        "cernopendata.tasks._get_existing_mapping_info", return_value={}
+    ), patch("cernopendata.tasks._get_records_by_paths", return_value=[]), patch(
+        "cernopendata.tasks.search.helpers.bulk", return_value=(3, 0)
+    ):
+        process_eos_dump()
+        # Processing the same dump again does not count the files twice
+        process_eos_dump()
+
+    result = cli_runner.invoke(
+        cold, ["eos-dump", "dark-report", "--depth", "3", "--json"], obj=app
+    )
+    report = json.loads(result.output)
+    assert [(d["directory"], d["files"], d["size"]) for d in report] == [
+        ("/eos/opendata/cms", 2, 30),
+        ("/eos/opendata/atlas", 1, 5),
+    ]
+    assert report[0]["oldest_access"] == datetime.fromtimestamp(100).isoformat()
+    assert report[0]["newest_access"] == datetime.fromtimestamp(300).isoformat()